@@ -4,86 +4,110 @@ import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from collections import defaultdict, OrderedDict
+from src.sel_corpus import read_settings_file, load_corpus, DEFAULT_SEL_CACHE_DIR
+from src.sel_logic import parse_setting, references
+
+# Longest n-gram in the search index, longer search terms are narrowed with their n-grams and then checked
+SEARCH_NGRAM = 3
+# Delay after the last keystroke before the search runs, in milliseconds
+SEARCH_DELAY_MS = 150
+
+LATCH_PATTERN = re.compile(r'(SET|RST)(\d+)$')
 
 class SELLogicDecoder:
-    def __init__(self):
+    def __init__(self, verbose=False):
+        self.verbose = verbose  # Print every file parsed
         self.logic_bits = {}  # Dictionary to store logic bit definitions
         self.settings = {}  # Dictionary to store other settings (non-logic)
-        
+        self.parsed = {}  # Setting text -> [(SET:/RST: prefix or "", sel_logic.Logic)], parsed once
+        self.uses = {}  # Setting -> words its value references, see build_reference_index
+        self.used_by = {}  # Word -> settings whose value references it
+        self.search_index = None  # See build_search_index, rebuilt on the next search after a file is parsed
+        self._last_search = None  # (search term, ids of its matches), narrows the next search while typing
+        
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
     def parse_settings_file(self, file_path):
         """Parse an SEL settings file and extract logic bits and other settings."""
         try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-
-            # Find the section identifier (e.g., [1], [2], [L1], [L2], etc.)
-            section_match = re.search(r'\[([A-Z0-9]+)\]', content)
-            if section_match:
-                section = section_match.group(1)
-                print(f"Processing section {section} from {file_path}")
-                
-                # Extract all settings with pattern "SETTING_NAME,"VALUE""
-                settings_pattern = re.finditer(r'([A-Z0-9_]+),"([^"]*)"', content)
-                
-                for match in settings_pattern:
-                    setting_name = match.group(1)
-                    value = match.group(2).strip()
-                    
-                    # Skip empty settings
-                    if value == "NA" or value == "0" or not value:
-                        continue
-                    
-                    # Determine if it's a logic equation or regular setting
-                    if any(op in value for op in [" AND ", " OR ", " NOT ", "("]) or "TRIG" in value:
-                        # It looks like a logic equation
-                        self.logic_bits[setting_name] = value
-                    else:
-                        # It's probably a regular setting
-                        self.settings[setting_name] = value
-                
-                # Special handling for SET/RST logic bits which define LT bits
-                set_patterns = re.finditer(r'SET(\d+),"([^"]*)"', content)
-                rst_patterns = re.finditer(r'RST(\d+),"([^"]*)"', content)
-                
-                # Store SET logic
-                for match in set_patterns:
-                    bit_num = match.group(1)
-                    logic = match.group(2).strip()
-                    if logic != "NA" and logic != "0":
-                        bit_name = f"LT{bit_num}"
-                        self.logic_bits[bit_name] = f"SET: {logic}"
-                
-                # Store RST logic
-                for match in rst_patterns:
-                    bit_num = match.group(1)
-                    logic = match.group(2).strip()
-                    if logic != "NA" and logic != "0":
-                        # If LT already exists, append the RST logic
-                        bit_name = f"LT{bit_num}"
-                        if bit_name in self.logic_bits:
-                            self.logic_bits[bit_name] += f"\nRST: {logic}"
-                        else:
-                            self.logic_bits[bit_name] = f"RST: {logic}"
-                
-                return True
-            else:
-                print(f"No section found in {file_path}")
-                return False
-                
-        except Exception as e:
+            settings_file = read_settings_file(file_path)
+        except (OSError, UnicodeDecodeError) as e:
             print(f"Error parsing file {file_path}: {e}")
             return False
+        return self.load_settings_file(settings_file)
+
+    def load_settings_file(self, settings_file):
+        """Add the settings of a sel_corpus.SettingsFile, split into logic bits and other settings."""
+        self.search_index = None
+        if not settings_file.group:
+            self.log(f"No section found in {settings_file.path}")
+            return False
+        self.log(f"Processing section {settings_file.group} from {settings_file.path}")
+        
+        for setting_name, value in settings_file.settings:
+            # Skip empty settings
+            if value == "NA" or value == "0" or not value:
+                continue
+            
+            # Determine if it's a logic equation or regular setting
+            if any(op in value for op in [" AND ", " OR ", " NOT ", "("]) or "TRIG" in value:
+                # It looks like a logic equation
+                self.logic_bits[setting_name] = value
+            else:
+                # It's probably a regular setting
+                self.settings[setting_name] = value
+        
+        # Special handling for SET/RST logic bits which define LT bits, SET first so RST is appended
+        latches = [(LATCH_PATTERN.match(name), logic) for name, logic in settings_file.settings]
+        for match, logic in latches:
+            if match and match.group(1) == "SET" and logic != "NA" and logic != "0":
+                self.logic_bits[f"LT{match.group(2)}"] = f"SET: {logic}"
+        
+        for match, logic in latches:
+            if match and match.group(1) == "RST" and logic != "NA" and logic != "0":
+                # If LT already exists, append the RST logic
+                bit_name = f"LT{match.group(2)}"
+                if bit_name in self.logic_bits:
+                    self.logic_bits[bit_name] += f"\nRST: {logic}"
+                else:
+                    self.logic_bits[bit_name] = f"RST: {logic}"
+        
+        return True
     
-    def parse_directory(self, directory):
-        """Parse all .txt files in a directory that might contain SEL settings."""
+    def parse_directory(self, directory, cache_dir=DEFAULT_SEL_CACHE_DIR, workers=1):
+        """
+        Parse all .txt files in a directory that might contain SEL settings.
+
+        :param cache_dir: parsed file cache, see sel_corpus.load_corpus, None to always parse
+        :param workers: process pool size, worth it for large folders only
+        """
+        corpus = load_corpus([directory], cache_dir=cache_dir, workers=workers, verbose=self.verbose)
         success = False
-        for filename in os.listdir(directory):
-            if filename.lower().endswith('.txt'):
-                file_path = os.path.join(directory, filename)
-                if self.parse_settings_file(file_path):
-                    success = True
+        for settings_file in corpus.files:
+            if self.load_settings_file(settings_file):
+                success = True
         return success
     
+    def parse_value(self, expression):
+        """
+        Parse a setting value once, SET/RST latch values give one tree per line.
+
+        :return: list of (prefix, sel_logic.Logic), prefix is "SET:", "RST:" or ""
+        """
+        parts = self.parsed.get(expression)
+        if parts is None:
+            if expression.startswith("SET:") or expression.startswith("RST:"):
+                parts = []
+                for part in expression.split("\n"):
+                    prefix, _, logic = part.partition(":")
+                    parts.append((prefix + ":", parse_setting(logic.strip())))
+            else:
+                parts = [("", parse_setting(expression))]
+            self.parsed[expression] = parts
+        return parts
+
     def simple_expand_logic(self, expression):
         """
         Simply replace word bits with their definitions without recursive expansion.
@@ -92,32 +116,13 @@ class SELLogicDecoder:
         if not expression or expression == "0" or expression == "NA":
             return expression
         
-        # If it's a SET/RST definition, handle separately
-        if expression.startswith("SET:") or expression.startswith("RST:"):
-            parts = expression.split("\n")
-            expanded_parts = []
-            for part in parts:
-                prefix = part.split(":")[0] + ":"
-                logic = ":".join(part.split(":")[1:]).strip()
-                expanded_logic = self.simple_expand_logic(logic)
-                expanded_parts.append(f"{prefix} {expanded_logic}")
-            return "\n".join(expanded_parts)
-            
-        # Find all word bits (like LT01, SV02, etc.) in the expression
-        word_bits = re.findall(r'\b([A-Z0-9_]+)(?!\s*=|\s*:)', expression)
-        
-        # Prepare expanded explanation
-        bit_definitions = []
-        for bit in word_bits:
-            # Skip if it's a common operator or number
-            if bit in ["AND", "OR", "NOT", "XOR", "R_TRIG", "F_TRIG"] or bit.isdigit():
-                continue
-            
-            # Get the definition if available
-            if bit in self.logic_bits:
-                bit_definitions.append(f"{bit} = {self.logic_bits[bit]}")
+        # Word bits (like LT01, SV02, etc.) referenced by the expression, operators and numbers are not words
+        words = []
+        for _, logic in self.parse_value(expression):
+            words.extend(word for word in references(logic) if word not in words)
         
-        # Return original expression followed by bit definitions
+        # Return original expression followed by the definitions of the bits that have one
+        bit_definitions = [f"{bit} = {self.logic_bits[bit]}" for bit in words if bit in self.logic_bits]
         if bit_definitions:
             return expression + "\n\nWhere:\n" + "\n".join(bit_definitions)
         else:
@@ -157,21 +162,100 @@ class SELLogicDecoder:
         """Get all logic bits as a sorted dictionary."""
         return dict(sorted(self.logic_bits.items()))
     
+    def build_reference_index(self):
+        """
+        Index which words every setting references and, inverted, which settings reference each word.
+        Words are whole tokens from the parsed value, so LT1 never matches inside LT11.
+        """
+        self.uses = {}
+        self.used_by = defaultdict(set)
+        for name, value in self.get_all_settings().items():
+            words = []
+            for _, logic in self.parse_value(str(value)):
+                words.extend(word for word in references(logic) if word not in words)
+            self.uses[name] = words
+            for word in words:
+                self.used_by[word].add(name)
+        self.used_by = dict(self.used_by)
+
+    def referenced_by(self, name):
+        """Settings whose value references name directly"""
+        return sorted(self.used_by.get(name, ()))
+
+    def _traverse(self, name, edges):
+        """Every node reachable from name over edges, breadth first, name itself left out"""
+        seen = {name}
+        queue = [name]
+        reached = []
+        for current in queue:
+            for following in edges.get(current, ()):
+                if following not in seen:
+                    seen.add(following)
+                    queue.append(following)
+                    reached.append(following)
+        return reached
+
+    def drives(self, name):
+        """Everything name ultimately feeds, the settings that reference it directly or through other settings"""
+        return sorted(self._traverse(name, self.used_by))
+
+    def driven_by(self, name):
+        """
+        Everything that ultimately drives name, split into the settings in between and the
+        input words (relay word bits, analog quantities) that have no setting of their own.
+
+        :return: (settings, inputs), both sorted
+        """
+        reached = self._traverse(name, self.uses)
+        settings = sorted(word for word in reached if word in self.uses)
+        inputs = sorted(word for word in reached if word not in self.uses)
+        return settings, inputs
+
+    def build_search_index(self):
+        """
+        Index every 1 to SEARCH_NGRAM character substring of the setting names and upper case values.
+        A search then only checks the settings holding all n-grams of the search term.
+        """
+        all_settings = self.get_all_settings()
+        names = list(all_settings)
+        values = [str(value).upper() for value in all_settings.values()]
+        grams = defaultdict(set)
+        for i, (name, value) in enumerate(zip(names, values)):
+            for text in (name, value):
+                for n in range(1, SEARCH_NGRAM + 1):
+                    for start in range(len(text) - n + 1):
+                        grams[text[start:start + n]].add(i)
+        self.search_index = (names, values, dict(grams), all_settings)
+        self._last_search = None
+
     def search_settings(self, search_term):
-        """Search for settings containing the search term."""
-        results = {}
+        """Search for settings containing the search term, names matches first, then value matches."""
+        if self.search_index is None:
+            self.build_search_index()
+        names, values, grams, all_settings = self.search_index
         search_term = search_term.upper()
+        if not search_term:
+            return {}
         
-        # Search in setting names
-        for name, value in self.get_all_settings().items():
-            if search_term in name:
-                results[name] = value
+        # Candidates hold every n-gram of the term, smallest posting sets first
+        if len(search_term) <= SEARCH_NGRAM:
+            candidates = grams.get(search_term, set())
+        else:
+            postings = sorted((grams.get(search_term[start:start + SEARCH_NGRAM], set())
+                               for start in range(len(search_term) - SEARCH_NGRAM + 1)), key=len)
+            candidates = postings[0].intersection(*postings[1:])
         
-        # Search in setting values
-        for name, value in self.get_all_settings().items():
-            if name not in results and search_term in str(value).upper():
-                results[name] = value
-                
+        # A term that extends the previous one can only match among the previous matches
+        if self._last_search is not None and self._last_search[0] in search_term:
+            candidates = candidates & self._last_search[1]
+        
+        name_matches = sorted(i for i in candidates if search_term in names[i])
+        value_matches = sorted(i for i in candidates if search_term not in names[i] and search_term in values[i])
+        self._last_search = (search_term, set(name_matches) | set(value_matches))
+        
+        results = {}
+        for i in name_matches + value_matches:
+            results[names[i]] = all_settings[names[i]]
         return results
 
 
@@ -185,6 +269,9 @@ class SELLogicBrowserGUI:
         self.decoder = SELLogicDecoder()
         self.current_dir = ""
         self.current_equation = ""
+        self.all_items = []  # Every Treeview row, attached or detached
+        self.visible_items = []  # Treeview rows currently attached, in display order
+        self._search_after = None  # Pending debounced search
         
         self._create_ui()
         
@@ -297,6 +384,7 @@ class SELLogicBrowserGUI:
         self.decoder = SELLogicDecoder()
         if self.decoder.parse_directory(directory):
             self.current_dir = directory
+            self.decoder.build_reference_index()
             self._populate_settings_list()
             self._populate_categories()
             self.status_var.set(f"Loaded settings from {directory}")
@@ -305,7 +393,8 @@ class SELLogicBrowserGUI:
             messagebox.showwarning("Warning", "No valid SEL settings files found in the selected directory")
     
     def _populate_settings_list(self):
-        self.settings_list.delete(*self.settings_list.get_children())
+        # Detached rows are not children, delete them by name too
+        self.settings_list.delete(*self.all_items)
         
         all_settings = self.decoder.get_all_settings()
         for name, value in all_settings.items():
@@ -338,6 +427,8 @@ class SELLogicBrowserGUI:
                 prefix = name[:2] if len(name) > 2 else ""
                 
             self.settings_list.insert("", tk.END, iid=name, text=name, values=(setting_type,), tags=(prefix,))
+        self.all_items = list(all_settings)
+        self.visible_items = list(all_settings)
         
         self.status_var.set(f"Loaded {len(all_settings)} settings")
     
@@ -386,27 +477,55 @@ class SELLogicBrowserGUI:
         self._show_references(equation_name)
     
     def _show_references(self, equation_name):
-        """Find and display settings that reference the current equation."""
-        references = []
-        for name, value in self.decoder.get_all_settings().items():
-            if equation_name in str(value):
-                references.append(name)
+        """Display the settings that reference the current equation, directly and through other settings."""
+        references = self.decoder.referenced_by(equation_name)
         
         self.references_text.delete(1.0, tk.END)
         if references:
             self.references_text.insert(tk.END, ", ".join(references))
         else:
             self.references_text.insert(tk.END, "No references found")
+        
+        feeds = [name for name in self.decoder.drives(equation_name) if name not in references]
+        if feeds:
+            self.references_text.insert(tk.END, "\n\nIndirectly feeds: " + ", ".join(feeds))
+        
+        settings, inputs = self.decoder.driven_by(equation_name)
+        if inputs:
+            self.references_text.insert(tk.END, "\n\nDriven by inputs: " + ", ".join(inputs))
+        if settings:
+            self.references_text.insert(tk.END, "\nThrough settings: " + ", ".join(settings))
+    
+    def _show_items(self, names):
+        """
+        Make names the attached rows, in order, touching only the rows that change. Rows that stay
+        and are already in order are left alone, the others are detached or moved into place.
+        """
+        wanted = set(names)
+        kept = []
+        for item in self.visible_items:
+            if item in wanted:
+                kept.append(item)
+            else:
+                self.settings_list.detach(item)
+        
+        moved = set()
+        j = 0
+        for i, item in enumerate(names):
+            while j < len(kept) and kept[j] in moved:
+                j += 1
+            if j < len(kept) and kept[j] == item:
+                j += 1
+                continue
+            # Moving a row to index i shifts the rest down, so the remaining kept rows stay in order
+            self.settings_list.move(item, "", i)
+            moved.add(item)
+        self.visible_items = list(names)
     
     def _apply_filter(self):
         filter_type = self.filter_var.get()
         category = self.category_var.get()
         
-        # Show all items first
-        for item in self.settings_list.get_children():
-            self.settings_list.item(item, open=True)
-            self.settings_list.detach(item)
-        
         # Apply type filter
         all_items = []
         for name, value in self.decoder.get_all_settings().items():
@@ -418,34 +537,33 @@ class SELLogicBrowserGUI:
                 all_items.append(name)
         
         # Apply category filter
-        for item in all_items:
-            if category == "All":
-                self.settings_list.reattach(item, "", tk.END)
-            elif item.startswith(category):
-                self.settings_list.reattach(item, "", tk.END)
+        self._show_items([item for item in all_items if category == "All" or item.startswith(category)])
         
         self.status_var.set(f"Filter applied: {filter_type}, Category: {category}")
     
     def _on_search(self, *args):
+        # Wait for a pause in typing, only the last keystroke runs a search
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+        self._search_after = self.root.after(SEARCH_DELAY_MS, self._run_search)
+    
+    def _run_search(self):
+        self._search_after = None
         search_term = self.search_var.get().strip().upper()
         if not search_term:
             self._apply_filter()  # Reset to current filter
             return
         
-        # Hide all items
-        for item in self.settings_list.get_children():
-            self.settings_list.detach(item)
-        
-        # Search in both names and values
+        # Search in both names and values, then show only the matching items
         results = self.decoder.search_settings(search_term)
-        
-        # Show matching items
-        for name in results:
-            self.settings_list.reattach(name, "", tk.END)
+        self._show_items(list(results))
         
         self.status_var.set(f"Search results for '{search_term}': {len(results)} matches")
     
     def _clear_search(self):
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+            self._search_after = None
         self.search_var.set("")
         self._apply_filter()  # Reset to current filter
 
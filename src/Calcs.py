@@ -1,9 +1,115 @@
 import cmath
 import math
 import numpy as np
-import matplotlib.pyplot as plt
-
-def primary_line_fault_calculation(ZBus_obj, Zline_obj, buffer):
+import pandas as pd
+from dataclasses import dataclass, field
+import FaultArrays
+from Classes import ZTrans
+from FaultLocator import compute_fault_location
+from FaultLocationPlot import plot_fault_location
+
+@dataclass
+class FaultCurrents:
+    """One fault type, the summary current and the A, B, C phase currents in amps and degrees"""
+    magnitude: float
+    angle_degs: float
+    phase_mags: tuple
+    phase_angles_degs: tuple
+
+@dataclass
+class PrimaryLineFaultResult:
+    """Numbers from primary_line_fault_calculation, format_primary_line_fault renders them as text"""
+    label: str
+    voltage_level: float
+    Z_pos_line_pohms_mag: float
+    Z_pos_line_sohms_mag: float
+    Zpos_per_mag: float
+    Z_pos_angle_degs: float
+    Zo_line_pohms_mag: float
+    Zo_line_sohms_mag: float
+    Zo_per_mag: float
+    Zo_angle_degs: float
+    Zpos_pu: complex # bus + line
+    Zo_pu: complex
+    X_R_pos: float
+    X_R_zero: float = float('nan') # nan on 4.6 kV, no Zo
+    faults: dict = field(default_factory=dict) # 'ABC', 'AG', 'BC', 'BCG' -> FaultCurrents, no ground faults on 4.6 kV
+
+    @property
+    def has_zero_seq(self):
+        return self.voltage_level != 4.6
+
+@dataclass
+class SecTransFaultResult:
+    """Numbers from sec_trans_fault_calculation, format_sec_trans_fault renders them as text"""
+    trans_conn: str
+    voltage_level: float
+    Zpos_lt_pohms_mag: float # line + transformer
+    Zpos_lt_sohms_mag: float
+    Zpos_lt_angle_degs: float
+    Zo_lt_pohms_mag: float
+    Zo_lt_sohms_mag: float
+    Zo_lt_angle_degs: float
+    Zpos_pu: complex # bus + line + transformer
+    Zo_pu: complex
+    X_R_pos: float
+    X_R_zero: float = float('nan') # nan unless the secondary is grounded
+    faults: dict = field(default_factory=dict) # 'ABC', 'AG', 'BC', 'BCG' -> FaultCurrents at the secondary
+    pri_side: dict = field(default_factory=dict) # fault magnitudes seen by the transformer high side
+
+    @property
+    def has_ground(self):
+        return self.trans_conn == 'Δ-Yg' or self.trans_conn == 'Yg-Yg'
+
+def _fault_lines(faults):
+    #Faults in alignment
+    line_format = "{:<4} {:>15} {:>4} {:>15} {:>4} {:>15} {:>4} {:>15}"
+    for name, fault in faults.items():
+        phases = [f"{mag:.0f}∠{ang:.2f}°A" for mag, ang in zip(fault.phase_mags, fault.phase_angles_degs)]
+        total = f"{fault.magnitude:.0f}∠{fault.angle_degs:.2f}°A"
+        yield line_format.format(f"{name}:", total, "A:", phases[0], "B:", phases[1], "C:", phases[2]) + "\n"
+
+def format_primary_line_fault(result):
+    """Text lines for a PrimaryLineFaultResult, generated only when they are read"""
+    yield f"\nLine Impedance: \n"
+    yield f"Z+: {result.Z_pos_line_pohms_mag:.2f}∠{result.Z_pos_angle_degs:.2f}° Pri. Ohms,    {result.Z_pos_line_sohms_mag:.2f}∠{result.Z_pos_angle_degs:.2f}° Sec. Ohms,    {result.Zpos_per_mag:.2f}∠{result.Z_pos_angle_degs:.2f}° %\n"
+    if result.has_zero_seq:
+        yield f"Z0: {result.Zo_line_pohms_mag:.2f}∠{result.Zo_angle_degs:.2f}° Pri. Ohms,    {result.Zo_line_sohms_mag:.2f}∠{result.Zo_angle_degs:.2f}° Sec. Ohms,    {result.Zo_per_mag:.2f}∠{result.Zo_angle_degs:.2f}° %\n"
+    yield f"\nX/R Positive Seq: {result.X_R_pos:.2f}\n"
+    if result.has_zero_seq:
+        yield f"X/R Zero Seq: {result.X_R_zero:.2f}\n"
+
+    yield f"\nAvailable fault currents at {result.label}: \n"
+    yield from _fault_lines(result.faults)
+
+def format_sec_trans_fault(result):
+    """Text lines for a SecTransFaultResult, generated only when they are read"""
+    yield f"\nLine + Transformer Impedances (used for distance calculations): \n"
+    yield f"+Z: {result.Zpos_lt_pohms_mag:.2f}∠{result.Zpos_lt_angle_degs:.2f}° Pri. Ohms,   +Z: {result.Zpos_lt_sohms_mag:.2f}∠{result.Zpos_lt_angle_degs:.2f}° Sec. Ohms\n"
+    if result.voltage_level != 4.6:
+        yield f"Z0: {result.Zo_lt_pohms_mag:.2f}∠{result.Zo_lt_angle_degs:.2f}° Pri. Ohms,   +Z: {result.Zo_lt_sohms_mag:.2f}∠{result.Zo_lt_angle_degs:.2f}° Sec. Ohms\n"
+
+    yield f"\nBus + Line + Transformer Impedances (p.u.): \n"
+    yield f"+Z: {result.Zpos_pu:.3f} \n"
+    yield f"Z0: {result.Zo_pu:.3f} \n"
+
+    yield f"\nX/R Positive Seq at secondary of transformer: {result.X_R_pos:.2f}\n"
+    if result.has_ground:
+        yield f"X/R Zero Seq on secondary of transformer: {result.X_R_zero:.2f}\n"
+    yield f"\nAvailable fault currents at secondary of transformer: \n"
+    yield from _fault_lines(result.faults)
+
+    yield f"\nTR Secondary fault magnitudes as seen by transformer high side: \n"
+    for name, magnitude in result.pri_side.items():
+        yield f"{name}: {magnitude:.0f}A\n"
+
+def primary_line_fault_calculation(ZBus_obj, Zline_obj, buffer=None):
+    """
+    Fault currents at the end of the line fed from the bus.
+
+    :param buffer: list, the formatted text is appended when given
+    :return: PrimaryLineFaultResult
+    """
     MVA_base = ZBus_obj.MVA_base
     Zbase = ZBus_obj.Zbase 
     Ibase = ZBus_obj.Ibase
@@ -95,56 +201,46 @@ def primary_line_fault_calculation(ZBus_obj, Zline_obj, buffer):
         l_l_g_fault_pu_ang_rads_Cph = cmath.phase(l_l_g_fault_Cph_pu)
         l_l_g_fault_pu_ang_degs_Cph = math.degrees(l_l_g_fault_pu_ang_rads_Cph)
     
-    #Print to buffer
-    buffer.append(f"\nLine Impedance: \n")
-    buffer.append(f"Z+: {Z_pos_line_pohms_mag:.2f}∠{Z_pos_angle_degs:.2f}° Pri. Ohms,    {Z_pos_line_sohms_mag:.2f}∠{Z_pos_angle_degs:.2f}° Sec. Ohms,    {Zpos_per_mag:.2f}∠{Z_pos_angle_degs:.2f}° %\n")
+    result = PrimaryLineFaultResult(
+        label=Zline_obj.label,
+        voltage_level=voltage_level,
+        Z_pos_line_pohms_mag=Z_pos_line_pohms_mag,
+        Z_pos_line_sohms_mag=Z_pos_line_sohms_mag,
+        Zpos_per_mag=Zpos_per_mag,
+        Z_pos_angle_degs=Z_pos_angle_degs,
+        Zo_line_pohms_mag=Zo_line_pohms_mag,
+        Zo_line_sohms_mag=Zo_line_sohms_mag,
+        Zo_per_mag=Zo_per_mag,
+        Zo_angle_degs=Zo_angle_degs,
+        Zpos_pu=Zpos_pu,
+        Zo_pu=Zo_pu,
+        X_R_pos=X_R_pos
+    )
+
+    result.faults['ABC'] = FaultCurrents(three_ph_fault, three_ph_fault_pu_ang_degs,
+                                         (three_ph_fault_Aph, three_ph_fault_Bph, three_ph_fault_Cph),
+                                         (three_ph_fault_pu_ang_degs_Aph, three_ph_fault_pu_ang_degs_Bph, three_ph_fault_pu_ang_degs_Cph))
     if voltage_level != 4.6:
-        buffer.append(f"Z0: {Zo_line_pohms_mag:.2f}∠{Zo_angle_degs:.2f}° Pri. Ohms,    {Zo_line_sohms_mag:.2f}∠{Zo_angle_degs:.2f}° Sec. Ohms,    {Zo_per_mag:.2f}∠{Zo_angle_degs:.2f}° %\n")
-    buffer.append(f"\nX/R Positive Seq: {X_R_pos:.2f}\n")
-    if voltage_level != 4.6:
-        buffer.append(f"X/R Zero Seq: {X_R_zero:.2f}\n")
-    
-    #Print faults to buffer in alignment
-    line_format = "{:<4} {:>15} {:>4} {:>15} {:>4} {:>15} {:>4} {:>15}"
-    buffer.append(f"\nAvailable fault currents at {Zline_obj.label}: \n")
-
-    #Print formatted abc fault to buffer
-    abc_fault = f"{three_ph_fault:.0f}∠{three_ph_fault_pu_ang_degs:.2f}°A"
-    a_phase_fault = f"{three_ph_fault_Aph:.0f}∠{three_ph_fault_pu_ang_degs_Aph:.2f}°A"
-    b_phase_fault = f"{three_ph_fault_Bph:.0f}∠{three_ph_fault_pu_ang_degs_Bph:.2f}°A"
-    c_phase_fault = f"{three_ph_fault_Cph:.0f}∠{three_ph_fault_pu_ang_degs_Cph:.2f}°A"
-    output_line = line_format.format("ABC:", abc_fault, "A:", a_phase_fault, "B:", b_phase_fault, "C:", c_phase_fault)
-    buffer.append(output_line + "\n")
-    
-    #Print formatted AG fault to buffer
+        result.X_R_zero = X_R_zero
+        result.faults['AG'] = FaultCurrents(l_g_fault, l_g_fault_pu_ang_degs, (l_g_fault, 0, 0), (l_g_fault_pu_ang_degs, 0, 0))
+    result.faults['BC'] = FaultCurrents(l_l_fault, l_l_fault_pu_ang_degs, (0, l_l_fault_Bph, l_l_fault_Cph),
+                                        (0, l_l_fault_pu_ang_degs_Bph, l_l_fault_pu_ang_degs_Cph))
     if voltage_level != 4.6:
-        ag_fault = f"{l_g_fault:.0f}∠{l_g_fault_pu_ang_degs:.2f}°A"
-        a_phase_fault = f"{l_g_fault:.0f}∠{l_g_fault_pu_ang_degs:.2f}°A"
-        b_phase_fault = f"{0:.0f}∠{0:.2f}°A"
-        c_phase_fault = f"{0:.0f}∠{0:.2f}°A"
-        output_line = line_format.format("AG:", ag_fault, "A:", a_phase_fault, "B:", b_phase_fault, "C:", c_phase_fault)
-        buffer.append(output_line + "\n")
-        
-    #Print formatted BC fault to buffer
-    bc_fault = f"{l_l_fault:.0f}∠{l_l_fault_pu_ang_degs:.2f}°A"
-    a_phase_fault = f"{0:.0f}∠{0:.2f}°A"
-    b_phase_fault = f"{l_l_fault_Bph:.0f}∠{l_l_fault_pu_ang_degs_Bph:.2f}°A"
-    c_phase_fault = f"{l_l_fault_Cph:.0f}∠{l_l_fault_pu_ang_degs_Cph:.2f}°A"
-    output_line = line_format.format("BC:", bc_fault, "A:", a_phase_fault, "B:", b_phase_fault, "C:", c_phase_fault)
-    buffer.append(output_line + "\n")    
-    
-    #Print formatted BCG fault to buffer
-    if voltage_level != 4.6:
-        bcg_fault = f"{l_l_g_fault_Bph:.0f}∠{l_l_g_fault_pu_ang_degs_Bph:.2f}°A"
-        a_phase_fault = f"{0:.0f}∠{0:.2f}°A"
-        b_phase_fault = f"{l_l_g_fault_Bph:.0f}∠{l_l_g_fault_pu_ang_degs_Bph:.2f}°A"
-        c_phase_fault = f"{l_l_g_fault_Cph:.0f}∠{l_l_g_fault_pu_ang_degs_Cph:.2f}°A"
-        output_line = line_format.format("BCG:", bcg_fault, "A:", a_phase_fault, "B:", b_phase_fault, "C:", c_phase_fault)
-        buffer.append(output_line + "\n") 
-        
-    return
+        result.faults['BCG'] = FaultCurrents(l_l_g_fault_Bph, l_l_g_fault_pu_ang_degs_Bph, (0, l_l_g_fault_Bph, l_l_g_fault_Cph),
+                                             (0, l_l_g_fault_pu_ang_degs_Bph, l_l_g_fault_pu_ang_degs_Cph))
+
+    if buffer is not None:
+        buffer.extend(format_primary_line_fault(result))
+
+    return result
 
-def sec_trans_fault_calculation(ZBus_obj, Zline_obj, Ztrans_obj, buffer):
+def sec_trans_fault_calculation(ZBus_obj, Zline_obj, Ztrans_obj, buffer=None):
+    """
+    Fault currents at the transformer secondary, fed from the bus through the line.
+
+    :param buffer: list, the formatted text is appended when given
+    :return: SecTransFaultResult
+    """
     MVA_base = ZBus_obj.MVA_base 
     Zbase = ZBus_obj.Zbase
     voltage_level = ZBus_obj.voltage_level
@@ -261,325 +357,153 @@ def sec_trans_fault_calculation(ZBus_obj, Zline_obj, Ztrans_obj, buffer):
         l_l_g_fault_pu_ang_degs_Cph = math.degrees(l_l_g_fault_pu_ang_rads_Cph)
         l_l_g_fault_pri_side = l_l_g_fault_Bph * (Ztrans_obj.trans_sec_voltage/ZBus_obj.voltage_level)
     
-    #Print to buffer
-    buffer.append(f"\nLine + Transformer Impedances (used for distance calculations): \n")
-    buffer.append(f"+Z: {Zpos_lt_pohms_mag:.2f}∠{Zpos_lt_angle_degs:.2f}° Pri. Ohms,   +Z: {Zpos_lt_sohms_mag:.2f}∠{Zpos_lt_angle_degs:.2f}° Sec. Ohms\n")
-    if voltage_level != 4.6:
-        buffer.append(f"Z0: {Zo_lt_pohms_mag:.2f}∠{Zo_lt_angle_degs:.2f}° Pri. Ohms,   +Z: {Zo_lt_sohms_mag:.2f}∠{Zo_lt_angle_degs:.2f}° Sec. Ohms\n")
-
-    buffer.append(f"\nBus + Line + Transformer Impedances (p.u.): \n")
-    buffer.append(f"+Z: {Zpos_pu:.3f} \n")
-    buffer.append(f"Z0: {Zo_pu:.3f} \n")
-
-    buffer.append(f"\nX/R Positive Seq at secondary of transformer: {X_R_pos:.2f}\n")
-    if Ztrans_obj.trans_conn == 'Δ-Yg' or Ztrans_obj.trans_conn == 'Yg-Yg':
-        buffer.append(f"X/R Zero Seq on secondary of transformer: {X_R_zero:.2f}\n")
-    #Print faults to buffer in alignment
-    line_format = "{:<4} {:>15} {:>4} {:>15} {:>4} {:>15} {:>4} {:>15}"
-    buffer.append(f"\nAvailable fault currents at secondary of transformer: \n")
-
-    #Print formatted abc fault to buffer
-    abc_fault = f"{three_ph_fault:.0f}∠{three_ph_fault_pu_ang_degs:.2f}°A"
-    a_phase_fault = f"{three_ph_fault_Aph:.0f}∠{three_ph_fault_pu_ang_degs_Aph:.2f}°A"
-    b_phase_fault = f"{three_ph_fault_Bph:.0f}∠{three_ph_fault_pu_ang_degs_Bph:.2f}°A"
-    c_phase_fault = f"{three_ph_fault_Cph:.0f}∠{three_ph_fault_pu_ang_degs_Cph:.2f}°A"
-    output_line = line_format.format("ABC:", abc_fault, "A:", a_phase_fault, "B:", b_phase_fault, "C:", c_phase_fault)
-    buffer.append(output_line + "\n")
-    
-    #Print formatted AG fault to buffer
-    if Ztrans_obj.trans_conn == 'Δ-Yg' or Ztrans_obj.trans_conn == 'Yg-Yg':
-        ag_fault = f"{l_g_fault:.0f}∠{l_g_fault_pu_ang_degs:.2f}°A"
-        a_phase_fault = f"{l_g_fault:.0f}∠{l_g_fault_pu_ang_degs:.2f}°A"
-        b_phase_fault = f"{0:.0f}∠{0:.2f}°A"
-        c_phase_fault = f"{0:.0f}∠{0:.2f}°A"
-        output_line = line_format.format("AG:", ag_fault, "A:", a_phase_fault, "B:", b_phase_fault, "C:", c_phase_fault)
-        buffer.append(output_line + "\n")
-        
-    #Print formatted BC fault to buffer
-    bc_fault = f"{l_l_fault:.0f}∠{l_l_fault_pu_ang_degs:.2f}°A"
-    a_phase_fault = f"{0:.0f}∠{0:.2f}°A"
-    b_phase_fault = f"{l_l_fault_Bph:.0f}∠{l_l_fault_pu_ang_degs_Bph:.2f}°A"
-    c_phase_fault = f"{l_l_fault_Cph:.0f}∠{l_l_fault_pu_ang_degs_Cph:.2f}°A"
-    output_line = line_format.format("BC:", bc_fault, "A:", a_phase_fault, "B:", b_phase_fault, "C:", c_phase_fault)
-    buffer.append(output_line + "\n")    
+    result = SecTransFaultResult(
+        trans_conn=Ztrans_obj.trans_conn,
+        voltage_level=voltage_level,
+        Zpos_lt_pohms_mag=Zpos_lt_pohms_mag,
+        Zpos_lt_sohms_mag=Zpos_lt_sohms_mag,
+        Zpos_lt_angle_degs=Zpos_lt_angle_degs,
+        Zo_lt_pohms_mag=Zo_lt_pohms_mag,
+        Zo_lt_sohms_mag=Zo_lt_sohms_mag,
+        Zo_lt_angle_degs=Zo_lt_angle_degs,
+        Zpos_pu=Zpos_pu,
+        Zo_pu=Zo_pu,
+        X_R_pos=X_R_pos
+    )
+    grounded = result.has_ground
+
+    result.faults['ABC'] = FaultCurrents(three_ph_fault, three_ph_fault_pu_ang_degs,
+                                         (three_ph_fault_Aph, three_ph_fault_Bph, three_ph_fault_Cph),
+                                         (three_ph_fault_pu_ang_degs_Aph, three_ph_fault_pu_ang_degs_Bph, three_ph_fault_pu_ang_degs_Cph))
+    if grounded:
+        result.X_R_zero = X_R_zero
+        result.faults['AG'] = FaultCurrents(l_g_fault, l_g_fault_pu_ang_degs, (l_g_fault, 0, 0), (l_g_fault_pu_ang_degs, 0, 0))
+    result.faults['BC'] = FaultCurrents(l_l_fault, l_l_fault_pu_ang_degs, (0, l_l_fault_Bph, l_l_fault_Cph),
+                                        (0, l_l_fault_pu_ang_degs_Bph, l_l_fault_pu_ang_degs_Cph))
+    if grounded:
+        result.faults['BCG'] = FaultCurrents(l_l_g_fault_Bph, l_l_g_fault_pu_ang_degs_Bph, (0, l_l_g_fault_Bph, l_l_g_fault_Cph),
+                                             (0, l_l_g_fault_pu_ang_degs_Bph, l_l_g_fault_pu_ang_degs_Cph))
+
+    result.pri_side['ABC'] = three_ph_fault_pri_side
+    if grounded:
+        result.pri_side['AG'] = l_g_fault_pri_side
+    result.pri_side['BC'] = l_l_fault_pri_side
+    if grounded:
+        result.pri_side['BCG'] = l_l_g_fault_pri_side
+
+    if buffer is not None:
+        buffer.extend(format_sec_trans_fault(result))
+
+    return result
     
-    #Print formatted BCG fault to buffer
-    if Ztrans_obj.trans_conn == 'Δ-Yg' or Ztrans_obj.trans_conn == 'Yg-Yg':
-        bcg_fault = f"{l_l_g_fault_Bph:.0f}∠{l_l_g_fault_pu_ang_degs_Bph:.2f}°A"
-        a_phase_fault = f"{0:.0f}∠{0:.2f}°A"
-        b_phase_fault = f"{l_l_g_fault_Bph:.0f}∠{l_l_g_fault_pu_ang_degs_Bph:.2f}°A"
-        c_phase_fault = f"{l_l_g_fault_Cph:.0f}∠{l_l_g_fault_pu_ang_degs_Cph:.2f}°A"
-        output_line = line_format.format("BCG:", bcg_fault, "A:", a_phase_fault, "B:", b_phase_fault, "C:", c_phase_fault)
-        buffer.append(output_line + "\n")
-
-    buffer.append(f"\nTR Secondary fault magnitudes as seen by transformer high side: \n")
-    buffer.append(f"ABC: {three_ph_fault_pri_side:.0f}A\n")
-    if Ztrans_obj.trans_conn == 'Δ-Yg' or Ztrans_obj.trans_conn == 'Yg-Yg':
-        buffer.append(f"AG: {l_g_fault_pri_side:.0f}A\n")
-    buffer.append(f"BC: {l_l_fault_pri_side:.0f}A\n")
-    if Ztrans_obj.trans_conn == 'Δ-Yg' or Ztrans_obj.trans_conn == 'Yg-Yg':
-        buffer.append(f"BCG: {l_l_g_fault_pri_side:.0f}A\n")
-
-    return
-    
-def locate_primary_line_fault_l_g(ZBus_obj, Zline_obj, measured_mag):
-    #MVA_base = ZBus_obj.MVA_base
-    #Zbase = ZBus_obj.Zbase 
-    Ibase = ZBus_obj.Ibase
-    #voltage_level = ZBus_obj.voltage_level
-    #voltage_level_pu = ZBus_obj.voltage_level_pu
-    #line_length_ft = Zline_obj.total_length_feet
-    line_length_mi = Zline_obj.total_length_miles
-    Zpos_line_pu = Zline_obj.total_Z_100MVA / 100
-    Zo_line_pu = Zline_obj.total_Zo_100MVA /100
-    Zpos_bus_pu = ZBus_obj.z_100MVA / 100
-    Zo_bus_pu = ZBus_obj.zo_100MVA /100
-    #Zpos_lol_pu = (ZBus_obj.z_100MVA / 100) + (Zline_obj.total_Z_100MVA / 100) #Z1 in pu for length of given length of line trace + bus impedance in pu 
-    #Zo_lol_pu = (ZBus_obj.zo_100MVA / 100) + (Zline_obj.total_Zo_100MVA /100) #Z0 in pu for length of given length of line trace + bus impedance in pu
-
-    #calculate the line impedance per unit length
-    Zpos_line_per_mile = Zpos_line_pu / line_length_mi
-    Zo_line_per_mile = Zo_line_pu / line_length_mi
-
-    # Initialize distance array and fault current array
-    distance = np.linspace(0, line_length_mi, 1000)
-    calc_fault_current = np.zeros(distance.shape, dtype=complex)
-
-    for i, d in enumerate(distance):
-        # Calculate the total impedance for the line-to-ground fault
-        Zpos_total_pu = Zpos_bus_pu + d * Zpos_line_per_mile
-        Zo_total_pu = Zo_bus_pu + d * Zo_line_per_mile
-
-        # Calculating the line to ground fault current
-        l_g_fault_pu = 2 * Zpos_total_pu + Zo_total_pu
-        l_g_fault_pu = ((l_g_fault_pu.conjugate()) / ((l_g_fault_pu.real) ** 2 + (l_g_fault_pu.imag) ** 2))
-        l_g_fault_pu_mag = abs(l_g_fault_pu)
-        l_g_fault_pu_ang_rads = cmath.phase(l_g_fault_pu)
-        l_g_fault_pu_ang_degs = math.degrees(l_g_fault_pu_ang_rads)
-        l_g_fault = 3 * l_g_fault_pu_mag * Ibase * 1000
-
-        calc_fault_current[i] = l_g_fault
-
-    # Find the index where the calculated fault current is closest to the given fault current
-    closest_idx = np.argmin(np.abs(np.abs(calc_fault_current) - measured_mag))
-    closest_distance = distance[closest_idx]
+def sec_trans_fault_sweep(ZBus_obj, Zline_obj, sec_voltages, connections=None, transformers=None):
+    """
+    sec_trans_fault_calculation for every transformer x connection x secondary voltage in one NumPy pass.
+    Connections without a grounded secondary have NaN ground fault columns.
+
+    :param sec_voltages: list of secondary voltages in kV
+    :param connections: list of connection types, defaults to ZTrans.connection_types
+    :param transformers: dict kVA -> (Z%, X/R), defaults to ZTrans.predefined_transformers
+    :return: DataFrame, one row per combination with secondary and primary side (reflected) currents
+    """
+    connections = ZTrans.connection_types if connections is None else connections
+    transformers = ZTrans.predefined_transformers if transformers is None else transformers
+
+    #Parameter grid, kVA varies slowest
+    kva_idx, conn_idx, volt_idx = np.meshgrid(np.arange(len(transformers)), np.arange(len(connections)),
+                                              np.arange(len(sec_voltages)), indexing='ij')
+    kva_idx, conn_idx, volt_idx = kva_idx.ravel(), conn_idx.ravel(), volt_idx.ravel()
+
+    transformer_kva = np.array([float(kva) for kva in transformers])[kva_idx]
+    percent_ztrans = np.array([z for z, _ in transformers.values()], dtype=float)[kva_idx]
+    x_r_trans = np.array([x_r for _, x_r in transformers.values()], dtype=float)[kva_idx]
+    trans_conn = np.array(connections, dtype=object)[conn_idx]
+    trans_sec_voltage = np.asarray(sec_voltages, dtype=float)[volt_idx]
+
+    #Same transformer impedance as ZTrans
+    theta_rads = np.arctan(x_r_trans)
+    Z_pos_trans = percent_ztrans * (100 / (transformer_kva / 1000)) * (np.cos(theta_rads) + 1j * np.sin(theta_rads))
 
-    # Plot the fault current
-    plt.figure(figsize=(10, 6))
-    plt.plot(distance, calc_fault_current, label='Calculated Current Amps')
-    plt.axhline(measured_mag, color='r', linestyle='--', label=f'Measured fault current = {measured_mag:.0f} Amps')
-    plt.xlabel('Distance (miles)')
-    plt.ylabel('Fault Current (Amps)')
-    plt.title('SLG Fault Current vs. Distance')
-
-    # Annotate the point of intersection
-    plt.annotate(f'Intersection\n({closest_distance:.2f} miles, {measured_mag:.0f} Amps)', 
-                 xy=(closest_distance, measured_mag), 
-                xytext=(closest_distance + 0.5, measured_mag + 200), 
-                arrowprops=dict(arrowstyle='->'),
-                fontsize=9)
-
-    plt.legend()
-    plt.grid(True)
-    plt.show()
-
-    return closest_distance, np.abs(calc_fault_current[closest_idx])
-        
-def locate_primary_line_fault_3ph(ZBus_obj, Zline_obj, measured_mag):
-    #MVA_base = ZBus_obj.MVA_base
-    #Zbase = ZBus_obj.Zbase 
-    Ibase = ZBus_obj.Ibase
-    voltage_level = ZBus_obj.voltage_level
-    voltage_level_pu = ZBus_obj.voltage_level_pu
-    #line_length_ft = Zline_obj.total_length_feet
-    line_length_mi = Zline_obj.total_length_miles
-    Zpos_line_pu = Zline_obj.total_Z_100MVA / 100
-    Zo_line_pu = Zline_obj.total_Zo_100MVA /100
-    Zpos_bus_pu = ZBus_obj.z_100MVA / 100
-    Zo_bus_pu = ZBus_obj.zo_100MVA /100
-    #Zpos_lol_pu = (ZBus_obj.z_100MVA / 100) + (Zline_obj.total_Z_100MVA / 100) #Z1 in pu for length of given length of line trace + bus impedance in pu 
-    #Zo_lol_pu = (ZBus_obj.zo_100MVA / 100) + (Zline_obj.total_Zo_100MVA /100) #Z0 in pu for length of given length of line trace + bus impedance in pu
-
-    #calculate the line impedance per unit length
-    Zpos_line_per_mile = Zpos_line_pu / line_length_mi
-    Zo_line_per_mile = Zo_line_pu / line_length_mi
-
-    # Initialize distance array and fault current array
-    distance = np.linspace(0, line_length_mi, 1000)
-    calc_fault_current = np.zeros(distance.shape, dtype=complex)
-
-    for i, d in enumerate(distance):
-        # Calculate the total impedance for the 3-ph fault
-        Zpos_total_pu = Zpos_bus_pu + d * Zpos_line_per_mile
-
-        # Calculating the line to ground fault current
-        #3-ph fault
-        three_ph_fault_pu = voltage_level_pu / (Zpos_total_pu)
-        three_ph_fault_pu_mag = abs(three_ph_fault_pu)
-        three_ph_fault_pu_ang_rads = cmath.phase(three_ph_fault_pu)
-        three_ph_fault_pu_ang_degs = math.degrees(three_ph_fault_pu_ang_rads)
-        three_ph_fault = (three_ph_fault_pu_mag * Ibase * 1000)
-
-        calc_fault_current[i] = three_ph_fault
-
-    # Find the index where the calculated fault current is closest to the given fault current
-    closest_idx = np.argmin(np.abs(np.abs(calc_fault_current) - measured_mag))
-    closest_distance = distance[closest_idx]
-
-    # Plot the fault current
-    plt.figure(figsize=(10, 6))
-    plt.plot(distance, calc_fault_current, label='Calculated Current Amps')
-    plt.axhline(measured_mag, color='r', linestyle='--', label=f'Measured fault current = {measured_mag:.0f} Amps')
-    plt.xlabel('Distance (miles)')
-    plt.ylabel('Fault Current (Amps)')
-    plt.title('3 Phase Fault Current vs. Distance')
-
-    # Annotate the point of intersection
-    plt.annotate(f'Intersection\n({closest_distance:.2f} miles, {measured_mag:.0f} Amps)', 
-                 xy=(closest_distance, measured_mag), 
-                xytext=(closest_distance + 0.5, measured_mag + 200), 
-                arrowprops=dict(arrowstyle='->'),
-                fontsize=9)
-
-    plt.legend()
-    plt.grid(True)
-    plt.show()
-
-    return closest_distance, np.abs(calc_fault_current[closest_idx])
-
-def locate_primary_line_fault_l_l(ZBus_obj, Zline_obj, measured_mag):
-    #MVA_base = ZBus_obj.MVA_base
-    #Zbase = ZBus_obj.Zbase 
-    Ibase = ZBus_obj.Ibase
     voltage_level = ZBus_obj.voltage_level
     voltage_level_pu = ZBus_obj.voltage_level_pu
-    #line_length_ft = Zline_obj.total_length_feet
-    line_length_mi = Zline_obj.total_length_miles
-    Zpos_line_pu = Zline_obj.total_Z_100MVA / 100
-    Zo_line_pu = Zline_obj.total_Zo_100MVA /100
-    Zpos_bus_pu = ZBus_obj.z_100MVA / 100
-    Zo_bus_pu = ZBus_obj.zo_100MVA /100
-    #Zpos_lol_pu = (ZBus_obj.z_100MVA / 100) + (Zline_obj.total_Z_100MVA / 100) #Z1 in pu for length of given length of line trace + bus impedance in pu 
-    #Zo_lol_pu = (ZBus_obj.zo_100MVA / 100) + (Zline_obj.total_Zo_100MVA /100) #Z0 in pu for length of given length of line trace + bus impedance in pu
-
-    #calculate the line impedance per unit length
-    Zpos_line_per_mile = Zpos_line_pu / line_length_mi
-    Zo_line_per_mile = Zo_line_pu / line_length_mi
-
-    # Initialize distance array and fault current array
-    distance = np.linspace(0, line_length_mi, 1000)
-    calc_fault_current = np.zeros(distance.shape, dtype=complex)
-
-    for i, d in enumerate(distance):
-        # Calculate the total impedance for the l-l fault
-        Zpos_total_pu = Zpos_bus_pu + d * Zpos_line_per_mile
-
-        #line-to-line fault
-        l_l_fault_pos = voltage_level_pu / (Zpos_total_pu * 2) #Ia sequence
-        l_l_fault_pu = (-1j) * (3 ** 0.5) * l_l_fault_pos #Ib fault current pu
-        l_l_fault_pu_mag = abs(l_l_fault_pu)
-        l_l_fault_pu_ang_rads = cmath.phase(l_l_fault_pu)
-        l_l_fault_pu_ang_degs = math.degrees(l_l_fault_pu_ang_rads)
-        l_l_fault = l_l_fault_pu_mag * Ibase * 1000
-
-        calc_fault_current[i] = l_l_fault
-
-    # Find the index where the calculated fault current is closest to the given fault current
-    closest_idx = np.argmin(np.abs(np.abs(calc_fault_current) - measured_mag))
-    closest_distance = distance[closest_idx]
-
-    # Plot the fault current
-    plt.figure(figsize=(10, 6))
-    plt.plot(distance, calc_fault_current, label='Calculated Current Amps')
-    plt.axhline(measured_mag, color='r', linestyle='--', label=f'Measured fault current = {measured_mag:.0f} Amps')
-    plt.xlabel('Distance (miles)')
-    plt.ylabel('Fault Current (Amps)')
-    plt.title('Line to Line Fault Current vs. Distance')
-
-    # Annotate the point of intersection
-    plt.annotate(f'Intersection\n({closest_distance:.2f} miles, {measured_mag:.0f} Amps)', 
-                 xy=(closest_distance, measured_mag), 
-                xytext=(closest_distance + 0.5, measured_mag + 200), 
-                arrowprops=dict(arrowstyle='->'),
-                fontsize=9)
-
-    plt.legend()
-    plt.grid(True)
-    plt.show()
-
-    return closest_distance, np.abs(calc_fault_current[closest_idx])
-
-def locate_primary_line_fault_l_l_g(ZBus_obj, Zline_obj, measured_mag):
-    #MVA_base = ZBus_obj.MVA_base
-    #Zbase = ZBus_obj.Zbase 
-    Ibase = ZBus_obj.Ibase
-    #voltage_level = ZBus_obj.voltage_level
-    voltage_level_pu = ZBus_obj.voltage_level_pu
-    #line_length_ft = Zline_obj.total_length_feet
-    line_length_mi = Zline_obj.total_length_miles
-    Zpos_line_pu = Zline_obj.total_Z_100MVA / 100
-    Zo_line_pu = Zline_obj.total_Zo_100MVA /100
-    Zpos_bus_pu = ZBus_obj.z_100MVA / 100
-    Zo_bus_pu = ZBus_obj.zo_100MVA /100
-    #Zpos_lol_pu = (ZBus_obj.z_100MVA / 100) + (Zline_obj.total_Z_100MVA / 100) #Z1 in pu for length of given length of line trace + bus impedance in pu 
-    #Zo_lol_pu = (ZBus_obj.zo_100MVA / 100) + (Zline_obj.total_Zo_100MVA /100) #Z0 in pu for length of given length of line trace + bus impedance in pu
-
-    #calculate the line impedance per unit length
-    Zpos_line_per_mile = Zpos_line_pu / line_length_mi
-    Zo_line_per_mile = Zo_line_pu / line_length_mi
-
-    # Initialize distance array and fault current array
-    distance = np.linspace(0, line_length_mi, 1000)
-    calc_fault_current = np.zeros(distance.shape, dtype=complex)
-
-    for i, d in enumerate(distance):
-        # Calculate the total impedance for the line-to-ground fault
-        Zpos_total_pu = Zpos_bus_pu + d * Zpos_line_per_mile
-        Zo_total_pu = Zo_bus_pu + d * Zo_line_per_mile
-
-        # Calculating the line-to-line-to-ground fault current
-        l_l_g_fault_Z2_pu = Zpos_total_pu
-        l_l_g_fault_Zf_pu = (l_l_g_fault_Z2_pu * Zo_total_pu) / (Zo_total_pu + l_l_g_fault_Z2_pu)
-        l_l_g_fault_pos_pu = voltage_level_pu / (Zpos_total_pu + l_l_g_fault_Zf_pu) #I1 positive sequence
-        l_l_g_fault_neg_pu = -l_l_g_fault_pos_pu * (Zo_total_pu / (Zo_total_pu + l_l_g_fault_Z2_pu)) #I2 negative sequence
-        l_l_g_fault_zero_pu = -l_l_g_fault_pos_pu * (l_l_g_fault_Z2_pu / (Zo_total_pu + l_l_g_fault_Z2_pu)) #I0 zero sequence
-        A = np.array([[1, 1, 1],[1, -0.5 - 0.866j, -0.5 + 0.866j],[1, -0.5 + 0.866j, -0.5 - 0.866j]]) #A matrix
-        I_seq = np.array([l_l_g_fault_zero_pu, l_l_g_fault_pos_pu, l_l_g_fault_neg_pu]) #Sequence currents matrix
-        I_phase = np.dot(A, I_seq)
-        l_l_g_fault_Aph_pu, l_l_g_fault_Bph_pu, l_l_g_fault_Cph_pu = I_phase #Individual phases line-to-line-to Ground fault
-        l_l_g_fault_Bph = abs(l_l_g_fault_Bph_pu) * Ibase * 1000
-        l_l_g_fault_pu_ang_rads_Bph = cmath.phase(l_l_g_fault_Bph_pu)
-        l_l_g_fault_pu_ang_degs_Bph = math.degrees(l_l_g_fault_pu_ang_rads_Bph)
-        l_l_g_fault_Cph = abs(l_l_g_fault_Cph_pu) * Ibase * 1000
-        l_l_g_fault_pu_ang_rads_Cph = cmath.phase(l_l_g_fault_Cph_pu)
-        l_l_g_fault_pu_ang_degs_Cph = math.degrees(l_l_g_fault_pu_ang_rads_Cph)
-
-        calc_fault_current[i] = l_l_g_fault_Bph
+    Ibase = ZBus_obj.MVA_base / (trans_sec_voltage * (3 ** 0.5))
+    Z_bus_line_pu = (ZBus_obj.z_100MVA / 100) + (Zline_obj.total_Z_100MVA / 100)
+    Zpos_pu = Z_bus_line_pu + (Z_pos_trans / 100)
 
-    # Find the index where the calculated fault current is closest to the given fault current
-    closest_idx = np.argmin(np.abs(np.abs(calc_fault_current) - measured_mag))
-    closest_distance = distance[closest_idx]
+    is_d_yg = trans_conn == 'Δ-Yg'
+    is_yg_yg = trans_conn == 'Yg-Yg'
+    grounded = is_d_yg | is_yg_yg
+    Zo_pu = np.where(is_d_yg, 2 * Z_bus_line_pu + 3 * (Z_pos_trans / 100),
+                     np.where(is_yg_yg, 2 * Z_bus_line_pu + (ZBus_obj.zo_100MVA / 100) + (Zline_obj.total_Zo_100MVA / 100) + 3 * (Z_pos_trans / 100), 0j))
 
-    # Plot the fault current
-    plt.figure(figsize=(10, 6))
-    plt.plot(distance, calc_fault_current, label='Calculated Current Amps')
-    plt.axhline(measured_mag, color='r', linestyle='--', label=f'Measured fault current = {measured_mag:.0f} Amps')
-    plt.xlabel('Distance (miles)')
-    plt.ylabel('Fault Current (Amps)')
-    plt.title('Double Line to Ground Fault Current vs. Distance')
+    def ground_only(values):
+        return np.where(grounded, values, np.nan)
 
-    # Annotate the point of intersection
-    plt.annotate(f'Intersection\n({closest_distance:.2f} miles, {measured_mag:.0f} Amps)', 
-                 xy=(closest_distance, measured_mag), 
-                xytext=(closest_distance + 0.5, measured_mag + 200), 
-                arrowprops=dict(arrowstyle='->'),
-                fontsize=9)
-
-    plt.legend()
-    plt.grid(True)
-    plt.show()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        X_R_pos = Zpos_pu.imag / Zpos_pu.real
+        X_R_zero = Zo_pu.imag / Zo_pu.real
 
-    return closest_distance, np.abs(calc_fault_current[closest_idx])
+        three_ph_pu = FaultArrays.three_ph_fault_pu(Zpos_pu, voltage_level_pu)
+        l_l_pu = FaultArrays.l_l_fault_pu(Zpos_pu, voltage_level_pu)
+        l_g_pu = np.conj(Zo_pu) / ((Zo_pu.real) ** 2 + (Zo_pu.imag) ** 2)
+        _, l_l_g_Bph_pu, l_l_g_Cph_pu = FaultArrays.l_l_g_fault_pu(Zpos_pu, Zo_pu, voltage_level_pu)
+
+        three_ph_fault = FaultArrays.to_amps(three_ph_pu, Ibase)
+        l_l_fault = FaultArrays.to_amps(l_l_pu, Ibase)
+        l_g_fault = 3 * FaultArrays.to_amps(l_g_pu, Ibase)
+        l_l_g_fault_Bph = FaultArrays.to_amps(l_l_g_Bph_pu, Ibase)
+
+    #Reflected to the transformer high side, a Δ-Yg ground fault is a line-to-line fault on the primary
+    ratio = trans_sec_voltage / voltage_level
+    l_g_ratio = np.where(is_d_yg, ratio / (3 ** 0.5), ratio)
+
+    return pd.DataFrame({
+        'transformer_kva': transformer_kva,
+        'percent_ztrans': percent_ztrans,
+        'x_r_trans': x_r_trans,
+        'trans_conn': trans_conn,
+        'trans_sec_voltage': trans_sec_voltage,
+        'Z_pos_trans': Z_pos_trans,
+        'Zpos_pu': Zpos_pu,
+        'Zo_pu': np.where(grounded, Zo_pu, complex(np.nan, np.nan)),
+        'X_R_pos': X_R_pos,
+        'X_R_zero': ground_only(X_R_zero),
+        'three_ph_fault': three_ph_fault,
+        'three_ph_fault_pu_ang_degs': FaultArrays.to_degs(three_ph_pu),
+        'l_l_fault': l_l_fault,
+        'l_l_fault_pu_ang_degs': FaultArrays.to_degs(l_l_pu),
+        'l_g_fault': ground_only(l_g_fault),
+        'l_g_fault_pu_ang_degs': ground_only(FaultArrays.to_degs(l_g_pu)),
+        'l_l_g_fault_Bph': ground_only(l_l_g_fault_Bph),
+        'l_l_g_fault_pu_ang_degs_Bph': ground_only(FaultArrays.to_degs(l_l_g_Bph_pu)),
+        'l_l_g_fault_Cph': ground_only(FaultArrays.to_amps(l_l_g_Cph_pu, Ibase)),
+        'l_l_g_fault_pu_ang_degs_Cph': ground_only(FaultArrays.to_degs(l_l_g_Cph_pu)),
+        'three_ph_fault_pri_side': three_ph_fault * ratio,
+        'l_l_fault_pri_side': l_l_fault * ratio,
+        'l_g_fault_pri_side': ground_only(l_g_fault * l_g_ratio),
+        'l_l_g_fault_pri_side': ground_only(l_l_g_fault_Bph * ratio)
+    })
+
+def locate_primary_line_fault(ZBus_obj, Zline_obj, measured_mag, fault_type, show_plot=True):
+    # The math lives in FaultLocator, pyplot is only imported when a plot is shown
+    result = compute_fault_location(ZBus_obj, Zline_obj, fault_type, measured_mag, points=1000 if show_plot else 0)
+
+    if show_plot:
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=(10, 6))
+        plot_fault_location(ax, result)
+        plt.show()
+
+    return result.distance, result.current
+
+def locate_primary_line_fault_l_g(ZBus_obj, Zline_obj, measured_mag, show_plot=True):
+    return locate_primary_line_fault(ZBus_obj, Zline_obj, measured_mag, 'Line to Ground', show_plot)
+        
+def locate_primary_line_fault_3ph(ZBus_obj, Zline_obj, measured_mag, show_plot=True):
+    return locate_primary_line_fault(ZBus_obj, Zline_obj, measured_mag, '3 Phase', show_plot)
 
+def locate_primary_line_fault_l_l(ZBus_obj, Zline_obj, measured_mag, show_plot=True):
+    return locate_primary_line_fault(ZBus_obj, Zline_obj, measured_mag, 'Line to Line', show_plot)
 
-    
\ No newline at end of file
+def locate_primary_line_fault_l_l_g(ZBus_obj, Zline_obj, measured_mag, show_plot=True):
+    return locate_primary_line_fault(ZBus_obj, Zline_obj, measured_mag, 'Double Line to Ground', show_plot)
@@ -2,6 +2,8 @@ import pandas as pd
 import cmath
 import math
 import numpy as np
+import FaultArrays
+from ImpedanceProfile import ImpedanceProfile
 
 class ZBus:
     def __init__(self, selected_record):
@@ -85,7 +87,7 @@ class ZBus:
             #print(f"I2 pu: {self.l_l_g_fault_neg_pu}")
             self.l_l_g_fault_zero_pu = (-self.l_l_g_fault_pos_pu) * ((self.l_l_g_fault_Z2_pu) / ((self.zo_100MVA / 100) + (self.l_l_g_fault_Z2_pu))) #I0 zero sequence
             #print(f"I0 pu: {self.l_l_g_fault_zero_pu}")
-            A = np.array([[1, 1, 1],[1, -0.5 - 0.866j, -0.5 + 0.866j],[1, -0.5 + 0.866j, -0.5 - 0.866j]]) #A matrix
+            A = FaultArrays.A #A matrix
             #print(f"A matrix: {A}")
             I_seq = np.array([self.l_l_g_fault_zero_pu, self.l_l_g_fault_pos_pu, self.l_l_g_fault_neg_pu]) #Sequence currents matrix
             #print(f"Sequence Matrix: {I_seq}")
@@ -175,9 +177,109 @@ class ZBus:
         }
 
 
+####################################################################################################################################################
+class BusFaultBatch:
+    """
+    Bus fault currents for every station of one or more cleaned "Bus" sheets in a single NumPy pass.
+    Produces the same values as building a ZBus per station, 4.6 kV busses have no Zo so their
+    ground fault columns are NaN.
+    """
+    result_columns = [
+        'sheet', 'station', 'voltage_level', 'z_100MVA', 'zo_100MVA', 'X_R_pos', 'X_R_zero',
+        'three_ph_fault', 'three_ph_fault_pu_ang_degs',
+        'l_l_fault', 'l_l_fault_pu_ang_degs',
+        'l_g_fault', 'l_g_fault_pu_ang_degs',
+        'l_l_g_fault_Bph', 'l_l_g_fault_pu_ang_degs_Bph',
+        'l_l_g_fault_Cph', 'l_l_g_fault_pu_ang_degs_Cph'
+    ]
+
+    def __init__(self, bus_dataframes):
+        # Accept a single cleaned bus DataFrame or the whole dictionary from clean_dataframe
+        if isinstance(bus_dataframes, dict):
+            sheets = {k: v for k, v in bus_dataframes.items() if 'Bus' in k}
+        else:
+            sheets = {'Bus': bus_dataframes}
+
+        self.MVA_base = 100
+        self.voltage_level_pu = 1
+        self.results = None
+
+        sheet_names, stations, voltages, z_cols, zo_cols = [], [], [], [], []
+        for sheet_name, df in sheets.items():
+            n = len(df)
+            sheet_names.append(np.full(n, sheet_name, dtype=object))
+            stations.append(df.iloc[:, 0].astype(str).to_numpy())
+            voltages.append(pd.to_numeric(df['Voltage_Level'], errors='coerce').to_numpy(dtype=float))
+            z_cols.append(FaultArrays.to_complex_array(df.iloc[:, 4].to_numpy()))
+            # Same column rule as ZBus, the 4kV bus sheet may not carry a Zo column
+            if df.shape[1] > 7:
+                zo_cols.append(FaultArrays.to_complex_array(df.iloc[:, 7].to_numpy()))
+            else:
+                zo_cols.append(np.zeros(n, dtype=complex))
+
+        self.sheet = np.concatenate(sheet_names) if sheet_names else np.empty(0, dtype=object)
+        self.station = np.concatenate(stations) if stations else np.empty(0, dtype=object)
+        self.voltage_level = np.concatenate(voltages) if voltages else np.empty(0)
+        self.z_100MVA = np.concatenate(z_cols) if z_cols else np.empty(0, dtype=complex)
+        self.zo_100MVA = np.concatenate(zo_cols) if zo_cols else np.empty(0, dtype=complex)
+
+    def calculate(self, line_Z_100MVA=0j, line_Zo_100MVA=0j, mask=None):
+        """
+        Compute every fault type for every station and return a columnar DataFrame.
+
+        :param line_Z_100MVA: line Z+ in % added to every bus, gives the primary_line_fault_calculation
+                              currents at the end of that line fed from each bus
+        :param line_Zo_100MVA: line Zo in %
+        :param mask: boolean array selecting the stations to calculate, all when None
+        """
+        if mask is None:
+            mask = np.ones(len(self.station), dtype=bool)
+        sheet, station, voltage_level = self.sheet[mask], self.station[mask], self.voltage_level[mask]
+        z_100MVA, zo_100MVA = self.z_100MVA[mask], self.zo_100MVA[mask]
+
+        Ibase = FaultArrays.base_current(voltage_level, self.MVA_base)
+        Zpos_pu = (z_100MVA + line_Z_100MVA) / 100
+        Zo_pu = (zo_100MVA + line_Zo_100MVA) / 100
+        has_zero_seq = voltage_level != 4.6 # 4.6 kV busses have no Zo
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            X_R_pos = Zpos_pu.imag / Zpos_pu.real
+            X_R_zero = (2 * Zpos_pu.imag + Zo_pu.imag) / (2 * Zpos_pu.real + Zo_pu.real)
+
+            three_ph_pu = FaultArrays.three_ph_fault_pu(Zpos_pu, self.voltage_level_pu)
+            l_l_pu = FaultArrays.l_l_fault_pu(Zpos_pu, self.voltage_level_pu)
+            l_g_pu = FaultArrays.l_g_fault_pu(Zpos_pu, Zo_pu)
+            _, l_l_g_Bph_pu, l_l_g_Cph_pu = FaultArrays.l_l_g_fault_pu(Zpos_pu, Zo_pu, self.voltage_level_pu)
+
+        def ground_only(values):
+            return np.where(has_zero_seq, values, np.nan)
+
+        self.results = pd.DataFrame({
+            'sheet': sheet,
+            'station': station,
+            'voltage_level': voltage_level,
+            'z_100MVA': z_100MVA,
+            'zo_100MVA': np.where(has_zero_seq, zo_100MVA, complex(np.nan, np.nan)),
+            'X_R_pos': X_R_pos,
+            'X_R_zero': ground_only(X_R_zero),
+            'three_ph_fault': FaultArrays.to_amps(three_ph_pu, Ibase),
+            'three_ph_fault_pu_ang_degs': FaultArrays.to_degs(three_ph_pu),
+            'l_l_fault': FaultArrays.to_amps(l_l_pu, Ibase),
+            'l_l_fault_pu_ang_degs': FaultArrays.to_degs(l_l_pu),
+            'l_g_fault': ground_only(3 * FaultArrays.to_amps(l_g_pu, Ibase)),
+            'l_g_fault_pu_ang_degs': ground_only(FaultArrays.to_degs(l_g_pu)),
+            'l_l_g_fault_Bph': ground_only(FaultArrays.to_amps(l_l_g_Bph_pu, Ibase)),
+            'l_l_g_fault_pu_ang_degs_Bph': ground_only(FaultArrays.to_degs(l_l_g_Bph_pu)),
+            'l_l_g_fault_Cph': ground_only(FaultArrays.to_amps(l_l_g_Cph_pu, Ibase)),
+            'l_l_g_fault_pu_ang_degs_Cph': ground_only(FaultArrays.to_degs(l_l_g_Cph_pu)),
+        }, columns=self.result_columns)
+
+        return self.results
+
+
 ####################################################################################################################################################
 class ZLine:
-    def __init__(self, df_linetrace, label, ctr, ptr):
+    def __init__(self, df_linetrace, label, ctr, ptr, segments_in_order=False):
         self.df_linetrace = df_linetrace
         self.label = label
         self.total_Z_100MVA = 0 
@@ -186,62 +288,75 @@ class ZLine:
         self.total_length_miles = 0
         self.ptr = ptr
         self.ctr = ctr
-
+        # True when df_linetrace holds one row per segment in trace order (clean_line_trace(group_segments=False)),
+        # grouped traces only know the totals so the profile assumes the same impedance per mile along the line
+        self.segments_in_order = segments_in_order
+        self.profile = None
 
 
     def get_individual_parameters(self):
-        self.total_Z_100MVA = 0  # Initialize accumulator for 'Total % Z @ 100 MVA'
-        self.total_Zo_100MVA = 0
-        self.total_length_feet = 0
-        self.total_length_miles = 0
+        df = self.df_linetrace
+        line_type = df['Type'].astype(str).to_numpy()
+        voltage_level = pd.to_numeric(df['Voltage_Level'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        z_100MVA = FaultArrays.to_complex_array(df['% Z+ @ 100 MVA'].to_numpy())
+        zo_100MVA = FaultArrays.to_complex_array(df['% Zo @ 100 MVA'].to_numpy())
+        length = pd.to_numeric(df['Length'], errors='coerce').fillna(0).to_numpy(dtype=float)
 
-        for index, row in self.df_linetrace.iterrows():
-            line_type = str(row['Type'])
-            conductor_size = str(row['Conductor Size'])
-            conductor_type = str(row['Conductor Type'])
-            voltage_level = float(row['Voltage_Level']) if pd.notna(row['Voltage_Level']) else 0
-            z_100MVA = complex(row['% Z+ @ 100 MVA']) if pd.notna(row['% Z+ @ 100 MVA']) else 0j
-            zo_100MVA = complex(row['% Zo @ 100 MVA']) if pd.notna(row['% Zo @ 100 MVA']) else 0j
-            mapped_wire_type = str(row['Mapped Wire Type']) if pd.notna(row['Mapped Wire Type']) else ''
-            pole_type = str(row['Pole Type']) if pd.notna(row['Pole Type']) else ''
-            ground = str(row['Ground?']) if pd.notna(row['Ground?']) else ''
-            
-            # Handle reactor specially - it has no length
-            if line_type == 'Reactor':
-                # For reactors, the impedance is already the total impedance (not per unit length)
-                # Reactors only have positive sequence impedance (phase devices)
-                # Zero sequence current bypasses the reactor through the neutral/ground
-                total_pos_impedance = z_100MVA
-                total_zero_impedance = zo_100MVA  # Should be 0 for reactors
-                length = 0
-            else:
-                # For regular conductors, calculate based on length
-                length = float(row['Length']) if pd.notna(row['Length']) else 0
-                conversion_factor = 5280 if (line_type == 'OH Pri. Conductor' and (voltage_level == 36 or voltage_level == 11.5)) else 1000
-                total_pos_impedance = z_100MVA * (length / conversion_factor)
-                total_zero_impedance = zo_100MVA * (length / conversion_factor)
-            
-            formatted_pos_impedance = "{:.2f}+{:.2f}j".format(total_pos_impedance.real, total_pos_impedance.imag)
-            formatted_zero_impedance = "{:.2f}+{:.2f}j".format(total_zero_impedance.real, total_zero_impedance.imag)
-
-            self.df_linetrace.at[index, 'Total % Z @ 100 MVA'] = formatted_pos_impedance
-            self.df_linetrace.at[index, 'Total % Zo @ 100 MVA'] = formatted_zero_impedance
-
-            # Update the accumulators
-            self.total_Z_100MVA += total_pos_impedance
-            self.total_Zo_100MVA += total_zero_impedance
-            
-            # Only add to length if it's not a reactor
-            if line_type != 'Reactor':
-                self.total_length_feet += length
-                self.total_length_miles += length/5280
+        # Missing impedances count as 0j, same as a blank cell
+        z_100MVA[np.isnan(z_100MVA)] = 0j
+        zo_100MVA[np.isnan(zo_100MVA)] = 0j
+
+        # Reactors have no length, the impedance is already the total impedance (not per unit length)
+        # Reactors only have positive sequence impedance (phase devices), zero sequence current bypasses
+        # the reactor through the neutral/ground
+        is_reactor = line_type == 'Reactor'
+        length[is_reactor] = 0
+
+        # 36 kV and 11.5 kV overhead conductor impedances are per mile, everything else per 1000 ft
+        per_mile = (line_type == 'OH Pri. Conductor') & ((voltage_level == 36) | (voltage_level == 11.5))
+        conversion_factor = np.where(per_mile, 5280, 1000)
+
+        self.segment_Z_100MVA = np.where(is_reactor, z_100MVA, z_100MVA * (length / conversion_factor))
+        self.segment_Zo_100MVA = np.where(is_reactor, zo_100MVA, zo_100MVA * (length / conversion_factor))
+        self.segment_length_feet = length
+
+        # Per segment totals stay complex, format_linetrace turns them into strings for display
+        df['Total % Z @ 100 MVA'] = self.segment_Z_100MVA
+        df['Total % Zo @ 100 MVA'] = self.segment_Zo_100MVA
+
+        self.total_Z_100MVA = complex(self.segment_Z_100MVA.sum())
+        self.total_Zo_100MVA = complex(self.segment_Zo_100MVA.sum())
+        self.total_length_feet = float(length.sum())
+        self.total_length_miles = self.total_length_feet / 5280
 
         #Convert to Ohms
         self.total_Z_100MVA_pu = self.total_Z_100MVA / 100
         self.total_Zo_100MVA_pu = self.total_Zo_100MVA / 100
 
+        # Cumulative distance -> (Z+, Zo) in % @ 100 MVA, reactors are steps at their position
+        if self.segments_in_order:
+            self.profile = ImpedanceProfile.from_segments(self.segment_length_feet, self.segment_Z_100MVA, self.segment_Zo_100MVA)
+        else:
+            self.profile = ImpedanceProfile.uniform(self.total_length_miles, self.total_Z_100MVA, self.total_Zo_100MVA)
+
+    def impedance_at(self, distance_mi):
+        """(Z+, Zo) in % @ 100 MVA from the station to distance_mi, binary search over the profile"""
+        return self.profile.impedance_at(distance_mi)
+
+    def distance_at(self, z_mag):
+        """Distance in miles where |Z+| from the station first reaches z_mag (% @ 100 MVA), nan if never"""
+        return self.profile.distance_at(z_mag)
+
+    def format_linetrace(self):
+        """Copy of df_linetrace with the per segment totals formatted as strings for display"""
+        df = self.df_linetrace.copy()
+        for column in ['Total % Z @ 100 MVA', 'Total % Zo @ 100 MVA']:
+            if column in df:
+                df[column] = [f"{z.real:.2f}+{z.imag:.2f}j" for z in FaultArrays.to_complex_array(df[column].to_numpy())]
+        return df
+
     def display_info(self, buffer):
-        buffer.append(f"{self.df_linetrace}\n")
+        buffer.append(f"{self.format_linetrace()}\n")
         buffer.append(f"Z+ Total Line: {self.total_Z_100MVA.real:.2f}+{self.total_Z_100MVA.imag:.2f}j%\n")
         buffer.append(f"Z0 Total Line: {self.total_Zo_100MVA.real:.2f}+{self.total_Zo_100MVA.imag:.2f}j%\n")
         buffer.append(f"Total Length: {self.total_length_feet:.0f} ft - {self.total_length_miles:.3f} mi\n")
@@ -264,6 +379,9 @@ class ZTrans:
         '2500': (5.7, 7.9)
     }
 
+    # Connection types offered by the menus
+    connection_types = ['Δ-Yg', 'Yg-Yg', 'Δ-Δ', 'Y-Y']
+
     def __init__(self, trans_conn, trans_sec_voltage, percent_ztrans, transformer_kva, x_r_trans):
         self.trans_sec_voltage = trans_sec_voltage
         self.trans_conn = trans_conn
@@ -287,12 +405,7 @@ class ZTrans:
 
     @staticmethod
     def select_connection_type():
-        connection_types = {
-            '1': 'Δ-Yg',
-            '2': 'Yg-Yg',
-            '3': 'Δ-Δ',
-            '4': 'Y-Y'
-        }
+        connection_types = {str(i + 1): conn for i, conn in enumerate(ZTrans.connection_types)}
         print("Select the transformer connection type:")
         for key, value in connection_types.items():
             print(f"{key}. {value}")
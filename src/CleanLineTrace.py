@@ -1,7 +1,11 @@
 import pandas as pd
-import numpy as np
+from ConductorChoiceCache import catalog_version
 
-def clean_line_trace(dataframes):
+def clean_line_trace(dataframes, group_segments=True):
+    """
+    :param group_segments: True sums the length of each conductor, False keeps one row per segment
+                           in trace order so ZLine can build an impedance profile along the line
+    """
     cleaned_line_trace = {}
     
     for sheet_name, df in dataframes.items():
@@ -40,46 +44,188 @@ def clean_line_trace(dataframes):
         # Normalize the 'Type' entries to "OH Pri. Conductor"
         df['Type'] = df['Type'].str.replace("OH Pri. Conductor \(U\)|OH Pri. Conductor \(I\)", "OH Pri. Conductor", regex=True)
 
-        # Group by 'Type', 'Conductor Size', and 'Conductor Type' and sum up the 'Length'
-        df = df.groupby(['Type', 'Conductor Size', 'Conductor Type'], as_index=False).agg({'Length': 'sum'})
+        if group_segments:
+            # Group by 'Type', 'Conductor Size', and 'Conductor Type' and sum up the 'Length'
+            df = df.groupby(['Type', 'Conductor Size', 'Conductor Type'], as_index=False).agg({'Length': 'sum'})
+        else:
+            df = df[['Type', 'Conductor Size', 'Conductor Type', 'Length']].reset_index(drop=True)
 
         cleaned_line_trace[sheet_name] = df
 
     return cleaned_line_trace
 
-def map_impedances(df_linetrace, df_impedance):
-    print(df_linetrace)
-    print(df_impedance)
-    # Create new columns in df_linetrace for the impedance values
-    df_linetrace['% Z+ @ 100 MVA'] = np.nan
-    df_linetrace['% Zo @ 100 MVA'] = np.nan
-    df_linetrace['Mapped Wire Type'] = None  # Initialize a new column for "Wire Type"
-    df_linetrace['Pole Type'] = None  # Initialize a new column for "Pole Type"
-    df_linetrace['Ground?'] = None  # Initialize a new column for "Ground?"
-
-    # Iterate over each row in df_linetrace
-    for index, row in df_linetrace.iterrows():
-        # Filter df_impedance based on 'Type', 'Conductor Size', 'Conductor Type', and 'Voltage_Level'
-        filtered_df = df_impedance[
-            (df_impedance['Type'] == row['Type']) & 
-            (df_impedance['Conductor Size'] == row['Conductor Size']) & 
-            (df_impedance['Conductor Type'] == row['Conductor Type']) & 
-            (df_impedance['Voltage_Level'] == row['Voltage_Level'])
-        ]
-
-        print(filtered_df)
-
-        # If there's only one match, update df_linetrace with the impedance values
-        if len(filtered_df) == 1:
-            impedance_row = filtered_df.iloc[0]
-            df_linetrace.at[index, '% Z+ @ 100 MVA'] = impedance_row['% Z+ @ 100 MVA']
-            df_linetrace.at[index, '% Zo @ 100 MVA'] = impedance_row['% Zo @ 100 MVA']
-            df_linetrace.at[index, 'Mapped Wire Type'] = impedance_row['Wire Type']
-            df_linetrace.at[index, 'Pole Type'] = impedance_row['Pole Type']
-            df_linetrace.at[index, 'Ground?'] = impedance_row['Ground?']
+# Columns used to match a line trace segment to the impedance catalog
+MATCH_KEYS = ['Type', 'Conductor Size', 'Conductor Type', 'Voltage_Level']
+
+# Impedance catalog column -> line trace column filled from it
+IMPEDANCE_COLUMNS = {
+    '% Z+ @ 100 MVA': '% Z+ @ 100 MVA',
+    '% Zo @ 100 MVA': '% Zo @ 100 MVA',
+    'Wire Type': 'Mapped Wire Type',
+    'Pole Type': 'Pole Type',
+    'Ground?': 'Ground?'
+}
+
+class ImpedanceIndex:
+    """
+    Impedance catalog indexed on MATCH_KEYS. Build it once per catalog and pass it to
+    map_impedances/map_impedances_gui to map any number of line traces.
+    """
+    def __init__(self, df_impedance):
+        self.df_impedance = df_impedance
+        self._version = None
+
+        # Keys as objects so the join compares values the same way == does (13.2 matches 13.2, 336 matches 336.0)
+        keys = df_impedance[MATCH_KEYS].astype(object)
+        self.groups = keys.groupby(MATCH_KEYS, sort=False).indices
+        self.type_voltage_groups = keys.groupby(['Type', 'Voltage_Level'], sort=False).indices
+
+        # One row per key, impedance values only kept where the key is unique
+        catalog = pd.concat([keys, df_impedance[list(IMPEDANCE_COLUMNS)]], axis=1).dropna(subset=MATCH_KEYS)
+        catalog['match_count'] = catalog.groupby(MATCH_KEYS, sort=False)['Type'].transform('size')
+        catalog = catalog.drop_duplicates(subset=MATCH_KEYS)
+        catalog.loc[catalog['match_count'] > 1, list(IMPEDANCE_COLUMNS)] = None
+        self.catalog = catalog.rename(columns=IMPEDANCE_COLUMNS)
+
+    def _lookup(self, groups, row, keys):
+        positions = groups.get(tuple(row[k] for k in keys))
+        if positions is None:
+            return self.df_impedance.iloc[0:0]
+        return self.df_impedance.iloc[positions]
+
+    @property
+    def version(self):
+        """Catalog hash used to key saved conductor choices, computed on first use"""
+        if self._version is None:
+            self._version = catalog_version(self.df_impedance)
+        return self._version
+
+    def matches(self, row):
+        """Catalog rows matching a line trace row on all of MATCH_KEYS"""
+        return self._lookup(self.groups, row, MATCH_KEYS)
+
+    def alternatives(self, row):
+        """Catalog rows with the same Type and Voltage_Level, offered when nothing matches"""
+        return self._lookup(self.type_voltage_groups, row, ['Type', 'Voltage_Level'])
+
+def join_impedances(df_linetrace, impedance_index):
+    """
+    Fill every line trace row with exactly one catalog match in a single merge.
+
+    :return: numpy array with the number of catalog matches for each row
+    """
+    keys = df_linetrace[MATCH_KEYS].astype(object)
+    merged = keys.merge(impedance_index.catalog, on=MATCH_KEYS, how='left') # left merge keeps the row order
+
+    for column in IMPEDANCE_COLUMNS.values():
+        values = merged[column].astype(object).to_numpy()
+        if column in ('Mapped Wire Type', 'Pole Type', 'Ground?'):
+            values[pd.isna(values)] = None
+        df_linetrace[column] = values
+
+    return merged['match_count'].fillna(0).astype(int).to_numpy()
+
+def set_impedance_row(df_linetrace, index, impedance_row):
+    """Copy the impedance values of a catalog record (row or saved choice) onto a line trace row"""
+    for imp_column, trace_column in IMPEDANCE_COLUMNS.items():
+        df_linetrace.at[index, trace_column] = impedance_row[imp_column]
 
-       # If multiple matches, prompt the user
-        elif len(filtered_df) > 1:
+def cached_choice(choice_cache, impedance_index, match_type, row):
+    """Choice saved for this conductor on an earlier run, or None"""
+    if choice_cache is None:
+        return None
+    return choice_cache.get(impedance_index.version, match_type, [row[k] for k in MATCH_KEYS])
+
+def remember_choice(choice_cache, impedance_index, match_type, row, impedance_row):
+    if choice_cache is not None:
+        choice_cache.put(impedance_index.version, match_type, [row[k] for k in MATCH_KEYS], impedance_row, list(IMPEDANCE_COLUMNS))
+
+# An 11.5 kV station reactor is saved per line trace, under this match type and the trace name
+REACTOR_MATCH = 'reactor'
+REACTOR_COLUMNS = ['Mapped Wire Type', '% Z+ @ 100 MVA']
+
+def make_reactor_record(name, impedance):
+    """Line trace row for a station reactor"""
+    return {
+        'Type': 'Reactor',
+        'Conductor Size': 'Reactor',
+        'Conductor Type': 'Reactor',
+        'Length': 0,  # Reactors have no length
+        'Voltage_Level': 11.5,
+        '% Z+ @ 100 MVA': impedance,
+        '% Zo @ 100 MVA': 0j,  # Reactors have no Z0 (phase devices only)
+        'Mapped Wire Type': name,
+        'Pole Type': None,
+        'Ground?': None,
+        'Total % Z @ 100 MVA': None,
+        'Total % Zo @ 100 MVA': None
+    }
+
+def cached_reactor(choice_cache, impedance_index, trace_name):
+    """
+    Reactor saved for this trace on an earlier run.
+
+    :return: reactor record, {} when 'No Reactor' was saved, None when nothing was saved
+    """
+    if choice_cache is None or trace_name is None:
+        return None
+    choice = choice_cache.get(impedance_index.version, REACTOR_MATCH, [trace_name])
+    if choice is None:
+        return None
+    if choice.get('% Z+ @ 100 MVA') is None:
+        return {}
+    return make_reactor_record(choice['Mapped Wire Type'], complex(choice['% Z+ @ 100 MVA']))
+
+def remember_reactor(choice_cache, impedance_index, trace_name, reactor_record):
+    """Save the reactor picked for a trace, an empty reactor_record saves 'No Reactor'"""
+    if choice_cache is not None and trace_name is not None:
+        choice = reactor_record or dict.fromkeys(REACTOR_COLUMNS)
+        choice_cache.put(impedance_index.version, REACTOR_MATCH, [trace_name], choice, REACTOR_COLUMNS)
+
+def add_reactor(df_linetrace, reactor_record):
+    """Station reactor goes first, it sits at distance 0 of the impedance profile"""
+    if not reactor_record:
+        return df_linetrace
+    return pd.concat([pd.DataFrame([reactor_record]), df_linetrace], ignore_index=True)
+
+def map_impedances(df_linetrace, df_impedance, impedance_index=None, choice_cache=None, interactive=True, trace_name=None):
+    """
+    :param impedance_index: prebuilt ImpedanceIndex for df_impedance, built here when None
+    :param choice_cache: ConductorChoiceCache, ambiguous or missing matches and the reactor chosen on an earlier run are reused
+    :param interactive: False never prompts, every ambiguous or missing match and the reactor of an 11.5 kV
+                        trace must come from choice_cache
+    :param trace_name: line trace name the reactor choice is saved under, None never saves it
+    :raises ValueError: when interactive is False and a choice was never saved
+    """
+    #KEEP FOR DEBUGGING
+    #print(df_linetrace)
+    #print(df_impedance)
+    if impedance_index is None:
+        impedance_index = ImpedanceIndex(df_impedance)
+
+    # Resolve every unique match at once, only ambiguous or missing rows are prompted below
+    match_counts = join_impedances(df_linetrace, impedance_index)
+    unresolved = []
+
+    for index, match_count in zip(df_linetrace.index, match_counts):
+        if match_count == 1:
+            continue
+        row = df_linetrace.loc[index]
+
+        # Reuse the choice made for this conductor on an earlier run
+        match_type = 'multiple_matches' if match_count > 1 else 'no_match'
+        cached = cached_choice(choice_cache, impedance_index, match_type, row)
+        if cached is not None:
+            set_impedance_row(df_linetrace, index, cached)
+            continue
+
+        if not interactive:
+            unresolved.append(f"{match_type.replace('_', ' ')} {', '.join(str(row[k]) for k in MATCH_KEYS)}")
+            continue
+
+        # If multiple matches, prompt the user
+        if match_count > 1:
+            filtered_df = impedance_index.matches(row)
             print(f"\nMultiple impedance records found for the following line:")
             print(row.to_string())
             print("\nPlease select one of the available choices:")
@@ -104,15 +250,13 @@ def map_impedances(df_linetrace, df_impedance):
             df_linetrace.at[index, 'Mapped Wire Type'] = impedance_row['Wire Type']
             df_linetrace.at[index, 'Pole Type'] = impedance_row['Pole Type']
             df_linetrace.at[index, 'Ground?'] = impedance_row['Ground?']
+            remember_choice(choice_cache, impedance_index, match_type, row, impedance_row)
         
         # If no matches, provide other options based on 'Type' and 'Voltage_Level'
         else:
             print(f"\nNo impedance records found for the following line:")
             print(row.to_string())
-            filtered_by_type_voltage = df_impedance[
-                (df_impedance['Type'] == row['Type']) & 
-                (df_impedance['Voltage_Level'] == row['Voltage_Level'])
-            ]
+            filtered_by_type_voltage = impedance_index.alternatives(row)
     
             if len(filtered_by_type_voltage) > 0:
                 print("\nHowever, there are other options with the same Type and Voltage Level. Please select one:")
@@ -137,11 +281,22 @@ def map_impedances(df_linetrace, df_impedance):
                 df_linetrace.at[index, 'Mapped Wire Type'] = impedance_row['Wire Type']
                 df_linetrace.at[index, 'Pole Type'] = impedance_row['Pole Type']
                 df_linetrace.at[index, 'Ground?'] = impedance_row['Ground?']
+                remember_choice(choice_cache, impedance_index, match_type, row, impedance_row)
             else:
                 print("No alternative options available.")
 
     # Check if the Voltage_Level 11.5 kV is present in the DataFrame
+    reactor_record = None
     if 11.5 in df_linetrace['Voltage_Level'].values:
+        reactor_record = cached_reactor(choice_cache, impedance_index, trace_name)
+        if reactor_record is None and not interactive:
+            unresolved.append(f"11.5 kV reactor of {trace_name or 'the line trace'}")
+
+    # A batch run never guesses, the feeder fails until its choices are made once interactively
+    if unresolved:
+        raise ValueError(f"no saved choice for {'; '.join(unresolved)}, map the trace interactively first")
+
+    if reactor_record is None and 11.5 in df_linetrace['Voltage_Level'].values:
         # Filter out the reactors
         reactor_df = df_impedance[df_impedance['Type'] == 'Reactor']
         
@@ -165,37 +320,21 @@ def map_impedances(df_linetrace, df_impedance):
         selection = int(input("Enter the number corresponding to your choice: "))
 
         # Create a new reactor record only if a reactor is selected
-        if selection <= len(reactor_df) or selection == len(reactor_df) + 1:
-            reactor_record = {
-                'Type': 'Reactor',
-                'Conductor Size': 'Reactor',
-                'Conductor Type': 'Reactor',
-                'Length': 0,  # Reactors have no length
-                'Voltage_Level': 11.5,
-                '% Z+ @ 100 MVA': None,
-                '% Zo @ 100 MVA': None,  # Will be set below
-                'Mapped Wire Type': None,
-                'Pole Type': None,
-                'Ground?': None,
-                'Total % Z @ 100 MVA': None,
-                'Total % Zo @ 100 MVA': None
-            }
-            
-            if selection == len(reactor_df) + 1:  # Custom reactor selected
-                reactor_name = input("Enter the custom reactor name/description: ")
-                reactor_impedance = complex(input("Enter the custom reactor % Z+ @ 100 MVA: "))
-                reactor_record['Mapped Wire Type'] = reactor_name
-                reactor_record['% Z+ @ 100 MVA'] = reactor_impedance
-                reactor_record['% Zo @ 100 MVA'] = 0j  # Reactors have no Z0 (phase devices only)
-            else:  # Predefined reactor selected
-                selected_index = reactor_df.index[selection - 1]
-                reactor_row = reactor_df.loc[selected_index]
-                reactor_record['Mapped Wire Type'] = reactor_row['Wire Type']
-                reactor_record['% Z+ @ 100 MVA'] = reactor_row['% Z+ @ 100 MVA']
-                reactor_record['% Zo @ 100 MVA'] = 0j  # Reactors have no Z0 (phase devices only)
-                
-            # Append the new reactor record to df_linetrace
-            df_linetrace = pd.concat([df_linetrace, pd.DataFrame([reactor_record])], ignore_index=True)
+        reactor_record = {}
+        if selection == len(reactor_df) + 1:  # Custom reactor selected
+            reactor_name = input("Enter the custom reactor name/description: ")
+            reactor_impedance = complex(input("Enter the custom reactor % Z+ @ 100 MVA: "))
+            reactor_record = make_reactor_record(reactor_name, reactor_impedance)
+        elif selection <= len(reactor_df):  # Predefined reactor selected
+            selected_index = reactor_df.index[selection - 1]
+            reactor_row = reactor_df.loc[selected_index]
+            reactor_record = make_reactor_record(reactor_row['Wire Type'], reactor_row['% Z+ @ 100 MVA'])
+        remember_reactor(choice_cache, impedance_index, trace_name, reactor_record)
+
+    if choice_cache is not None:
+        choice_cache.save()
+
+    df_linetrace = add_reactor(df_linetrace, reactor_record)
 
     # KEEP FOR DEBUGGING
     #print("\nDataFrame: df_linetrace")
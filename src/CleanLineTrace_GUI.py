@@ -1,14 +1,15 @@
-import pandas as pd
-import numpy as np
 import tkinter as tk
 from tkinter import messagebox
 
 # Import the original functions
-from CleanLineTrace import clean_line_trace
+from CleanLineTrace import (clean_line_trace, ImpedanceIndex, join_impedances, set_impedance_row, cached_choice, remember_choice,
+                            make_reactor_record, cached_reactor, remember_reactor, add_reactor)
 
-def map_impedances_gui(df_linetrace, df_impedance, parent_window=None):
+def map_impedances_gui(df_linetrace, df_impedance, parent_window=None, impedance_index=None, choice_cache=None, trace_name=None):
     """
     GUI version of map_impedances that uses dialog boxes instead of terminal input
+
+    :param trace_name: line trace name the reactor choice is saved under, see map_impedances
     """
     # Import dialog classes
     try:
@@ -17,36 +18,29 @@ def map_impedances_gui(df_linetrace, df_impedance, parent_window=None):
     except ImportError:
         # Fallback to terminal version if dialogs not available
         from CleanLineTrace import map_impedances
-        return map_impedances(df_linetrace, df_impedance)
+        return map_impedances(df_linetrace, df_impedance, impedance_index, choice_cache, trace_name=trace_name)
     
-    # Create new columns in df_linetrace for the impedance values
-    df_linetrace['% Z+ @ 100 MVA'] = np.nan
-    df_linetrace['% Zo @ 100 MVA'] = np.nan
-    df_linetrace['Mapped Wire Type'] = None
-    df_linetrace['Pole Type'] = None
-    df_linetrace['Ground?'] = None
+    if impedance_index is None:
+        impedance_index = ImpedanceIndex(df_impedance)
+
+    # Resolve every unique match at once, only ambiguous or missing rows open a dialog below
+    match_counts = join_impedances(df_linetrace, impedance_index)
 
-    # Iterate over each row in df_linetrace
-    for index, row in df_linetrace.iterrows():
-        # Filter df_impedance based on 'Type', 'Conductor Size', 'Conductor Type', and 'Voltage_Level'
-        filtered_df = df_impedance[
-            (df_impedance['Type'] == row['Type']) & 
-            (df_impedance['Conductor Size'] == row['Conductor Size']) & 
-            (df_impedance['Conductor Type'] == row['Conductor Type']) & 
-            (df_impedance['Voltage_Level'] == row['Voltage_Level'])
-        ]
+    for index, match_count in zip(df_linetrace.index, match_counts):
+        if match_count == 1:
+            continue
+        row = df_linetrace.loc[index]
 
-        # If there's only one match, update df_linetrace with the impedance values
-        if len(filtered_df) == 1:
-            impedance_row = filtered_df.iloc[0]
-            df_linetrace.at[index, '% Z+ @ 100 MVA'] = impedance_row['% Z+ @ 100 MVA']
-            df_linetrace.at[index, '% Zo @ 100 MVA'] = impedance_row['% Zo @ 100 MVA']
-            df_linetrace.at[index, 'Mapped Wire Type'] = impedance_row['Wire Type']
-            df_linetrace.at[index, 'Pole Type'] = impedance_row['Pole Type']
-            df_linetrace.at[index, 'Ground?'] = impedance_row['Ground?']
+        # Reuse the choice made for this conductor on an earlier run
+        match_type = 'multiple_matches' if match_count > 1 else 'no_match'
+        cached = cached_choice(choice_cache, impedance_index, match_type, row)
+        if cached is not None:
+            set_impedance_row(df_linetrace, index, cached)
+            continue
 
         # If multiple matches, show dialog
-        elif len(filtered_df) > 1:
+        if match_count > 1:
+            filtered_df = impedance_index.matches(row)
             if parent_window:
                 dialog = ImpedanceMatchingDialog(parent_window, row.to_dict(), filtered_df, "multiple_matches")
                 selected_row = dialog.get_result()
@@ -57,6 +51,7 @@ def map_impedances_gui(df_linetrace, df_impedance, parent_window=None):
                     df_linetrace.at[index, 'Mapped Wire Type'] = selected_row['Wire Type']
                     df_linetrace.at[index, 'Pole Type'] = selected_row['Pole Type']
                     df_linetrace.at[index, 'Ground?'] = selected_row['Ground?']
+                    remember_choice(choice_cache, impedance_index, match_type, row, selected_row)
                 else:
                     # User cancelled - use first option as default
                     impedance_row = filtered_df.iloc[0]
@@ -76,10 +71,7 @@ def map_impedances_gui(df_linetrace, df_impedance, parent_window=None):
         
         # If no matches, provide other options based on 'Type' and 'Voltage_Level'
         else:
-            filtered_by_type_voltage = df_impedance[
-                (df_impedance['Type'] == row['Type']) & 
-                (df_impedance['Voltage_Level'] == row['Voltage_Level'])
-            ]
+            filtered_by_type_voltage = impedance_index.alternatives(row)
     
             if len(filtered_by_type_voltage) > 0:
                 if parent_window:
@@ -92,6 +84,7 @@ def map_impedances_gui(df_linetrace, df_impedance, parent_window=None):
                         df_linetrace.at[index, 'Mapped Wire Type'] = selected_row['Wire Type']
                         df_linetrace.at[index, 'Pole Type'] = selected_row['Pole Type']
                         df_linetrace.at[index, 'Ground?'] = selected_row['Ground?']
+                        remember_choice(choice_cache, impedance_index, match_type, row, selected_row)
                     else:
                         # User cancelled - skip this line
                         messagebox.showwarning("Warning", f"No impedance selected for line at index {index}. Using zero impedance.")
@@ -111,7 +104,11 @@ def map_impedances_gui(df_linetrace, df_impedance, parent_window=None):
                 df_linetrace.at[index, '% Zo @ 100 MVA'] = 0j
 
     # Check if the Voltage_Level 11.5 kV is present in the DataFrame
+    reactor_record = None
     if 11.5 in df_linetrace['Voltage_Level'].values:
+        reactor_record = cached_reactor(choice_cache, impedance_index, trace_name)
+
+    if reactor_record is None and 11.5 in df_linetrace['Voltage_Level'].values:
         # Filter out the reactors
         reactor_df = df_impedance[df_impedance['Type'] == 'Reactor']
         
@@ -120,53 +117,24 @@ def map_impedances_gui(df_linetrace, df_impedance, parent_window=None):
             dialog = ReactorSelectionDialog(parent_window, reactor_df)
             result = dialog.get_result()
             
-            if result and result['type'] != 'none':
-                # Create a new reactor record
-                reactor_record = {
-                    'Type': 'Reactor',
-                    'Conductor Size': 'Reactor',
-                    'Conductor Type': 'Reactor',
-                    'Length': 0,  # Reactors have no length
-                    'Voltage_Level': 11.5,
-                    '% Z+ @ 100 MVA': None,
-                    '% Zo @ 100 MVA': 0j,  # Reactors have no Z0 (phase devices only)
-                    'Mapped Wire Type': None,
-                    'Pole Type': None,
-                    'Ground?': None,
-                    'Total % Z @ 100 MVA': None,
-                    'Total % Zo @ 100 MVA': None
-                }
-                
+            # A cancelled dialog adds no reactor and saves nothing, it is asked again next time
+            if result:
+                reactor_record = {}
                 if result['type'] == 'predefined':
                     # Predefined reactor selected
                     reactor_row = result['data']
-                    reactor_record['Mapped Wire Type'] = reactor_row['Wire Type']
-                    reactor_record['% Z+ @ 100 MVA'] = reactor_row['% Z+ @ 100 MVA']
+                    reactor_record = make_reactor_record(reactor_row['Wire Type'], reactor_row['% Z+ @ 100 MVA'])
                 elif result['type'] == 'custom':
                     # Custom reactor selected
-                    reactor_record['Mapped Wire Type'] = result['name']
-                    reactor_record['% Z+ @ 100 MVA'] = result['impedance']
-                
-                # Append the new reactor record to df_linetrace
-                df_linetrace = pd.concat([df_linetrace, pd.DataFrame([reactor_record])], ignore_index=True)
+                    reactor_record = make_reactor_record(result['name'], result['impedance'])
+                remember_reactor(choice_cache, impedance_index, trace_name, reactor_record)
         elif len(reactor_df) > 0:
             # No parent window but reactors available - add a default reactor
             messagebox.showinfo("Info", "11.5kV system detected. Adding default reactor.")
             reactor_row = reactor_df.iloc[0]
-            reactor_record = {
-                'Type': 'Reactor',
-                'Conductor Size': 'Reactor',
-                'Conductor Type': 'Reactor',
-                'Length': 0,
-                'Voltage_Level': 11.5,
-                '% Z+ @ 100 MVA': reactor_row['% Z+ @ 100 MVA'],
-                '% Zo @ 100 MVA': 0j,
-                'Mapped Wire Type': reactor_row['Wire Type'],
-                'Pole Type': None,
-                'Ground?': None,
-                'Total % Z @ 100 MVA': None,
-                'Total % Zo @ 100 MVA': None
-            }
-            df_linetrace = pd.concat([df_linetrace, pd.DataFrame([reactor_record])], ignore_index=True)
+            reactor_record = make_reactor_record(reactor_row['Wire Type'], reactor_row['% Z+ @ 100 MVA'])
+
+    if choice_cache is not None:
+        choice_cache.save()
 
-    return df_linetrace
\ No newline at end of file
+    return add_reactor(df_linetrace, reactor_record)
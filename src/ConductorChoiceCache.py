@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import pandas as pd
+
+# Saved next to the user's other settings so every run and batch job shares the same choices
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.fault_current_calculator', 'conductor_choices.json')
+
+def catalog_version(df_impedance):
+    """Short hash of the impedance catalog contents, choices made against another catalog are ignored"""
+    hashes = pd.util.hash_pandas_object(df_impedance.astype(str), index=False)
+    digest = hashlib.sha1(hashes.to_numpy().tobytes())
+    digest.update(','.join(map(str, df_impedance.columns)).encode())
+    return digest.hexdigest()[:16]
+
+class ConductorChoiceCache:
+    """
+    Remembers which impedance record was picked for an ambiguous or missing conductor match.
+    Keyed by the catalog version, the match type ('multiple_matches' or 'no_match') and the
+    (Type, Conductor Size, Conductor Type, Voltage_Level) of the line trace row. The least recently
+    used choices are dropped once max_entries is reached. A read_only cache never writes the file,
+    used by worker processes that share one cache file.
+    """
+    def __init__(self, file_path=DEFAULT_CACHE_PATH, max_entries=500, read_only=False):
+        self.file_path = file_path
+        self.max_entries = max_entries
+        self.read_only = read_only
+        self.choices = OrderedDict()
+        self.modified = False
+        self.load()
+
+    @staticmethod
+    def make_key(version, match_type, match_values):
+        return json.dumps([version, match_type] + [str(value) for value in match_values])
+
+    def load(self):
+        if not self.file_path or not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            # File is written least recently used first
+            self.choices = OrderedDict((entry['key'], entry['choice']) for entry in entries)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: could not read conductor choice cache {self.file_path}: {e}")
+            self.choices = OrderedDict()
+
+    def save(self):
+        if not self.file_path or not self.modified or self.read_only:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+            tmp_path = self.file_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([{'key': key, 'choice': choice} for key, choice in self.choices.items()], f, indent=1)
+            os.replace(tmp_path, self.file_path)
+            self.modified = False
+        except OSError as e:
+            print(f"Warning: could not save conductor choice cache {self.file_path}: {e}")
+
+    def get(self, version, match_type, match_values):
+        """Saved impedance record for a match, or None"""
+        key = self.make_key(version, match_type, match_values)
+        choice = self.choices.get(key)
+        if choice is not None:
+            # Recency is kept in memory only, a hit never rewrites the file (it is written on the next put)
+            self.choices.move_to_end(key)
+        return choice
+
+    def put(self, version, match_type, match_values, impedance_row, columns):
+        """Remember the chosen catalog record, only the given columns are stored"""
+        key = self.make_key(version, match_type, match_values)
+        self.choices[key] = {column: (None if pd.isna(impedance_row[column]) else str(impedance_row[column]))
+                             for column in columns}
+        self.choices.move_to_end(key)
+        while len(self.choices) > self.max_entries:
+            self.choices.popitem(last=False)
+        self.modified = True
+
+    def clear(self):
+        self.choices.clear()
+        self.modified = True
@@ -0,0 +1,267 @@
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from FeederFaultProfile import fault_profile, profile_distances
+from FaultEventBatch import FeederCache, ResultWriter, FEEDER_KEY
+from GetExcel import read_impedance_sheets, read_clean_line_imp
+from ConductorChoiceCache import ConductorChoiceCache, DEFAULT_CACHE_PATH
+from RelayCurves import operate_time, multiple_of_pickup
+
+# One row per feeder relay (down) and the upstream bus or transformer relay it has to coordinate with
+PAIR_COLUMNS = FEEDER_KEY + ['down_curve', 'down_td', 'down_tap', 'down_ctr', 'up_curve', 'up_td', 'up_tap', 'up_ctr']
+# Optional pair columns and their defaults, up_current_ratio scales the feeder current to the upstream relay
+# (e.g. the transformer ratio for a relay on the high side), element picks the fault types checked
+PAIR_DEFAULTS = {'pair': '', 'element': 'phase', 'cti': 0.3, 'up_current_ratio': 1.0}
+
+# Fault profile columns each element sees, the ground element only checks SLG where the fault current is 3I0
+ELEMENT_FAULTS = {
+    'phase': ['three_ph_fault', 'l_l_fault'],
+    'ground': ['l_g_fault']
+}
+
+MARGIN_COLUMNS = ['pair', 'element', 'distance_mi', 'fault', 'current', 'down_time', 'up_time', 'cti', 'required_cti', 'status']
+SUMMARY_COLUMNS = FEEDER_KEY + ['pair', 'element', 'points', 'violations', 'min_cti', 'min_cti_distance_mi', 'min_cti_fault',
+                                 'status']
+
+def prepare_pairs(pairs):
+    """Check the pair columns and fill in the optional ones"""
+    missing = [col for col in PAIR_COLUMNS if col not in pairs.columns]
+    if missing:
+        raise ValueError(f"Relay pair file is missing columns: {', '.join(missing)}")
+
+    pairs = pairs.copy()
+    for column, default in PAIR_DEFAULTS.items():
+        if column not in pairs.columns:
+            pairs[column] = default
+        pairs[column] = pairs[column].fillna(default)
+    # Unnamed pairs are named by their row
+    unnamed = pairs['pair'].astype(str).str.strip() == ''
+    pairs.loc[unnamed, 'pair'] = [f"pair {i + 1}" for i in np.nonzero(unnamed.to_numpy())[0]]
+    pairs['element'] = pairs['element'].astype(str).str.strip().str.lower()
+
+    unknown = sorted(set(pairs['element']) - set(ELEMENT_FAULTS))
+    if unknown:
+        raise ValueError(f"Unknown element: {', '.join(unknown)}, use one of {', '.join(ELEMENT_FAULTS)}")
+    return pairs
+
+def coordination_margins(profile, pairs):
+    """
+    CTI of every relay pair at every point of a feeder fault profile, all pairs and points at once.
+
+    :param profile: FeederFaultProfile.fault_profile DataFrame of the feeder
+    :param pairs: prepare_pairs DataFrame of the pairs on this feeder
+    :return: DataFrame with MARGIN_COLUMNS. status is 'ok', 'violation' (CTI below the required one),
+             'downstream no pickup' (only the upstream relay trips, also a violation),
+             'upstream no pickup' or 'no pickup'
+    """
+    frames = []
+
+    for element, faults in ELEMENT_FAULTS.items():
+        mask = (pairs['element'] == element).to_numpy()
+        if not mask.any():
+            continue
+        group = pairs[mask]
+        column = lambda name, dtype=float: group[name].to_numpy(dtype=dtype)[:, None]
+
+        for fault in faults:
+            current = profile[fault].to_numpy(dtype=float)[None, :]
+            # Pairs x points in one broadcast per relay
+            M_down = multiple_of_pickup(current, column('down_tap'), column('down_ctr'))
+            M_up = multiple_of_pickup(current * column('up_current_ratio'), column('up_tap'), column('up_ctr'))
+            down_time = operate_time(column('down_curve', object), M_down, column('down_td'))
+            up_time = operate_time(column('up_curve', object), M_up, column('up_td'))
+            cti = up_time - down_time
+            required = np.broadcast_to(column('cti'), cti.shape)
+
+            down_trips = ~np.isnan(down_time)
+            up_trips = ~np.isnan(up_time)
+            with np.errstate(invalid='ignore'):
+                status = np.select(
+                    [~down_trips & ~up_trips, ~down_trips, ~up_trips, cti < required],
+                    ['no pickup', 'downstream no pickup', 'upstream no pickup', 'violation'],
+                    'ok')
+
+            n_pairs, n_points = cti.shape
+            frames.append(pd.DataFrame({
+                'pair': np.repeat(group['pair'].to_numpy(dtype=object), n_points),
+                'element': element,
+                'distance_mi': np.tile(profile['distance_mi'].to_numpy(), n_pairs),
+                'fault': fault,
+                'current': np.broadcast_to(current, cti.shape).ravel(),
+                'down_time': down_time.ravel(),
+                'up_time': up_time.ravel(),
+                'cti': cti.ravel(),
+                'required_cti': required.ravel(),
+                'status': status.ravel()
+            }, columns=MARGIN_COLUMNS))
+
+    margins = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=MARGIN_COLUMNS)
+    # 4.6 kV feeders have no ground fault currents
+    return margins[margins['current'].notna()].reset_index(drop=True)
+
+def summarize_margins(margins, pairs=None, voltage_level=None):
+    """
+    One row per pair and element: violations and the smallest CTI with where it happens.
+
+    :param pairs: the pairs checked, a pair without any point (no fault current of its element on the
+                  feeder) still gets a row with points 0 and the reason in status
+    :param voltage_level: feeder voltage, names the 4.6 kV ground case in status
+    :return: DataFrame, status is 'ok', 'violation' or why the pair has no points
+    """
+    violation = margins['status'].isin(['violation', 'downstream no pickup'])
+    margins = margins.assign(violation=violation)
+    rows = []
+    for (pair, element), group in margins.groupby(['pair', 'element'], sort=False):
+        both = group[group['cti'].notna()]
+        worst = both.loc[both['cti'].idxmin()] if len(both) else None
+        rows.append({
+            'pair': pair,
+            'element': element,
+            'points': len(group),
+            'violations': int(group['violation'].sum()),
+            'min_cti': worst['cti'] if worst is not None else np.nan,
+            'min_cti_distance_mi': worst['distance_mi'] if worst is not None else np.nan,
+            'min_cti_fault': worst['fault'] if worst is not None else '',
+            'status': 'violation' if group['violation'].any() else 'ok'
+        })
+
+    if pairs is not None:
+        checked = {(row['pair'], row['element']) for row in rows}
+        for pair, element in pairs[['pair', 'element']].itertuples(index=False):
+            if (pair, element) in checked:
+                continue
+            # Same reason solve_feeder_events gives, 4.6 kV busses have no Zo
+            no_ground = element == 'ground' and voltage_level == 4.6
+            rows.append({'pair': pair, 'element': element, 'points': 0, 'violations': 0, 'min_cti': np.nan,
+                         'min_cti_distance_mi': np.nan, 'min_cti_fault': '',
+                         'status': 'no ground fault on 4.6 kV' if no_ground else 'no fault current'})
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS[len(FEEDER_KEY):])
+
+def check_feeder(params, pairs, spacing_mi=None):
+    """
+    Coordination of the relay pairs on one feeder over its whole fault current range.
+
+    :param params: line_parameters dict of the feeder, e.g. from FeederCache.get
+    :param spacing_mi: None checks every segment boundary, otherwise a point every spacing_mi
+    :return: (margins DataFrame, summary DataFrame)
+    """
+    profile = fault_profile(params, profile_distances(params, spacing_mi))
+    margins = coordination_margins(profile, pairs)
+    return margins, summarize_margins(margins, pairs, params['voltage_level'])
+
+# Per process inputs, loaded once by init_check_worker so the tasks only carry the pairs
+_check = {}
+
+def init_check_worker(bus_imp_path, line_imp_path, trace_dir='', choices_path=DEFAULT_CACHE_PATH, spacing_mi=None):
+    """Load the impedance catalogs for this process, also the pool initializer"""
+    bus_dataframes = read_impedance_sheets(bus_imp_path)
+    line_dataframes = read_clean_line_imp(line_imp_path)
+    line_impedances = line_dataframes[list(line_dataframes.keys())[0]]
+    # Workers only read saved conductor choices, they never prompt or write the shared file
+    choice_cache = ConductorChoiceCache(choices_path, read_only=True) if choices_path else None
+    _check['feeders'] = FeederCache(bus_dataframes, line_impedances, trace_dir, choice_cache, interactive=False)
+    _check['spacing_mi'] = spacing_mi
+
+def check_chunk(pairs):
+    """
+    Check a chunk of relay pairs, feeder by feeder. Module level so it can be sent to a process pool.
+
+    :return: (margins DataFrame with the feeder columns, summary DataFrame, list of error messages)
+    """
+    margin_frames, summary_frames, errors = [], [], []
+    for key, feeder_pairs in pairs.groupby(FEEDER_KEY, sort=False):
+        params = _check['feeders'].get(*key)
+        if isinstance(params, str):
+            errors.append(f"{', '.join(map(str, key))}: {params}")
+            continue
+        try:
+            margins, summary = check_feeder(params, feeder_pairs, _check['spacing_mi'])
+        except Exception as e:
+            errors.append(f"{', '.join(map(str, key))}: {e}")
+            continue
+        for frame, frames in ((margins, margin_frames), (summary, summary_frames)):
+            for position, (column, value) in enumerate(zip(FEEDER_KEY, key)):
+                frame.insert(position, column, value)
+            frames.append(frame)
+
+    margins = pd.concat(margin_frames, ignore_index=True) if margin_frames else pd.DataFrame(columns=FEEDER_KEY + MARGIN_COLUMNS)
+    summary = pd.concat(summary_frames, ignore_index=True) if summary_frames else pd.DataFrame(columns=SUMMARY_COLUMNS)
+    return margins, summary, errors
+
+def run_coordination_batch(pairs_path, bus_imp_path, line_imp_path, out_path, trace_dir='', spacing_mi=None,
+                           chunksize=4, workers=None, choices_path=DEFAULT_CACHE_PATH):
+    """
+    Coordination check of every relay pair in a CSV (PAIR_COLUMNS, optional PAIR_DEFAULTS columns).
+    Feeders are split into chunks of chunksize and checked in a process pool, the CTI at every
+    point is appended to out_path (.csv or .parquet) as the chunks finish.
+
+    :param workers: process pool size, 1 disables the pool, None lets the pool pick
+    :return: (margin rows written, summary DataFrame, list of feeder error messages)
+    """
+    pairs = prepare_pairs(pd.read_csv(pairs_path))
+    feeders = pairs[FEEDER_KEY].drop_duplicates()
+    feeder_ids = pairs.groupby(FEEDER_KEY, sort=False).ngroup()
+    chunks = [pairs[feeder_ids.between(i, i + chunksize - 1)] for i in range(0, len(feeders), chunksize)]
+
+    init_args = (bus_imp_path, line_imp_path, trace_dir, choices_path, spacing_mi)
+    init_check_worker(*init_args)
+
+    writer = ResultWriter(out_path)
+    summaries, errors = [], []
+    executor = None
+    try:
+        if workers != 1 and len(chunks) > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_check_worker, initargs=init_args)
+            results = executor.map(check_chunk, chunks)
+        else:
+            results = map(check_chunk, chunks)
+
+        # map keeps the feeder order, each chunk is written as soon as it and the ones before it are done
+        for margins, summary, chunk_errors in results:
+            for error in chunk_errors:
+                print(f"Warning: {error}")
+            errors.extend(chunk_errors)
+            if len(margins):
+                writer.write(margins)
+            if len(summary):
+                summaries.append(summary)
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown()
+
+    summary = pd.concat(summaries, ignore_index=True) if summaries else pd.DataFrame(columns=SUMMARY_COLUMNS)
+    return writer.rows, summary, errors
+
+def main():
+    parser = argparse.ArgumentParser(description='Coordination time interval of feeder and upstream relays along every feeder.')
+    parser.add_argument('pairs', help=f"CSV with columns {', '.join(PAIR_COLUMNS)}, optional {', '.join(PAIR_DEFAULTS)}")
+    parser.add_argument('--bus-imp', required=True, help='bus impedance workbook (Andy Sheets)')
+    parser.add_argument('--line-imp', required=True, help='line impedance workbook (line cleanup)')
+    parser.add_argument('--trace-dir', default='', help='folder holding the line trace workbooks')
+    parser.add_argument('--spacing-ft', type=float, default=None, help='point spacing in feet, default every segment boundary')
+    parser.add_argument('--out', default='coordination.csv', help='CTI at every point, .csv or .parquet file')
+    parser.add_argument('--summary', default='coordination_summary.csv', help='one row per relay pair, .csv file')
+    parser.add_argument('--chunksize', type=int, default=4, help='feeders per pool task')
+    parser.add_argument('--workers', type=int, default=None, help='process pool size, 1 to disable')
+    parser.add_argument('--choices', default=DEFAULT_CACHE_PATH, help='saved conductor choices file')
+    args = parser.parse_args()
+
+    spacing_mi = args.spacing_ft / 5280 if args.spacing_ft else None
+    rows, summary, errors = run_coordination_batch(args.pairs, args.bus_imp, args.line_imp, args.out, trace_dir=args.trace_dir,
+                                                   spacing_mi=spacing_mi, chunksize=args.chunksize, workers=args.workers,
+                                                   choices_path=args.choices)
+    summary.to_csv(args.summary, index=False)
+    failing = summary[summary['violations'] > 0]
+    unchecked = summary[summary['points'] == 0]
+    print(f"Checked {len(summary)} relay pairs at {rows} points, {len(failing)} with CTI violations, "
+          f"{len(unchecked)} not checked, {len(errors)} feeders failed")
+    for row in unchecked.itertuples(index=False):
+        print(f"  {row.station} {row.line_trace} {row.pair} ({row.element}): {row.status}")
+    for row in failing.itertuples(index=False):
+        print(f"  {row.station} {row.line_trace} {row.pair} ({row.element}): {row.violations} points, "
+              f"min CTI {row.min_cti:.3f} s at {row.min_cti_distance_mi:.2f} mi ({row.min_cti_fault})")
+
+if __name__ == '__main__':
+    main()
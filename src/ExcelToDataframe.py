@@ -1,14 +1,110 @@
+import datetime
+import importlib.util
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
 
 
-def excel_to_dataframes(file_path):
+def calamine_available():
+    """True when the optional python-calamine reader is installed"""
+    return importlib.util.find_spec('python_calamine') is not None
+
+def select_sheets(available, sheet_names):
+    """
+    Sheet names to read, in workbook order when sheet_names is None.
+
+    :param sheet_names: None for every sheet, or a list of sheet names and/or positions
+    """
+    if sheet_names is None:
+        return list(available)
+
+    selected = []
+    for sheet in sheet_names:
+        if isinstance(sheet, int):
+            selected.append(available[sheet])
+        elif sheet in available:
+            selected.append(sheet)
+        else:
+            raise KeyError(f"Worksheet {sheet} does not exist.")
+    return selected
+
+def rows_to_dataframe(rows, n_rows=None, n_cols=None):
+    """
+    Stream rows of cell values into preallocated column arrays and build the DataFrame.
+    Column dtypes are inferred the same way as pd.DataFrame(list of rows).
+
+    :param n_rows: expected number of rows (the sheet dimension), the arrays grow past it if needed
+    :param n_cols: expected number of columns
+    """
+    data = np.empty((max(n_rows or 0, 1), max(n_cols or 0, 1)), dtype=object)
+    count = 0
+    width = 0
+
+    for row in rows:
+        if count == data.shape[0]:
+            data = np.vstack([data, np.empty(data.shape, dtype=object)])
+        if len(row) > data.shape[1]:
+            data = np.hstack([data, np.empty((data.shape[0], len(row) - data.shape[1]), dtype=object)])
+        data[count, :len(row)] = row
+        width = max(width, len(row))
+        count += 1
+
+    if count == 0:
+        return pd.DataFrame()
+
+    data = data[:count, :width]
+    df = pd.DataFrame({i: data[:, i].tolist() for i in range(width)})
+    df.columns = pd.RangeIndex(width)
+    return df
+
+def _calamine_value(value):
+    # Match the values openpyxl returns: empty cells are None, whole numbers are int, dates are datetime
+    if value == '':
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if type(value) is datetime.date:
+        return datetime.datetime.combine(value, datetime.time())
+    return value
+
+def _read_calamine(file_path, sheet_names):
+    from python_calamine import CalamineWorkbook
+    from openpyxl import load_workbook
+
+    # Sheet dimensions come from openpyxl so blank formatted rows and columns are kept, the
+    # cleaning code drops rows and columns by position
+    wb_dims = load_workbook(file_path, read_only=True, data_only=True)
+    wb = CalamineWorkbook.from_path(file_path)
+
+    dfs = {}
+    for sheet_name in select_sheets(wb.sheet_names, sheet_names):
+        ws = wb_dims[sheet_name]
+        n_rows, n_cols = ws.max_row or 0, ws.max_column or 0
+        rows = wb.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+        width = max([n_cols] + [len(row) for row in rows])
+        rows = rows + [[]] * (n_rows - len(rows))
+        padded = ([_calamine_value(v) for v in row] + [None] * (width - len(row)) for row in rows)
+        dfs[sheet_name] = rows_to_dataframe(padded, len(rows), width)
+
+    wb_dims.close()
+    return dfs
+
+def excel_to_dataframes(file_path, sheet_names=None, engine=None):
     """
     Reads all sheets in an Excel file and outputs a dictionary of pandas DataFrames.
 
     :param file_path: str, path to the Excel file
+    :param sheet_names: list of sheet names or positions to read, None reads every sheet
+    :param engine: 'openpyxl' (default), 'calamine' (python-calamine, faster on large workbooks)
+                   or 'auto' to use calamine when it is installed
     :return: dict, a dictionary with sheet names as keys and pandas DataFrame objects as values
     """
+    if engine == 'auto':
+        engine = 'calamine' if calamine_available() else 'openpyxl'
+    if engine == 'calamine':
+        return _read_calamine(file_path, sheet_names)
+
+    # Imported here, a start from the compiled catalogs never parses Excel
+    from openpyxl import load_workbook
 
     # Load the workbook
     wb = load_workbook(file_path, read_only=True, data_only=True)
@@ -16,21 +112,13 @@ def excel_to_dataframes(file_path):
     # Initialize a dictionary to store DataFrames
     dfs = {}
 
-    # Iterate through each sheet in the workbook
-    for sheet_name in wb.sheetnames:
+    # Iterate through the selected sheets in the workbook
+    for sheet_name in select_sheets(wb.sheetnames, sheet_names):
         ws = wb[sheet_name]
 
-        # Get the data from the worksheet
-        data = []
-        for row in ws.iter_rows():
-            data.append([cell.value for cell in row])
-
-        # Create a DataFrame from the data
-        df = pd.DataFrame(data)
-
-        # Add the DataFrame to the dictionary with the sheet name as the key
-        dfs[sheet_name] = df
+        # Stream cell values straight into column arrays sized from the sheet dimension
+        dfs[sheet_name] = rows_to_dataframe(ws.iter_rows(values_only=True), ws.max_row, ws.max_column)
 
     # Close the workbook and return the dictionary of DataFrames
     wb.close()
-    return dfs
\ No newline at end of file
+    return dfs
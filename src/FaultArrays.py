@@ -0,0 +1,63 @@
+import numpy as np
+
+# Symmetrical components A matrix (same constants used by ZBus and Calcs)
+A = np.array([[1, 1, 1],[1, -0.5 - 0.866j, -0.5 + 0.866j],[1, -0.5 + 0.866j, -0.5 - 0.866j]])
+
+def to_complex_array(values):
+    """
+    Convert a column of complex numbers or '1.2+3.4j' strings to a complex array.
+    Missing or unparseable entries become nan+nanj.
+    """
+    try:
+        return np.asarray(values, dtype=complex)
+    except (TypeError, ValueError):
+        pass
+
+    out = np.empty(len(values), dtype=complex)
+    for i, value in enumerate(values):
+        try:
+            out[i] = complex(value)
+        except (TypeError, ValueError):
+            out[i] = complex(np.nan, np.nan)
+    return out
+
+def base_current(voltage_level, MVA_base=100):
+    """Base current in kA for a voltage level in kV (scalar or array)"""
+    return MVA_base / ((3 ** 0.5) * np.asarray(voltage_level, dtype=float))
+
+def three_ph_fault_pu(Zpos_pu, voltage_level_pu=1):
+    """3-phase fault current in pu (A phase)"""
+    return voltage_level_pu / Zpos_pu
+
+def l_l_fault_pu(Zpos_pu, voltage_level_pu=1):
+    """Line-to-line fault current in pu (B phase)"""
+    l_l_fault_pos = voltage_level_pu / (Zpos_pu * 2) #Ia positive sequence
+    return (-1j) * (3 ** 0.5) * l_l_fault_pos
+
+def l_g_fault_pu(Zpos_pu, Zo_pu):
+    """Line-to-ground sequence current I0 in pu, the phase current is 3 * I0"""
+    Z_total = 2 * Zpos_pu + Zo_pu
+    return np.conj(Z_total) / ((Z_total.real) ** 2 + (Z_total.imag) ** 2)
+
+def l_l_g_fault_pu(Zpos_pu, Zo_pu, voltage_level_pu=1):
+    """
+    Line-to-line-to-ground phase currents in pu.
+
+    :return: complex array of shape (3, ...) holding the A, B and C phase currents
+    """
+    Zpos_pu, Zo_pu = np.broadcast_arrays(np.asarray(Zpos_pu, dtype=complex), np.asarray(Zo_pu, dtype=complex))
+    Z2_pu = Zpos_pu
+    Zf_pu = (Z2_pu * Zo_pu) / (Zo_pu + Z2_pu)
+    I1 = voltage_level_pu / (Zpos_pu + Zf_pu) #I1 positive sequence
+    I2 = -I1 * (Zo_pu / (Zo_pu + Z2_pu)) #I2 negative sequence
+    I0 = -I1 * (Z2_pu / (Zo_pu + Z2_pu)) #I0 zero sequence
+    I_seq = np.stack([I0, I1, I2])
+    return np.tensordot(A, I_seq, axes=1)
+
+def to_amps(I_pu, Ibase):
+    """Magnitude in amps from a pu current and a base current in kA"""
+    return np.abs(I_pu) * Ibase * 1000
+
+def to_degs(I_pu):
+    """Angle in degrees of a pu current"""
+    return np.degrees(np.angle(I_pu))
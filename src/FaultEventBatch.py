@@ -0,0 +1,254 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from Classes import ZBus, ZLine
+from GetExcel import read_impedance_sheets, read_clean_line_imp, read_line_trace
+from CleanLineTrace import map_impedances, ImpedanceIndex
+from ConductorChoiceCache import ConductorChoiceCache, DEFAULT_CACHE_PATH
+from FaultLocator import FAULT_TYPES, line_parameters, locate_faults
+
+# Relay event exports (CSV or a COMTRADE summary saved as CSV) need these columns, any others are passed through
+EVENT_COLUMNS = ['bus_sheet', 'station', 'line_trace', 'fault_type', 'measured_amps']
+FEEDER_KEY = ['bus_sheet', 'station', 'line_trace']
+
+# Short names used by relay event reports
+FAULT_TYPE_ALIASES = {
+    '3PH': '3 Phase', 'ABC': '3 Phase', '3 PHASE': '3 Phase',
+    'LL': 'Line to Line', 'AB': 'Line to Line', 'BC': 'Line to Line', 'CA': 'Line to Line', 'LINE TO LINE': 'Line to Line',
+    'SLG': 'Line to Ground', 'LG': 'Line to Ground', 'AG': 'Line to Ground', 'BG': 'Line to Ground', 'CG': 'Line to Ground',
+    'LINE TO GROUND': 'Line to Ground',
+    'LLG': 'Double Line to Ground', 'DLG': 'Double Line to Ground', 'ABG': 'Double Line to Ground', 'BCG': 'Double Line to Ground',
+    'CAG': 'Double Line to Ground', 'DOUBLE LINE TO GROUND': 'Double Line to Ground'
+}
+
+def normalize_fault_type(fault_type):
+    """Map a relay event fault type ('SLG', 'BCG', 'Line to Ground', ...) to one of FAULT_TYPES, None if unknown"""
+    return FAULT_TYPE_ALIASES.get(str(fault_type).strip().upper())
+
+class FeederCache:
+    """
+    Builds each ZBus and ZLine once for the whole batch and keeps only the line_parameters dict
+    that the locator needs. Line traces are read and mapped once per file even when several busses use them.
+    """
+    def __init__(self, bus_dataframes, line_impedances, trace_dir='', choice_cache=None, interactive=True):
+        self.bus_dataframes = bus_dataframes
+        self.line_impedances = line_impedances
+        self.impedance_index = ImpedanceIndex(line_impedances)
+        self.trace_dir = trace_dir
+        self.choice_cache = choice_cache
+        self.interactive = interactive
+        self.zbus = {}
+        self.zline = {}
+        self.feeders = {}
+
+    def get_zbus(self, bus_sheet, station):
+        key = (bus_sheet, station)
+        if key not in self.zbus:
+            if bus_sheet not in self.bus_dataframes:
+                raise KeyError(f"unknown bus sheet {bus_sheet}")
+            bus_df = self.bus_dataframes[bus_sheet].reset_index(drop=True)
+            matches = bus_df[bus_df.iloc[:, 0].astype(str).str.strip() == str(station).strip()]
+            if matches.empty:
+                raise KeyError(f"unknown station {station} on {bus_sheet}")
+            self.zbus[key] = ZBus(matches.iloc[0])
+        return self.zbus[key]
+
+    def get_zline(self, line_trace):
+        if line_trace not in self.zline:
+            file_path = os.path.join(self.trace_dir, line_trace)
+            if not os.path.splitext(file_path)[1]:
+                file_path += '.xlsx'
+            # Segments stay in trace order so the locator uses the impedance profile along the feeder
+            traces = read_line_trace(file_path, group_segments=False)
+            trace_name = list(traces.keys())[0]
+            df_linetrace = map_impedances(traces[trace_name], self.line_impedances, self.impedance_index,
+                                          self.choice_cache, self.interactive, trace_name)
+            zline = ZLine(df_linetrace, trace_name, 1, 1, segments_in_order=True) #ctr and ptr not needed for fault location
+            zline.get_individual_parameters()
+            self.zline[line_trace] = zline
+        return self.zline[line_trace]
+
+    def get(self, bus_sheet, station, line_trace):
+        """line_parameters for a feeder, or the error message when the bus or trace cannot be built"""
+        key = (bus_sheet, station, line_trace)
+        if key not in self.feeders:
+            try:
+                zbus = self.get_zbus(bus_sheet, station)
+                self.feeders[key] = line_parameters(zbus, self.get_zline(line_trace))
+            except Exception as e:
+                self.feeders[key] = f"feeder error: {e}"
+        return self.feeders[key]
+
+def solve_feeder_events(params, fault_types, measured_amps):
+    """
+    Locate every event of one feeder, one vectorized solve per fault type.
+    Module level so it can be sent to a process pool.
+
+    :return: (distance in miles, calculated current in amps, number of crossings, status) arrays
+    """
+    n = len(measured_amps)
+    distance = np.full(n, np.nan)
+    current = np.full(n, np.nan)
+    crossings = np.zeros(n, dtype=int)
+    status = np.full(n, 'unknown fault type', dtype=object)
+
+    for fault_type in FAULT_TYPES:
+        mask = fault_types == fault_type
+        if not mask.any():
+            continue
+        # 4.6 kV busses have no Zo, same restriction as fault_loc_menu
+        if params['voltage_level'] == 4.6 and fault_type in ('Line to Ground', 'Double Line to Ground'):
+            status[mask] = 'no ground fault on 4.6 kV'
+            continue
+        distance[mask], current[mask], crossings[mask] = locate_faults(params, fault_type, measured_amps[mask])
+        status[mask] = np.where(crossings[mask] > 0, 'ok', 'closest point')
+
+    status[np.isnan(measured_amps)] = 'missing measured amps'
+    return distance, current, crossings, status
+
+class ResultWriter:
+    """Appends result chunks to a CSV or Parquet file so the whole batch never sits in memory"""
+    def __init__(self, out_path):
+        self.out_path = out_path
+        self.parquet = out_path.lower().endswith('.parquet')
+        self.writer = None
+        self.rows = 0
+
+    def write(self, df):
+        if self.parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Writing Parquet requires pyarrow, use a .csv output file or pip install pyarrow")
+            # Arrow has no complex type, impedance columns are written as text
+            complex_columns = df.select_dtypes(include='complex').columns
+            if len(complex_columns):
+                df = df.astype({column: str for column in complex_columns})
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.out_path, table.schema)
+            self.writer.write_table(table.cast(self.writer.schema))
+        else:
+            df.to_csv(self.out_path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+# Per process batch inputs, loaded once by init_batch_worker so the tasks only carry a feeder and its events
+_batch = {}
+
+def init_batch_worker(bus_imp_path, line_imp_path, trace_dir='', choices_path=DEFAULT_CACHE_PATH, interactive=False):
+    """Load the impedance catalogs for this process, also the pool initializer"""
+    bus_dataframes = read_impedance_sheets(bus_imp_path)
+    line_dataframes = read_clean_line_imp(line_imp_path)
+    line_impedances = line_dataframes[list(line_dataframes.keys())[0]]
+    # Workers only read saved conductor choices, they never prompt or write the shared file
+    choice_cache = ConductorChoiceCache(choices_path, read_only=not interactive) if choices_path else None
+    _batch['feeders'] = FeederCache(bus_dataframes, line_impedances, trace_dir, choice_cache, interactive)
+
+def locate_feeder_events(key, fault_types, measured_amps):
+    """
+    Locate the events of one feeder, the feeder is built on first use in this process.
+    Module level so it can be sent to a process pool.
+
+    :return: (line length in miles, distance, calculated current, crossings, status), every status
+             is the error message when the feeder cannot be built
+    """
+    params = _batch['feeders'].get(*key)
+    if isinstance(params, str):
+        n = len(measured_amps)
+        return np.nan, np.full(n, np.nan), np.full(n, np.nan), np.zeros(n, dtype=int), np.full(n, params, dtype=object)
+    return (params['line_length_mi'], *solve_feeder_events(params, fault_types, measured_amps))
+
+def locate_event_chunk(events, executor=None):
+    """
+    Locate one chunk of events. Events are grouped by (bus, line trace) so each feeder is
+    solved once, one executor task per feeder when an executor is given.
+    """
+    events = events.copy()
+    fault_types = events['fault_type'].map(normalize_fault_type).to_numpy(dtype=object)
+    measured_amps = pd.to_numeric(events['measured_amps'], errors='coerce').to_numpy(dtype=float)
+
+    events['distance_mi'] = np.nan
+    events['calc_current'] = np.nan
+    events['crossings'] = 0
+    events['line_length_mi'] = np.nan
+    events['status'] = ''
+
+    jobs = []
+    for key, idx in events.groupby(FEEDER_KEY, sort=False, dropna=False).indices.items():
+        args = (key, fault_types[idx], measured_amps[idx])
+        jobs.append((idx, executor.submit(locate_feeder_events, *args) if executor else locate_feeder_events(*args)))
+
+    for idx, job in jobs:
+        line_length, distance, current, crossings, status = job.result() if executor else job
+        events.iloc[idx, events.columns.get_loc('line_length_mi')] = line_length
+        events.iloc[idx, events.columns.get_loc('distance_mi')] = distance
+        events.iloc[idx, events.columns.get_loc('calc_current')] = current
+        events.iloc[idx, events.columns.get_loc('crossings')] = crossings
+        events.iloc[idx, events.columns.get_loc('status')] = status
+
+    return events
+
+def run_event_batch(events_path, bus_imp_path, line_imp_path, out_path, trace_dir='', chunksize=10000, workers=None,
+                    choices_path=DEFAULT_CACHE_PATH, interactive=True):
+    """
+    Stream a relay event file, locate every fault and stream the results to out_path (.csv or .parquet).
+    Without prompting the feeders are read, mapped and solved in a process pool. A worker keeps the
+    feeders it built for the later chunks, but the tasks go to whichever worker is free, so a feeder
+    in several chunks can be built once per worker.
+
+    :param trace_dir: folder holding the line trace workbooks named in the line_trace column
+    :param workers: process pool size, 1 disables the pool, None lets the pool pick. Workers cannot prompt,
+                    an interactive batch always runs in this process.
+    :param choices_path: conductor choice cache shared with the GUI, None to ignore saved choices
+    :param interactive: False never prompts, feeders without saved choices fail, see map_impedances
+    :return: number of events written
+    """
+    init_args = (bus_imp_path, line_imp_path, trace_dir, choices_path, interactive)
+    use_pool = workers != 1 and not interactive
+    # Loading in this process first also compiles the impedance catalogs, the workers then load them instead of parsing Excel
+    init_batch_worker(*init_args)
+    writer = ResultWriter(out_path)
+    executor = None
+
+    try:
+        if use_pool:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_batch_worker, initargs=init_args)
+        for events in pd.read_csv(events_path, chunksize=chunksize):
+            missing = [col for col in EVENT_COLUMNS if col not in events.columns]
+            if missing:
+                raise ValueError(f"Event file is missing columns: {', '.join(missing)}")
+            writer.write(locate_event_chunk(events, executor))
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown()
+
+    return writer.rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Locate relay event faults in bulk.')
+    parser.add_argument('events', help=f"event CSV with columns {', '.join(EVENT_COLUMNS)}")
+    parser.add_argument('--bus-imp', required=True, help='bus impedance workbook (Andy Sheets)')
+    parser.add_argument('--line-imp', required=True, help='line impedance workbook (line cleanup)')
+    parser.add_argument('--trace-dir', default='', help='folder holding the line trace workbooks')
+    parser.add_argument('--out', default='fault_locations.csv', help='output .csv or .parquet file')
+    parser.add_argument('--chunksize', type=int, default=10000, help='events read per chunk')
+    parser.add_argument('--workers', type=int, default=None, help='process pool size with --no-prompt, 1 to disable')
+    parser.add_argument('--choices', default=DEFAULT_CACHE_PATH, help='saved conductor choices file')
+    parser.add_argument('--no-prompt', action='store_true', help='never prompt, feeders with a conductor or reactor choice that was never saved fail')
+    args = parser.parse_args()
+
+    rows = run_event_batch(args.events, args.bus_imp, args.line_imp, args.out,
+                           trace_dir=args.trace_dir, chunksize=args.chunksize, workers=args.workers,
+                           choices_path=args.choices, interactive=not args.no_prompt)
+    print(f"Located {rows} events, results saved to {args.out}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# Renders a FaultLocator.FaultLocationResult onto a matplotlib Axes supplied by the caller.
+# Nothing here imports matplotlib, so the fault location math stays usable headless.
+import numpy as np
+
+PLOT_TITLES = {
+    '3 Phase': '3 Phase Fault Current vs. Distance',
+    'Line to Line': 'Line to Line Fault Current vs. Distance',
+    'Line to Ground': 'SLG Fault Current vs. Distance',
+    'Double Line to Ground': 'Double Line to Ground Fault Current vs. Distance'
+}
+
+# Curve points drawn on screen, a sweep longer than this is decimated for display only
+DISPLAY_POINTS = 2000
+
+def downsample(x, y, max_points=DISPLAY_POINTS):
+    """
+    Decimate a curve to about max_points for drawing. The min and max of each bucket are kept,
+    so reactor steps and conductor changes still show.
+
+    :return: (x, y), the inputs unchanged when they are already short enough
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if not max_points or n <= max_points:
+        return x, y
+
+    size = -(-n // (max_points // 2))
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    # nan (missing or padding) never wins, an all-nan bucket keeps its first point
+    offsets = np.arange(buckets) * size
+    i_min = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    i_max = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    keep = np.unique(np.concatenate([i_min, i_max, [0, n - 1]]))
+    return x[keep], y[keep]
+
+class FaultLocationArtists:
+    """
+    Fault location plot built once and updated in place. The curve, the measured current line and
+    the intersection annotations are kept and only get new data, so relocating for another measured
+    current never rebuilds the axes.
+
+    :param register: called with every artist that moves with the measured current, e.g.
+                     gui_utils.PlotManager.add_animated so those are blitted instead of redrawn
+    """
+    def __init__(self, ax, register=None):
+        self.ax = ax
+        self.register = register
+        self.annotations = []
+
+        self.curve, = ax.plot([], [], label='Calculated Current Amps')
+        self.measured_line = ax.axhline(0, color='r', linestyle='--', label='Measured fault current')
+        self.measured_line.set_visible(False)
+        self._register(self.measured_line)
+
+        ax.set_xlabel('Distance (miles)')
+        ax.set_ylabel('Fault Current (Amps)')
+        ax.grid(True)
+
+    def _register(self, artist):
+        if self.register is not None:
+            self.register(artist)
+        return artist
+
+    def set_curve(self, distance, current, max_points=DISPLAY_POINTS):
+        """New fault current curve, rescales the axes so the canvas needs a full draw afterwards"""
+        if distance is None:
+            self.curve.set_data([], [])
+        else:
+            self.curve.set_data(*downsample(distance, current, max_points))
+        # Hidden artists, e.g. the measured line before the first location, do not stretch the axes
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+
+    def set_measured(self, measured_mag, crossings, distance=None):
+        """
+        Move the measured current line and the intersection annotations, only these change so
+        a blit is enough while the measured current is scrubbed.
+
+        :param distance: annotated when there are no crossings, the closest point on the line
+        """
+        self.measured_line.set_ydata([measured_mag, measured_mag])
+        self.measured_line.set_visible(True)
+
+        # Annotate the point(s) of intersection, annotations are reused and hidden when not needed
+        points = crossings if len(crossings) > 0 else ([] if distance is None else [distance])
+        while len(self.annotations) < len(points):
+            annotation = self.ax.annotate('', xy=(0, 0), xytext=(0, 0), arrowprops=dict(arrowstyle='->'), fontsize=9)
+            self.annotations.append(self._register(annotation))
+
+        for annotation, crossing in zip(self.annotations, points):
+            annotation.xy = (crossing, measured_mag)
+            annotation.set_position((crossing + 0.5, measured_mag + 200))
+            annotation.set_text(f'Intersection\n({crossing:.2f} miles, {measured_mag:.0f} Amps)')
+            annotation.set_visible(True)
+        for annotation in self.annotations[len(points):]:
+            annotation.set_visible(False)
+
+    def update(self, result, title=None, max_points=DISPLAY_POINTS):
+        """Show a FaultLocationResult, the curve only when it was computed with a sweep (points > 0)"""
+        self.set_measured(result.measured_mag, result.crossings, result.distance)
+        self.set_curve(result.sweep_distance, result.sweep_current, max_points)
+        self.ax.set_title(title or PLOT_TITLES.get(result.fault_type, 'Fault Current vs. Distance'))
+        self.ax.legend()
+        return self
+
+    def clear(self):
+        """Hide everything, the artists stay for the next update"""
+        self.curve.set_data([], [])
+        self.measured_line.set_visible(False)
+        for annotation in self.annotations:
+            annotation.set_visible(False)
+        self.ax.set_title('')
+
+def plot_fault_location(ax, result, title=None):
+    """
+    Draw the fault current curve, the measured current and every intersection onto ax.
+
+    :param ax: matplotlib Axes to draw on
+    :param result: FaultLocationResult computed with a sweep (points > 0)
+    :param title: plot title, defaults to the title for the fault type
+    """
+    FaultLocationArtists(ax).update(result, title)
+    return ax
@@ -0,0 +1,290 @@
+import numpy as np
+from dataclasses import dataclass
+import FaultArrays
+from ImpedanceProfile import ImpedanceProfile
+
+# Fault type names used by the menus and the GUI fault location tab
+FAULT_TYPES = ['3 Phase', 'Line to Line', 'Line to Ground', 'Double Line to Ground']
+
+@dataclass
+class FaultLocationResult:
+    """Result of a fault location, plain arrays only so it can be produced headless and plotted later"""
+    fault_type: str
+    measured_mag: float
+    distance: float # nearest location to the station in miles
+    current: float # calculated current at distance in amps
+    crossings: np.ndarray # every distance where the calculated current equals measured_mag
+    line_length_mi: float
+    label: str = ''
+    sweep_distance: np.ndarray = None # fault current curve, only filled when a sweep is requested
+    sweep_current: np.ndarray = None
+
+def line_parameters(ZBus_obj, Zline_obj):
+    """
+    Bus impedances and line impedance profile in pu for a ZBus/ZLine pair.
+
+    :return: dict with Zpos_bus_pu, Zo_bus_pu, profile (ImpedanceProfile in pu), Zpos_line_per_mile,
+             Zo_line_per_mile (line averages), line_length_mi, Ibase, voltage_level_pu and the bus
+             voltage_level in kV (4.6 kV busses have no Zo)
+    """
+    line_length_mi = Zline_obj.total_length_miles
+    Zpos_line_pu = Zline_obj.total_Z_100MVA / 100
+    Zo_line_pu = Zline_obj.total_Zo_100MVA / 100
+
+    #calculate the line impedance per unit length
+    if line_length_mi > 0:
+        Zpos_line_per_mile = Zpos_line_pu / line_length_mi
+        Zo_line_per_mile = Zo_line_pu / line_length_mi
+    else:
+        Zpos_line_per_mile = 0j
+        Zo_line_per_mile = 0j
+
+    # Profile over the ordered segments when the ZLine has one, otherwise the same impedance per mile along the line
+    profile = getattr(Zline_obj, 'profile', None)
+    if profile is None:
+        profile = ImpedanceProfile.uniform(line_length_mi, Zline_obj.total_Z_100MVA, Zline_obj.total_Zo_100MVA)
+
+    return {
+        'Zpos_bus_pu': ZBus_obj.z_100MVA / 100,
+        'Zo_bus_pu': ZBus_obj.zo_100MVA / 100,
+        'Zpos_line_per_mile': Zpos_line_per_mile,
+        'Zo_line_per_mile': Zo_line_per_mile,
+        'profile': profile.scaled(1 / 100),
+        'line_length_mi': line_length_mi,
+        'Ibase': ZBus_obj.Ibase,
+        'voltage_level_pu': ZBus_obj.voltage_level_pu,
+        'voltage_level': ZBus_obj.voltage_level
+    }
+
+def fault_current_at(params, fault_type, distance):
+    """Fault current magnitude in amps at each distance (miles) for a line_parameters dict"""
+    Zpos_line_pu, Zo_line_pu = params['profile'].impedance_at(distance)
+    return fault_current_from_line(params, fault_type, Zpos_line_pu, Zo_line_pu)
+
+def fault_current_from_line(params, fault_type, Zpos_line_pu, Zo_line_pu):
+    """Fault current magnitude in amps for line impedances (pu, station to fault) already looked up"""
+    Zpos_total_pu = params['Zpos_bus_pu'] + Zpos_line_pu
+    Zo_total_pu = params['Zo_bus_pu'] + Zo_line_pu
+    Ibase = params['Ibase']
+    voltage_level_pu = params['voltage_level_pu']
+
+    if fault_type == '3 Phase':
+        return FaultArrays.to_amps(FaultArrays.three_ph_fault_pu(Zpos_total_pu, voltage_level_pu), Ibase)
+    elif fault_type == 'Line to Line':
+        return FaultArrays.to_amps(FaultArrays.l_l_fault_pu(Zpos_total_pu, voltage_level_pu), Ibase)
+    elif fault_type == 'Line to Ground':
+        return 3 * FaultArrays.to_amps(FaultArrays.l_g_fault_pu(Zpos_total_pu, Zo_total_pu), Ibase)
+    elif fault_type == 'Double Line to Ground':
+        I_phase = FaultArrays.l_l_g_fault_pu(Zpos_total_pu, Zo_total_pu, voltage_level_pu)
+        return FaultArrays.to_amps(I_phase[1], Ibase) #B phase
+    else:
+        raise ValueError(f"Unknown fault type: {fault_type}")
+
+def fault_current_vs_distance(ZBus_obj, Zline_obj, fault_type, distance=None, points=1000):
+    """
+    Sweep mode, fault current magnitude along the line in one array expression.
+
+    :param distance: array of distances in miles, defaults to np.linspace(0, line length, points)
+    :return: (distance, fault current in amps)
+    """
+    params = line_parameters(ZBus_obj, Zline_obj)
+    if distance is None:
+        distance = np.linspace(0, params['line_length_mi'], points)
+    distance = np.asarray(distance, dtype=float)
+    return distance, fault_current_at(params, fault_type, distance)
+
+def _bracket_grid(params, grid_points):
+    # Every segment boundary is a grid point, so a reactor step or a change of conductor is never skipped over
+    return np.union1d(np.linspace(0, params['line_length_mi'], grid_points), params['profile'].distance_mi)
+
+def _bracketed_crossings(params, fault_type, measured_mag, grid_points=64, max_iterations=60):
+    """
+    Distances where the fault current equals measured_mag, found by sampling the curve for sign
+    changes and bisecting every bracket at once.
+    """
+    line_length_mi = params['line_length_mi']
+    grid = _bracket_grid(params, grid_points)
+    f = fault_current_at(params, fault_type, grid) - measured_mag
+
+    exact = grid[f == 0]
+    idx = np.nonzero(np.sign(f[:-1]) * np.sign(f[1:]) < 0)[0]
+    lo = grid[idx]
+    hi = grid[idx + 1]
+    f_lo = f[idx]
+
+    tol = 1e-9 * max(line_length_mi, 1)
+    for _ in range(max_iterations):
+        if lo.size == 0 or np.max(hi - lo) < tol:
+            break
+        mid = (lo + hi) / 2
+        f_mid = fault_current_at(params, fault_type, mid) - measured_mag
+        same_side = np.sign(f_mid) == np.sign(f_lo)
+        lo = np.where(same_side, mid, lo)
+        f_lo = np.where(same_side, f_mid, f_lo)
+        hi = np.where(same_side, hi, mid)
+
+    return np.unique(np.concatenate([exact, (lo + hi) / 2]))
+
+def fault_crossings(params, fault_type, measured_mag):
+    """
+    Every distance (miles from the station) where the calculated fault current equals measured_mag,
+    for a line_parameters dict. 3-phase, line-to-line and line-to-ground are solved in closed form
+    on each segment of the impedance profile, double line-to-ground with a bracketed root-finder.
+
+    :return: sorted numpy array of distances, empty if the measured current is never reached on the line
+    """
+    profile = params['profile']
+    Ibase = params['Ibase']
+    voltage_level_pu = params['voltage_level_pu']
+
+    if measured_mag <= 0:
+        return np.empty(0)
+
+    if fault_type == '3 Phase':
+        c = voltage_level_pu * Ibase * 1000 / measured_mag
+        return profile.crossings(params['Zpos_bus_pu'], c)
+    elif fault_type == 'Line to Line':
+        c = (3 ** 0.5) / 2 * voltage_level_pu * Ibase * 1000 / measured_mag
+        return profile.crossings(params['Zpos_bus_pu'], c)
+    elif fault_type == 'Line to Ground':
+        c = 3 * Ibase * 1000 / measured_mag
+        Z_start = 2 * params['Zpos_bus_pu'] + params['Zo_bus_pu']
+        return profile.crossings(Z_start, c, weight_pos=2, weight_zero=1)
+    elif fault_type == 'Double Line to Ground':
+        return _bracketed_crossings(params, fault_type, measured_mag)
+    else:
+        raise ValueError(f"Unknown fault type: {fault_type}")
+
+def solve_fault_distance(ZBus_obj, Zline_obj, fault_type, measured_mag):
+    """fault_crossings for a ZBus/ZLine pair"""
+    return fault_crossings(line_parameters(ZBus_obj, Zline_obj), fault_type, measured_mag)
+
+def nearest_fault_location(params, fault_type, measured_mag):
+    """
+    locate_fault for a line_parameters dict, cheap enough to rerun while the measured current is scrubbed.
+
+    :return: (distance in miles, calculated current in amps at that distance, all crossings)
+    """
+    crossings = fault_crossings(params, fault_type, measured_mag)
+
+    if crossings.size > 0:
+        distance = crossings[0]
+    else:
+        grid = np.linspace(0, params['line_length_mi'], 1000)
+        calc_fault_current = fault_current_at(params, fault_type, grid)
+        distance = grid[np.argmin(np.abs(calc_fault_current - measured_mag))]
+
+    return distance, float(fault_current_at(params, fault_type, distance)), crossings
+
+def locate_fault(ZBus_obj, Zline_obj, fault_type, measured_mag):
+    """
+    Nearest fault location to the station for a measured fault current.
+    Falls back to the point of closest current when the measured value is never reached.
+
+    :return: (distance in miles, calculated current in amps at that distance, all crossings)
+    """
+    return nearest_fault_location(line_parameters(ZBus_obj, Zline_obj), fault_type, measured_mag)
+
+def _bracketed_first_crossings(params, fault_type, measured_mags, grid_points=64, max_iterations=60):
+    """
+    Vectorized _bracketed_crossings over an array of measured currents. The curve is sampled once
+    for the line and every event is bisected on its first bracket at the same time.
+
+    :return: (nearest crossing or nan, number of crossings) arrays
+    """
+    line_length_mi = params['line_length_mi']
+    grid = _bracket_grid(params, grid_points)
+    f = fault_current_at(params, fault_type, grid)[None, :] - measured_mags[:, None]
+
+    sign = np.sign(f)
+    bracket = (sign[:, :-1] * sign[:, 1:] < 0) | (sign[:, :-1] == 0)
+    n_crossings = bracket.sum(axis=1) + (sign[:, -1] == 0)
+    has_bracket = bracket.any(axis=1)
+    idx = np.argmax(bracket, axis=1)
+
+    lo = grid[idx]
+    hi = grid[idx + 1]
+    f_lo = f[np.arange(len(idx)), idx]
+
+    tol = 1e-9 * max(line_length_mi, 1)
+    for _ in range(max_iterations):
+        if lo.size == 0 or np.max(hi - lo) < tol:
+            break
+        mid = (lo + hi) / 2
+        f_mid = fault_current_at(params, fault_type, mid) - measured_mags
+        same_side = (np.sign(f_mid) == np.sign(f_lo)) & (f_lo != 0)
+        lo = np.where(same_side, mid, lo)
+        f_lo = np.where(same_side, f_mid, f_lo)
+        hi = np.where(same_side, hi, mid)
+
+    first = np.where(f_lo == 0, lo, (lo + hi) / 2)
+    first = np.where(has_bracket, first, np.where(sign[:, -1] == 0, line_length_mi, np.nan))
+    return first, n_crossings
+
+def locate_faults(params, fault_type, measured_mags):
+    """
+    locate_fault for many measured currents on the same line in one pass, used by batch jobs.
+
+    :param params: line_parameters dict
+    :param measured_mags: array of measured fault currents in amps
+    :return: (distance in miles, calculated current in amps, number of crossings) arrays,
+             events that never reach the measured current fall back to the closest point
+    """
+    measured_mags = np.asarray(measured_mags, dtype=float)
+    line_length_mi = params['line_length_mi']
+    profile = params['profile']
+    Ibase = params['Ibase']
+    voltage_level_pu = params['voltage_level_pu']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if fault_type == '3 Phase':
+            c = voltage_level_pu * Ibase * 1000 / measured_mags
+            distance, n_crossings = profile.first_crossings(params['Zpos_bus_pu'], c)
+        elif fault_type == 'Line to Line':
+            c = (3 ** 0.5) / 2 * voltage_level_pu * Ibase * 1000 / measured_mags
+            distance, n_crossings = profile.first_crossings(params['Zpos_bus_pu'], c)
+        elif fault_type == 'Line to Ground':
+            c = 3 * Ibase * 1000 / measured_mags
+            Z_start = 2 * params['Zpos_bus_pu'] + params['Zo_bus_pu']
+            distance, n_crossings = profile.first_crossings(Z_start, c, weight_pos=2, weight_zero=1)
+        elif fault_type == 'Double Line to Ground':
+            distance, n_crossings = _bracketed_first_crossings(params, fault_type, measured_mags)
+        else:
+            raise ValueError(f"Unknown fault type: {fault_type}")
+
+    # Same measured_mag <= 0 rule as solve_fault_distance
+    no_crossing = np.isnan(distance) | (measured_mags <= 0)
+    n_crossings = np.where(measured_mags <= 0, 0, n_crossings)
+
+    if no_crossing.any():
+        grid = np.linspace(0, line_length_mi, 1000)
+        calc_fault_current = fault_current_at(params, fault_type, grid)
+        closest = np.argmin(np.abs(calc_fault_current[None, :] - measured_mags[no_crossing, None]), axis=1)
+        distance = np.where(no_crossing, 0.0, distance)
+        distance[no_crossing] = grid[closest]
+
+    return distance, fault_current_at(params, fault_type, distance), n_crossings
+
+def compute_fault_location(ZBus_obj, Zline_obj, fault_type, measured_mag, points=1000):
+    """
+    Locate a fault without touching matplotlib.
+
+    :param points: number of points in the fault current curve, 0 or None skips the sweep for batch use
+    :return: FaultLocationResult
+    """
+    distance, current, crossings = locate_fault(ZBus_obj, Zline_obj, fault_type, measured_mag)
+
+    result = FaultLocationResult(
+        fault_type=fault_type,
+        measured_mag=measured_mag,
+        distance=float(distance),
+        current=current,
+        crossings=crossings,
+        line_length_mi=Zline_obj.total_length_miles,
+        label=getattr(Zline_obj, 'label', '')
+    )
+
+    if points:
+        result.sweep_distance, result.sweep_current = fault_current_vs_distance(ZBus_obj, Zline_obj, fault_type, points=points)
+
+    return result
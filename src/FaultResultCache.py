@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import pickle
+import weakref
+from collections import OrderedDict
+import pandas as pd
+from ConductorChoiceCache import catalog_version
+from CleanLineTrace import MATCH_KEYS, REACTOR_MATCH
+
+# On-disk entries sit next to the conductor choices and the compiled catalogs
+DEFAULT_RESULT_DIR = os.path.join(os.path.expanduser('~'), '.fault_current_calculator', 'results')
+# Bump when a cached class (ZBus, ZLine, the fault results) or its calculation changes, older entries are then never read
+CACHE_FORMAT = 1
+
+# id of a loaded impedance catalog -> (weak reference, catalog_version)
+_catalog_versions = {}
+
+def loaded_catalog_version(df_impedance):
+    """catalog_version hashed once per catalog object, a loaded catalog is never edited in place"""
+    entry = _catalog_versions.get(id(df_impedance))
+    if entry is not None and entry[0]() is df_impedance:
+        return entry[1]
+    for key in [key for key, (ref, _) in _catalog_versions.items() if ref() is None]:
+        del _catalog_versions[key]
+    version = catalog_version(df_impedance)
+    _catalog_versions[id(df_impedance)] = (weakref.ref(df_impedance), version)
+    return version
+
+def frame_key(df):
+    """Content hash of a DataFrame, any change to a value, a column or the row order gives a new key"""
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=True)
+    digest = hashlib.sha1(hashes.to_numpy().tobytes())
+    digest.update(','.join(map(str, df.columns)).encode())
+    return digest.hexdigest()[:16]
+
+def bus_key(selected_record):
+    """Content hash of a bus record (a row of a cleaned bus sheet)"""
+    values = [str(value) for value in selected_record.tolist()] + [str(index) for index in selected_record.index]
+    return hashlib.sha1(json.dumps(values).encode()).hexdigest()[:16]
+
+def trace_key(df_linetrace, df_impedance, choice_cache=None, trace_name=None):
+    """
+    Hash of an unmapped line trace, the impedance catalog it is mapped against and the saved
+    conductor and reactor choices, so a new trace, an edited catalog or a changed choice all miss the cache.
+
+    :param trace_name: name the reactor choice of the trace is saved under, see map_impedances
+    """
+    digest = hashlib.sha1(frame_key(df_linetrace).encode())
+    version = loaded_catalog_version(df_impedance)
+    digest.update(version.encode())
+
+    if choice_cache is not None:
+        # Only the choices for conductors in this trace and its reactor, choices made on other traces keep the key
+        conductors = set()
+        if all(k in df_linetrace.columns for k in MATCH_KEYS):
+            conductors = {tuple(str(v) for v in row) for row in df_linetrace[MATCH_KEYS].itertuples(index=False)}
+        reactor = [REACTOR_MATCH, str(trace_name)] if trace_name is not None else None
+        relevant = []
+        for key, choice in choice_cache.choices.items():
+            entry = json.loads(key)
+            if entry[0] == version and (tuple(entry[2:]) in conductors or entry[1:] == reactor):
+                relevant.append((key, choice))
+        digest.update(json.dumps(sorted(relevant)).encode())
+    return digest.hexdigest()[:16]
+
+def trans_key(trans_conn, trans_sec_voltage, percent_ztrans, transformer_kva, x_r_trans):
+    """Key for a transformer, the same parameters ZTrans is built from"""
+    return json.dumps([trans_conn, float(trans_sec_voltage), float(percent_ztrans), float(transformer_kva), float(x_r_trans)])
+
+class FaultResultCache:
+    """
+    Content addressed cache for the GUI calculations. Keys are tuples of the hashes above plus
+    the calculation inputs, so entries for a workbook that changed are simply never looked up again.
+    The most recent max_entries live in memory, entries put with persist=True are also pickled to
+    cache_dir and survive a restart, the least recently used files go once there are max_disk_entries.
+    """
+    def __init__(self, max_entries=128, cache_dir=DEFAULT_RESULT_DIR, max_disk_entries=256):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256(json.dumps([CACHE_FORMAT, *parts], default=str).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, *parts):
+        """Cached value for the key parts, or None"""
+        key = self.make_key(*parts)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), 'rb') as f:
+                    value = pickle.load(f)
+                os.utime(self._path(key)) # the file modification time is its recency for _evict
+                self._remember(key, value)
+                self.hits += 1
+                return value
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+                print(f"Warning: could not read cached result {self._path(key)}: {e}")
+
+        self.misses += 1
+        return None
+
+    def put(self, value, *parts, persist=False):
+        key = self.make_key(*parts)
+        self._remember(key, value)
+        if persist and self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = self._path(key) + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._path(key))
+                self._evict()
+            except (OSError, pickle.PicklingError) as e:
+                print(f"Warning: could not save cached result {self._path(key)}: {e}")
+        return value
+
+    def _evict(self):
+        """Remove the least recently used files beyond max_disk_entries"""
+        paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.pkl')]
+        if len(paths) <= self.max_disk_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass # already removed by another process
+
+    def get_or_compute(self, compute, *parts, persist=False):
+        """Cached value for the key parts, computing and storing it on a miss"""
+        value = self.get(*parts)
+        if value is None:
+            value = self.put(compute(), *parts, persist=persist)
+        return value
+
+    def clear(self, disk=False):
+        self.entries.clear()
+        if disk and self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, name))
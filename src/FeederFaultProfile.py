@@ -0,0 +1,133 @@
+import argparse
+import numpy as np
+import pandas as pd
+from FaultLocator import line_parameters, fault_current_from_line
+from FaultEventBatch import FeederCache, ResultWriter, FEEDER_KEY
+from GetExcel import read_impedance_sheets, read_clean_line_imp
+from ConductorChoiceCache import ConductorChoiceCache, DEFAULT_CACHE_PATH
+
+PROFILE_COLUMNS = ['distance_mi', 'distance_ft', 'segment', 'three_ph_fault', 'l_l_fault', 'l_g_fault', 'l_l_g_fault']
+
+def profile_distances(params, spacing_mi=None):
+    """
+    Points along the feeder in miles: every segment boundary, or every spacing_mi plus the end of the line.
+    """
+    line_length_mi = params['line_length_mi']
+    if spacing_mi:
+        return np.append(np.arange(0, line_length_mi, spacing_mi), line_length_mi)
+    return np.unique(params['profile'].distance_mi)
+
+def fault_profile(params, distance):
+    """
+    3ph, LL, SLG and LLG fault currents at each distance for a line_parameters dict.
+    The line impedance is looked up once and shared by every fault type.
+
+    :return: DataFrame with PROFILE_COLUMNS, segment is the line trace row holding the point
+    """
+    distance = np.asarray(distance, dtype=float)
+    profile = params['profile']
+    Zpos_line_pu, Zo_line_pu = profile.impedance_at(distance)
+
+    def current(fault_type):
+        return fault_current_from_line(params, fault_type, Zpos_line_pu, Zo_line_pu)
+
+    # 4.6 kV busses have no Zo, same restriction as fault_loc_menu
+    has_zero_seq = params['voltage_level'] != 4.6
+    nan = np.full(distance.shape, np.nan)
+
+    return pd.DataFrame({
+        'distance_mi': distance,
+        'distance_ft': distance * 5280,
+        'segment': profile.segment_at(distance),
+        'three_ph_fault': current('3 Phase'),
+        'l_l_fault': current('Line to Line'),
+        'l_g_fault': current('Line to Ground') if has_zero_seq else nan,
+        'l_l_g_fault': current('Double Line to Ground') if has_zero_seq else nan #B phase
+    }, columns=PROFILE_COLUMNS)
+
+def feeder_fault_profile(ZBus_obj, Zline_obj, spacing_mi=None):
+    """
+    Fault currents along a feeder fed from ZBus_obj. Build Zline_obj with segments_in_order=True
+    so the currents follow the conductors in trace order.
+
+    :param spacing_mi: None for every segment boundary, otherwise a point every spacing_mi
+    :return: DataFrame with PROFILE_COLUMNS
+    """
+    params = line_parameters(ZBus_obj, Zline_obj)
+    return fault_profile(params, profile_distances(params, spacing_mi))
+
+def write_fault_profile(params, out_path_or_writer, spacing_mi=None, chunk_points=100000, key=None):
+    """
+    Stream a feeder fault profile to a .csv/.parquet path or an open ResultWriter, chunk_points rows at a time.
+
+    :param key: dict of columns put in front of every row, e.g. the bus and line trace of the feeder
+    :return: number of rows written
+    """
+    writer = out_path_or_writer if isinstance(out_path_or_writer, ResultWriter) else ResultWriter(out_path_or_writer)
+    distance = profile_distances(params, spacing_mi)
+    rows = 0
+    try:
+        for start in range(0, len(distance), chunk_points):
+            df = fault_profile(params, distance[start:start + chunk_points])
+            for position, (column, value) in enumerate((key or {}).items()):
+                df.insert(position, column, value)
+            writer.write(df)
+            rows += len(df)
+    finally:
+        if writer is not out_path_or_writer:
+            writer.close()
+    return rows
+
+def run_profile_batch(feeders_path, bus_imp_path, line_imp_path, out_path, trace_dir='', spacing_mi=None,
+                      choices_path=DEFAULT_CACHE_PATH, interactive=True):
+    """
+    Fault profile of every feeder in a CSV with bus_sheet, station and line_trace columns, all in one output file.
+
+    :return: (rows written, list of feeder error messages)
+    """
+    feeders = pd.read_csv(feeders_path)
+    missing = [col for col in FEEDER_KEY if col not in feeders.columns]
+    if missing:
+        raise ValueError(f"Feeder file is missing columns: {', '.join(missing)}")
+
+    bus_dataframes = read_impedance_sheets(bus_imp_path)
+    line_dataframes = read_clean_line_imp(line_imp_path)
+    line_impedances = line_dataframes[list(line_dataframes.keys())[0]]
+    choice_cache = ConductorChoiceCache(choices_path) if choices_path else None
+    cache = FeederCache(bus_dataframes, line_impedances, trace_dir, choice_cache, interactive)
+
+    writer = ResultWriter(out_path)
+    errors = []
+    try:
+        for key in feeders[FEEDER_KEY].drop_duplicates().itertuples(index=False):
+            params = cache.get(*key)
+            if isinstance(params, str):
+                errors.append(f"{', '.join(map(str, key))}: {params}")
+                continue
+            write_fault_profile(params, writer, spacing_mi, key=dict(zip(FEEDER_KEY, key)))
+    finally:
+        writer.close()
+
+    return writer.rows, errors
+
+def main():
+    parser = argparse.ArgumentParser(description='Fault currents along feeders, at every segment boundary or a fixed spacing.')
+    parser.add_argument('feeders', help=f"CSV with columns {', '.join(FEEDER_KEY)}")
+    parser.add_argument('--bus-imp', required=True, help='bus impedance workbook (Andy Sheets)')
+    parser.add_argument('--line-imp', required=True, help='line impedance workbook (line cleanup)')
+    parser.add_argument('--trace-dir', default='', help='folder holding the line trace workbooks')
+    parser.add_argument('--spacing-ft', type=float, default=None, help='point spacing in feet, default every segment boundary')
+    parser.add_argument('--out', default='fault_profiles.csv', help='output .csv or .parquet file')
+    parser.add_argument('--choices', default=DEFAULT_CACHE_PATH, help='saved conductor choices file')
+    parser.add_argument('--no-prompt', action='store_true', help='never prompt, feeders with a conductor or reactor choice that was never saved fail')
+    args = parser.parse_args()
+
+    spacing_mi = args.spacing_ft / 5280 if args.spacing_ft else None
+    rows, errors = run_profile_batch(args.feeders, args.bus_imp, args.line_imp, args.out, trace_dir=args.trace_dir,
+                                     spacing_mi=spacing_mi, choices_path=args.choices, interactive=not args.no_prompt)
+    for error in errors:
+        print(f"Warning: {error}")
+    print(f"Wrote {rows} profile points to {args.out}")
+
+if __name__ == '__main__':
+    main()
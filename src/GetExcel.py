@@ -5,29 +5,113 @@ from ExcelToDataframe import excel_to_dataframes
 from CleanDataframe import clean_dataframe
 from CleanLineTrace import clean_line_trace
 import pandas as pd
+from ImpedanceCatalog import cached_workbook
 
-def load_impedance_sheets():
-    # Hardcoded file path
-    hardcoded_path = r'C:\Users\51192\OneDrive - FirstEnergy Corp\Documents\Python\Updated Copy of Bus Z Calcs(Andy Sheets) 2.16.17.xlsx'
+def read_impedance_sheets(file_path, use_catalog=True):
+    """
+    Read and clean the bus impedance workbook without prompting.
+    Loads the compiled catalog when it matches the workbook, Excel is only parsed after the workbook changes.
+    """
+    if use_catalog:
+        return cached_workbook(file_path, 'bus', lambda path: read_impedance_sheets(path, use_catalog=False))
 
-    # Check if the file exists at the hardcoded path
-    if os.path.exists(hardcoded_path):
-        file_path = hardcoded_path
+    dataframes = excel_to_dataframes(file_path)
+    return clean_dataframe(dataframes)
+
+def read_clean_line_imp(file_path, use_catalog=True):
+    """Read the line impedance workbook without prompting, through the compiled catalog like read_impedance_sheets"""
+    if use_catalog:
+        return cached_workbook(file_path, 'line', lambda path: read_clean_line_imp(path, use_catalog=False))
+
+    # Only the first sheet is used by the callers
+    dataframes = excel_to_dataframes(file_path, sheet_names=[0])
+
+    for sheet_name, df in dataframes.items():
+
+        # Set the column names to be the first row in the DataFrame
+        df = df.rename(columns=df.iloc[0]).drop(df.index[0])
+
+        # Reset index to renumber rows
+        df = df.reset_index(drop=True)
+
+        # Convert the 'Voltage_Level' column to numeric (float64)
+        df['Voltage_Level'] = pd.to_numeric(df['Voltage_Level'], errors='coerce')
+
+        dataframes[sheet_name] = df
+
+    return dataframes
+
+def read_line_trace(file_path, group_segments=True):
+    """
+    Read and clean a GISView line trace without prompting.
+    The returned dictionary is keyed by the Excel file name, which also sets the voltage level.
+
+    :param group_segments: passed to clean_line_trace, False keeps the segments in trace order
+    """
+    # Extract the Excel file name (without extension) to use as the new sheet name
+    new_sheet_name = os.path.splitext(os.path.basename(file_path))[0]
+
+    # GISView exports can be large, only the first sheet is read and calamine is used when installed
+    dataframes = excel_to_dataframes(file_path, sheet_names=[0], engine='auto')
+    dataframes = clean_line_trace(dataframes, group_segments)
+
+    # Rename the key in the dictionary to match the Excel file name
+    first_sheet_name = list(dataframes.keys())[0]
+    dataframes[new_sheet_name] = dataframes.pop(first_sheet_name)
+    
+    # Add voltage level column to line trace
+    voltage_map = {'R': 36.0, 'L': 13.2, 'V': 11.5, 'H': 4.6}
+    first_letter = new_sheet_name[0]
+    voltage_level = voltage_map.get(first_letter, None)
+    if voltage_level is not None:
+        dataframes[new_sheet_name]['Voltage_Level'] = voltage_level 
     else:
+        print("Warning: Unrecognized line trace sheet name. Cannot determine voltage level. Line trace .xls file name should start with the line name, i.e R-21-MF-G-X.")
+
+    return dataframes
+
+# Default workbook locations, the file dialog is only shown when they do not exist
+IMPEDANCE_SHEETS_PATH = r'C:\Users\51192\OneDrive - FirstEnergy Corp\Documents\Python\Updated Copy of Bus Z Calcs(Andy Sheets) 2.16.17.xlsx'
+CLEAN_LINE_IMP_PATH = r'C:\Users\51192\OneDrive - FirstEnergy Corp\Documents\Python\line cleanup.xlsx'
+
+def ask_excel_path(title, hardcoded_path=None, parent=None):
+    """
+    Workbook path from the hardcoded location or a file dialog, '' when nothing is selected.
+    Only picks the file so the GUI can read it off the Tk main thread.
+
+    :param parent: Tk window owning the dialog, a hidden root is created when None
+    """
+    # Check if the file exists at the hardcoded path
+    if hardcoded_path and os.path.exists(hardcoded_path):
+        return hardcoded_path
+
+    if parent is None:
         # Create a tkinter root window (it won't be shown)
         root = tk.Tk()
         root.withdraw()
 
-        # Prompt the user to select a file using a file dialog
-        file_path = filedialog.askopenfilename(
-            title='Load Impedance Sheets (Andy Sheets)',
-            filetypes=(('Excel files', '*.xlsx'), ('All files', '*.*'))
-        )
+    # Prompt the user to select a file using a file dialog
+    return filedialog.askopenfilename(
+        parent=parent,
+        title=title,
+        filetypes=(('Excel files', '*.xlsx'), ('All files', '*.*'))
+    )
+
+def ask_impedance_sheets_path(parent=None):
+    return ask_excel_path('Load Impedance Sheets (Andy Sheets)', IMPEDANCE_SHEETS_PATH, parent)
+
+def ask_clean_line_imp_path(parent=None):
+    return ask_excel_path('Load Clean Line Impedances', CLEAN_LINE_IMP_PATH, parent)
+
+def ask_line_trace_path(parent=None):
+    return ask_excel_path('Load Line Trace', None, parent)
+
+def load_impedance_sheets():
+    file_path = ask_impedance_sheets_path()
     
     # If a file is selected (either from hardcoded path or user), read and clean the sheets
     if file_path:
-        dataframes = excel_to_dataframes(file_path)
-        dataframes = clean_dataframe(dataframes)
+        dataframes = read_impedance_sheets(file_path)
 
         #KEEP FOR DEBUGGING
         #for sheet_name, df in dataframes.items():
@@ -41,39 +125,11 @@ def load_impedance_sheets():
     return dataframes
 
 def load_clean_line_imp():
-     # Hardcoded file path
-    hardcoded_path = r'C:\Users\51192\OneDrive - FirstEnergy Corp\Documents\Python\line cleanup.xlsx'
-
-    # Check if the file exists at the hardcoded path
-    if os.path.exists(hardcoded_path):
-        file_path = hardcoded_path
-    else:
-        # Create a tkinter root window (it won't be shown)
-        root = tk.Tk()
-        root.withdraw()
-
-        # Prompt the user to select a file using a file dialog
-        file_path = filedialog.askopenfilename(
-            title='Load Clean Line Impedances',
-            filetypes=(('Excel files', '*.xlsx'), ('All files', '*.*'))
-        )
+    file_path = ask_clean_line_imp_path()
     
     # If a file is selected (either from hardcoded path or user), read and clean the sheets
     if file_path:
-        dataframes = excel_to_dataframes(file_path)
-
-        for sheet_name, df in dataframes.items():
-
-            # Set the column names to be the first row in the DataFrame
-            df = df.rename(columns=df.iloc[0]).drop(df.index[0])
-
-            # Reset index to renumber rows
-            df = df.reset_index(drop=True)
-
-            # Convert the 'Voltage_Level' column to numeric (float64)
-            df['Voltage_Level'] = pd.to_numeric(df['Voltage_Level'], errors='coerce')
-
-            dataframes[sheet_name] = df
+        dataframes = read_clean_line_imp(file_path)
 
         #KEEP FOR DEBUGGING
         #for sheet_name, df in dataframes.items():
@@ -88,32 +144,10 @@ def load_clean_line_imp():
 
 def load_line_trace():
     try:
-        root = tk.Tk()
-        root.withdraw()
-        file_path = filedialog.askopenfilename(
-            title='Load Line Trace',
-            filetypes=(('Excel files', '*.xlsx'), ('All files', '*.*'))
-        )
+        file_path = ask_line_trace_path()
 
         if file_path:
-            # Extract the Excel file name (without extension) to use as the new sheet name
-            new_sheet_name = os.path.splitext(os.path.basename(file_path))[0]
-
-            dataframes = excel_to_dataframes(file_path)
-            dataframes = clean_line_trace(dataframes)
-
-            # Rename the key in the dictionary to match the Excel file name
-            first_sheet_name = list(dataframes.keys())[0]
-            dataframes[new_sheet_name] = dataframes.pop(first_sheet_name)
-            
-            # Add voltage level column to line trace
-            voltage_map = {'R': 36.0, 'L': 13.2, 'V': 11.5, 'H': 4.6}
-            first_letter = new_sheet_name[0]
-            voltage_level = voltage_map.get(first_letter, None)
-            if voltage_level is not None:
-                dataframes[new_sheet_name]['Voltage_Level'] = voltage_level 
-            else:
-                print("Warning: Unrecognized line trace sheet name. Cannot determine voltage level. Line trace .xls file name should start with the line name, i.e R-21-MF-G-X.")
+            dataframes = read_line_trace(file_path)
         else:
             print('No file was selected.')
             dataframes = None  # Return None if no file is selected  
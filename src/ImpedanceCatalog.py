@@ -0,0 +1,202 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Compiled catalogs are kept per user, one folder per workbook kind, workbook content hash and versions
+CATALOG_DIR = os.path.join(os.path.expanduser('~'), '.fault_current_calculator', 'catalog')
+CATALOG_FORMAT = 1
+# Bump a kind when its GetExcel reader or the cleaning it calls changes, the old compiled catalogs are then never loaded
+READER_VERSIONS = {'bus': 1, 'line': 1}
+
+# Cell type codes, the cleaned sheets mix strings, ints, floats, complex numbers and None in one column
+NONE, FLOAT, INT, COMPLEX, STR, BOOL, OTHER = range(7)
+PARTS = ['codes', 'real', 'imag', 'text']
+
+def file_hash(file_path):
+    """sha256 of a file, used to tell when the source workbook changed"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cell_code(value):
+    if isinstance(value, (bool, np.bool_)):
+        return BOOL
+    if isinstance(value, (int, np.integer)):
+        return INT
+    if isinstance(value, (float, np.floating)):
+        return FLOAT
+    if isinstance(value, (complex, np.complexfloating)):
+        return COMPLEX
+    if isinstance(value, str):
+        return STR
+    if value is None or pd.isna(value):
+        return NONE
+    return OTHER
+
+def encode_sheet(df):
+    """
+    Encode a DataFrame into fixed width arrays that can be saved as .npy and memory-mapped.
+
+    :return: dict of codes (int8), real and imag (float64) and text (unicode) arrays, each rows x columns
+    """
+    values = df.to_numpy(dtype=object)
+    codes = np.vectorize(_cell_code, otypes=[np.int8])(values) if values.size else np.zeros(values.shape, dtype=np.int8)
+    real = np.zeros(values.shape)
+    imag = np.zeros(values.shape)
+    text = np.full(values.shape, '', dtype=object)
+
+    numeric = (codes == FLOAT) | (codes == INT) | (codes == BOOL)
+    real[numeric] = values[numeric].astype(float)
+    is_complex = codes == COMPLEX
+    if is_complex.any():
+        complex_values = values[is_complex].astype(complex)
+        real[is_complex] = complex_values.real
+        imag[is_complex] = complex_values.imag
+    is_text = (codes == STR) | (codes == OTHER)
+    text[is_text] = [str(value) for value in values[is_text]]
+
+    return {'codes': codes, 'real': real, 'imag': imag, 'text': text.astype(str) if text.size else np.empty(values.shape, dtype='U1')}
+
+def decode_sheet(parts, columns, dtypes):
+    """Rebuild the DataFrame written by encode_sheet, cells come back as the same Python types"""
+    codes = np.asarray(parts['codes'])
+    out = np.empty(codes.shape, dtype=object)
+
+    for code, convert in ((FLOAT, lambda m: parts['real'][m].tolist()),
+                          (INT, lambda m: parts['real'][m].astype(np.int64).tolist()),
+                          (BOOL, lambda m: parts['real'][m].astype(bool).tolist()),
+                          (COMPLEX, lambda m: (parts['real'][m] + 1j * parts['imag'][m]).tolist()),
+                          (STR, lambda m: parts['text'][m].tolist()),
+                          (OTHER, lambda m: parts['text'][m].tolist())):
+        mask = codes == code
+        if mask.any():
+            out[mask] = convert(mask)
+
+    # Cast by position first, the cleaned sheets repeat some column names
+    df = pd.DataFrame(out)
+    df = df.astype({position: dtype for position, dtype in enumerate(dtypes) if dtype != 'object'})
+    df.columns = pd.Index(columns, dtype=object)
+    return df
+
+def compile_catalog(dataframes, store_dir, source_hash='', replace=False):
+    """
+    Write a dictionary of cleaned DataFrames to store_dir as .npy files plus a manifest.json
+    holding the sheet layout, the source workbook hash and a hash of the compiled content.
+    The files go to a folder of this process first, so processes compiling the same workbook at
+    once never touch each other's files.
+
+    :param replace: True replaces a complete store, otherwise one compiled meanwhile by another process is kept
+    """
+    parent_dir = os.path.dirname(store_dir)
+    os.makedirs(parent_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent_dir, prefix=os.path.basename(store_dir) + '.')
+    try:
+        manifest = _write_catalog(dataframes, tmp_dir, source_hash)
+        if not replace and os.path.exists(os.path.join(store_dir, 'manifest.json')):
+            return manifest # same workbook and versions, so the same content
+        shutil.rmtree(store_dir, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, store_dir)
+        except OSError:
+            # Another process moved its store in between, keep it
+            if not os.path.exists(os.path.join(store_dir, 'manifest.json')):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest
+
+def _write_catalog(dataframes, tmp_dir, source_hash):
+    content = hashlib.sha256()
+    sheets = []
+    for position, (sheet_name, df) in enumerate(dataframes.items()):
+        parts = encode_sheet(df)
+        for part in PARTS:
+            np.save(os.path.join(tmp_dir, f'{position}_{part}.npy'), parts[part])
+            content.update(parts[part].tobytes())
+        sheets.append({
+            'name': sheet_name,
+            'columns': [None if pd.isna(c) else c for c in df.columns] if len(df.columns) else [],
+            'dtypes': [str(dtype) for dtype in df.dtypes]
+        })
+
+    manifest = {'format': CATALOG_FORMAT, 'source_hash': source_hash, 'content_hash': content.hexdigest(), 'sheets': sheets}
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, default=str)
+    return manifest
+
+def read_manifest(store_dir):
+    with open(os.path.join(store_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_catalog(store_dir, mmap_mode='r'):
+    """
+    Load a compiled catalog. The arrays are memory-mapped while they are decoded, the DataFrames
+    are then ordinary copies in this process, so each process saves the Excel parsing, not the memory.
+
+    :return: dict of DataFrames keyed by sheet name, same as the Excel readers
+    """
+    manifest = read_manifest(store_dir)
+    if manifest.get('format') != CATALOG_FORMAT:
+        raise ValueError(f"Unsupported catalog format in {store_dir}")
+
+    dataframes = {}
+    for position, sheet in enumerate(manifest['sheets']):
+        parts = {part: np.load(os.path.join(store_dir, f'{position}_{part}.npy'), mmap_mode=mmap_mode) for part in PARTS}
+        dataframes[sheet['name']] = decode_sheet(parts, sheet['columns'], sheet['dtypes'])
+    return dataframes
+
+def catalog_path(file_path, kind, source_hash=None):
+    """
+    Store folder for a workbook, named by kind ('bus' or 'line'), the workbook content hash,
+    CATALOG_FORMAT and the reader version of the kind
+    """
+    source_hash = source_hash or file_hash(file_path)
+    return os.path.join(CATALOG_DIR, f'{kind}-{source_hash[:16]}-{CATALOG_FORMAT}.{READER_VERSIONS.get(kind, 0)}')
+
+def cached_workbook(file_path, kind, reader):
+    """
+    Cleaned workbook DataFrames from the compiled catalog when it matches the workbook,
+    otherwise read them with reader(file_path) and compile them for the next run.
+    """
+    source_hash = file_hash(file_path)
+    store_dir = catalog_path(file_path, kind, source_hash)
+
+    broken = False
+    if os.path.exists(os.path.join(store_dir, 'manifest.json')):
+        try:
+            return load_catalog(store_dir)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: compiled catalog {store_dir} could not be loaded, reading Excel instead: {e}")
+            broken = True
+
+    dataframes = reader(file_path)
+    try:
+        compile_catalog(dataframes, store_dir, source_hash, replace=broken)
+    except OSError as e:
+        print(f"Warning: could not compile catalog for {file_path}: {e}")
+    return dataframes
+
+def main():
+    # Imported here, GetExcel uses this module
+    from GetExcel import read_impedance_sheets, read_clean_line_imp
+
+    parser = argparse.ArgumentParser(description='Compile impedance workbooks into the binary catalog.')
+    parser.add_argument('--bus-imp', help='bus impedance workbook (Andy Sheets)')
+    parser.add_argument('--line-imp', help='line impedance workbook (line cleanup)')
+    args = parser.parse_args()
+
+    for file_path, kind, reader in ((args.bus_imp, 'bus', read_impedance_sheets), (args.line_imp, 'line', read_clean_line_imp)):
+        if file_path:
+            store_dir = catalog_path(file_path, kind)
+            manifest = compile_catalog(reader(file_path, use_catalog=False), store_dir, file_hash(file_path), replace=True)
+            print(f"Compiled {file_path} to {store_dir} ({manifest['content_hash'][:16]})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import numpy as np
+
+class ImpedanceProfile:
+    """
+    Cumulative impedance from the station along a line, stored at every segment boundary.
+    Impedance is linear in distance inside a segment, reactors are zero length segments so they
+    show up as a step at their position. Lookups are binary searches over the boundary distances.
+    """
+    def __init__(self, distance_mi, Z1, Z0):
+        self.distance_mi = np.asarray(distance_mi, dtype=float)
+        self.Z1 = np.asarray(Z1, dtype=complex)
+        self.Z0 = np.asarray(Z0, dtype=complex)
+
+    @classmethod
+    def from_segments(cls, length_feet, Z1_segments, Z0_segments):
+        """Profile from per segment lengths (feet) and impedances, in line trace order"""
+        distance_mi = np.concatenate([[0.0], np.cumsum(np.asarray(length_feet, dtype=float)) / 5280])
+        Z1 = np.concatenate([[0j], np.cumsum(np.asarray(Z1_segments, dtype=complex))])
+        Z0 = np.concatenate([[0j], np.cumsum(np.asarray(Z0_segments, dtype=complex))])
+        return cls(distance_mi, Z1, Z0)
+
+    @classmethod
+    def uniform(cls, length_mi, Z1_total, Z0_total):
+        """Single segment profile, the same impedance per mile along the whole line"""
+        return cls([0.0, length_mi], [0j, Z1_total], [0j, Z0_total])
+
+    @property
+    def length_mi(self):
+        return self.distance_mi[-1]
+
+    def scaled(self, factor):
+        """Same profile with the impedances multiplied by factor, e.g. 1/100 for % to pu"""
+        return ImpedanceProfile(self.distance_mi, self.Z1 * factor, self.Z0 * factor)
+
+    def _locate(self, distance_mi):
+        # Last boundary at or before each distance, so a reactor applies from its position onwards
+        d = np.clip(np.asarray(distance_mi, dtype=float), 0, self.length_mi)
+        last = len(self.distance_mi) - 1
+        i = np.clip(np.searchsorted(self.distance_mi, d, side='right') - 1, 0, last)
+        nxt = np.minimum(i + 1, last)
+        seg_len = self.distance_mi[nxt] - self.distance_mi[i]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frac = np.where(seg_len > 0, (d - self.distance_mi[i]) / seg_len, 0.0)
+        return i, nxt, frac
+
+    def segment_at(self, distance_mi):
+        """Index of the segment holding each distance, a boundary belongs to the segment starting there"""
+        i, _, _ = self._locate(distance_mi)
+        return np.minimum(i, len(self.distance_mi) - 2)
+
+    def impedance_at(self, distance_mi):
+        """(Z1, Z0) from the station to each distance in miles"""
+        i, nxt, frac = self._locate(distance_mi)
+        Z1 = self.Z1[i] + frac * (self.Z1[nxt] - self.Z1[i])
+        Z0 = self.Z0[i] + frac * (self.Z0[nxt] - self.Z0[i])
+        return Z1, Z0
+
+    def _segment_roots(self, Z_start, c, weight_pos, weight_zero):
+        """
+        Roots of |Z_start + weight_pos * Z1(d) + weight_zero * Z0(d)| == c on every segment.
+
+        :param c: scalar or array of target magnitudes, one row of results per value
+        :return: (distance, valid) arrays shaped (len(c), segments, 2)
+        """
+        Z = Z_start + weight_pos * self.Z1 + weight_zero * self.Z0
+        Za = Z[:-1]
+        dZ = Z[1:] - Z[:-1]
+        c = np.atleast_1d(np.asarray(c, dtype=float))[:, None]
+
+        a = np.abs(dZ) ** 2
+        b = 2 * (Za.real * dZ.real + Za.imag * dZ.imag)
+        c0 = np.abs(Za) ** 2 - c ** 2
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            disc = b ** 2 - 4 * a * c0
+            sqrt_disc = np.sqrt(disc)
+            t = np.stack([(-b - sqrt_disc) / (2 * a), (-b + sqrt_disc) / (2 * a)], axis=-1)
+
+        # Half open [0, 1) per segment so a root on a boundary is only counted once, the end of the line closes the last one
+        tol = 1e-9
+        last = np.zeros(a.shape, dtype=bool)
+        last[-1] = True
+        upper = np.where(last, 1 + tol, 1 - tol)[None, :, None]
+        valid = (a > 0)[None, :, None] & (disc >= 0)[..., None] & (t >= -tol) & (t < upper)
+        valid[..., 1] &= (disc > 0) # a double root is one crossing
+
+        t = np.clip(np.nan_to_num(t), 0, 1)
+        seg_len = (self.distance_mi[1:] - self.distance_mi[:-1])[None, :, None]
+        distance = self.distance_mi[:-1][None, :, None] + t * seg_len
+        return distance, valid
+
+    def crossings(self, Z_start, c, weight_pos=1, weight_zero=0):
+        """Sorted distances where |Z_start + weight_pos * Z1(d) + weight_zero * Z0(d)| == c"""
+        distance, valid = self._segment_roots(Z_start, c, weight_pos, weight_zero)
+        return np.unique(distance[0][valid[0]])
+
+    def first_crossings(self, Z_start, c, weight_pos=1, weight_zero=0):
+        """
+        crossings for an array of magnitudes at once.
+
+        :return: (nearest crossing or nan, number of crossings) arrays, one per value of c
+        """
+        distance, valid = self._segment_roots(Z_start, c, weight_pos, weight_zero)
+        distance = distance.reshape(distance.shape[0], -1)
+        valid = valid.reshape(valid.shape[0], -1)
+        first = np.where(valid, distance, np.inf).min(axis=1)
+        return np.where(np.isfinite(first), first, np.nan), valid.sum(axis=1)
+
+    def distance_at(self, z_mag):
+        """
+        Distance in miles where |Z1| from the station first reaches z_mag, nan when it never does.
+        A binary search over |Z1| at the boundaries finds the segment, |Z1| is convex inside a
+        segment so the crossing is the larger root of a single quadratic there.
+        """
+        c = np.atleast_1d(np.asarray(z_mag, dtype=float))
+        # Running maximum keeps the boundary magnitudes sorted, the first boundary reaching c is the same.
+        # The tolerance lets the magnitude of the end of the line find the end despite rounding.
+        reach = np.maximum.accumulate(np.abs(self.Z1))
+        j = np.searchsorted(reach, c * (1 - 1e-9), side='left')
+        found = j < len(reach)
+        j = np.clip(j, 1, len(reach) - 1)
+
+        Za = self.Z1[j - 1]
+        dZ = self.Z1[j] - Za
+        a = np.abs(dZ) ** 2
+        b = 2 * (Za.real * dZ.real + Za.imag * dZ.imag)
+        c0 = np.abs(Za) ** 2 - c ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (-b + np.sqrt(np.maximum(b ** 2 - 4 * a * c0, 0))) / (2 * a)
+        t = np.clip(np.nan_to_num(t), 0, 1)
+
+        distance = self.distance_mi[j - 1] + t * (self.distance_mi[j] - self.distance_mi[j - 1])
+        distance = np.where(found, distance, np.nan)
+        distance[c <= reach[0]] = self.distance_mi[0]
+        return distance if np.ndim(z_mag) else distance[0]
@@ -0,0 +1,138 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+# Inverse time overcurrent curves, operate time = TD * (A / (M**p - 1) + B) above pickup (M > 1)
+# and reset time = TD * tr / (1 - M**2) below it (M < 1). Values are (A, B, p, tr).
+CURVES = {
+    # SEL U.S. curves
+    'U1': (0.0104, 0.0226, 0.02, 1.08), # moderately inverse
+    'U2': (5.95, 0.180, 2, 5.95), # inverse
+    'U3': (3.88, 0.0963, 2, 3.88), # very inverse
+    'U4': (5.67, 0.0352, 2, 5.67), # extremely inverse
+    'U5': (0.00342, 0.00262, 0.02, 0.323), # short time inverse
+    # SEL IEC curves (IEC 60255-151)
+    'C1': (0.14, 0, 0.02, 13.5), # standard inverse
+    'C2': (13.5, 0, 1, 47.3), # very inverse
+    'C3': (80, 0, 2, 80), # extremely inverse
+    'C4': (120, 0, 1, 120), # long time inverse
+    'C5': (0.05, 0, 0.04, 4.85), # short time inverse
+    # IEEE C37.112
+    'IEEE MI': (0.0515, 0.114, 0.02, 4.85), # moderately inverse
+    'IEEE VI': (19.61, 0.491, 2, 21.6), # very inverse
+    'IEEE EI': (28.2, 0.1217, 2, 29.1) # extremely inverse
+}
+CURVE_NAMES = list(CURVES)
+
+# Relay settings for tcc_table and the TCC export, one row per relay
+RELAY_COLUMNS = ['name', 'curve', 'td', 'tap', 'ctr']
+
+CYCLES_PER_SECOND = 60
+
+def curve_constants(curve):
+    """
+    Constants for a curve name or an array of curve names.
+
+    :return: (A, B, p, tr), floats or arrays shaped like curve
+    """
+    names = np.asarray(curve, dtype=object)
+    unknown = sorted({str(name) for name in names.ravel() if name not in CURVES})
+    if unknown:
+        raise ValueError(f"Unknown curve: {', '.join(unknown)}, use one of {', '.join(CURVE_NAMES)}")
+    if names.ndim == 0:
+        return CURVES[names.item()]
+    table = np.array([CURVES[name] for name in names.ravel()], dtype=float).reshape(names.shape + (4,))
+    return table[..., 0], table[..., 1], table[..., 2], table[..., 3]
+
+def multiple_of_pickup(pri_current, tap, ctr):
+    """M, primary current over the primary pickup (tap * CT ratio), broadcast over arrays"""
+    return np.asarray(pri_current, dtype=float) / (np.asarray(tap, dtype=float) * np.asarray(ctr, dtype=float))
+
+def operate_time(curve, M, td=1):
+    """
+    Operate time in seconds, broadcast over curve names, M and time dials.
+    The relay never operates at or below pickup, those entries are nan.
+    """
+    A, B, p, _ = curve_constants(curve)
+    M = np.asarray(M, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        time = td * (A / (M ** p - 1) + B)
+    return np.where(M > 1, time, np.nan)
+
+def reset_time(curve, M, td=1):
+    """
+    Electromechanical reset time in seconds, broadcast like operate_time.
+    Only defined below pickup, entries at or above it are nan.
+    """
+    _, _, _, tr = curve_constants(curve)
+    M = np.asarray(M, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        time = td * tr / (1 - M ** 2)
+    return np.where(M < 1, time, np.nan)
+
+def tcc_currents(relays, points=1000, i_min=None, i_max=None):
+    """
+    Log spaced primary currents for a TCC, by default from the lowest pickup to 100 times the highest.
+
+    :param relays: DataFrame with RELAY_COLUMNS
+    """
+    pickups = relays['tap'].to_numpy(dtype=float) * relays['ctr'].to_numpy(dtype=float)
+    i_min = i_min or pickups.min()
+    i_max = i_max or 100 * pickups.max()
+    return np.logspace(np.log10(i_min), np.log10(i_max), points)
+
+def relay_operate_times(relays, currents):
+    """
+    Operate time of every relay at every primary current in one broadcast expression.
+
+    :param relays: DataFrame with RELAY_COLUMNS
+    :param currents: primary currents in amps
+    :return: array shaped (relays, currents), nan where a relay does not pick up
+    """
+    curve = relays['curve'].to_numpy(dtype=object)[:, None]
+    td = relays['td'].to_numpy(dtype=float)[:, None]
+    M = multiple_of_pickup(np.asarray(currents, dtype=float)[None, :],
+                           relays['tap'].to_numpy(dtype=float)[:, None], relays['ctr'].to_numpy(dtype=float)[:, None])
+    return operate_time(curve, M, td)
+
+def tcc_table(relays, currents=None, points=1000, i_min=None, i_max=None):
+    """
+    Time-current table, one row per primary current and one operate time column (seconds) per relay.
+
+    :param currents: primary currents in amps, defaults to tcc_currents(relays, points, i_min, i_max)
+    """
+    missing = [col for col in RELAY_COLUMNS if col not in relays.columns]
+    if missing:
+        raise ValueError(f"Relay settings are missing columns: {', '.join(missing)}")
+    if currents is None:
+        currents = tcc_currents(relays, points, i_min, i_max)
+
+    times = relay_operate_times(relays, currents)
+    table = pd.DataFrame(times.T, columns=relays['name'].astype(str).tolist())
+    table.insert(0, 'current_A', currents)
+    return table
+
+def export_tcc(relays, out_path, currents=None, points=1000, i_min=None, i_max=None):
+    """Write tcc_table to a .csv or .xlsx file, relays that do not pick up leave the cell empty"""
+    table = tcc_table(relays, currents, points, i_min, i_max)
+    if out_path.lower().endswith('.xlsx'):
+        table.to_excel(out_path, index=False, sheet_name='TCC')
+    else:
+        table.to_csv(out_path, index=False)
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description='Time-current table of inverse time overcurrent relays.')
+    parser.add_argument('relays', help=f"CSV with columns {', '.join(RELAY_COLUMNS)}")
+    parser.add_argument('--out', default='tcc.csv', help='output .csv or .xlsx file')
+    parser.add_argument('--points', type=int, default=1000, help='number of currents in the table')
+    parser.add_argument('--i-min', type=float, default=None, help='lowest primary current, default the lowest pickup')
+    parser.add_argument('--i-max', type=float, default=None, help='highest primary current, default 100 x the highest pickup')
+    args = parser.parse_args()
+
+    relays = pd.read_csv(args.relays)
+    table = export_tcc(relays, args.out, points=args.points, i_min=args.i_min, i_max=args.i_max)
+    print(f"Wrote {len(table)} currents x {len(relays)} relays to {args.out}")
+
+if __name__ == '__main__':
+    main()
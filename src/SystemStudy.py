@@ -0,0 +1,127 @@
+import argparse
+import glob
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from Classes import BusFaultBatch, ZLine
+from GetExcel import read_impedance_sheets, read_clean_line_imp, read_line_trace
+from CleanLineTrace import map_impedances, ImpedanceIndex
+from ConductorChoiceCache import ConductorChoiceCache, DEFAULT_CACHE_PATH
+from FaultEventBatch import ResultWriter
+
+# One row per (bus, feeder), the fault columns are the primary_line_fault_calculation values
+STUDY_COLUMNS = ['feeder', 'line_length_mi', 'line_z_100MVA', 'line_zo_100MVA'] + BusFaultBatch.result_columns
+
+# Per process study inputs, loaded once by init_study_worker so the tasks only carry trace paths
+_study = {}
+
+def init_study_worker(bus_imp_path, line_imp_path, choices_path=DEFAULT_CACHE_PATH):
+    """Load the bus and line impedance catalogs for this process, also the pool initializer"""
+    bus_dataframes = read_impedance_sheets(bus_imp_path)
+    line_dataframes = read_clean_line_imp(line_imp_path)
+    line_impedances = line_dataframes[list(line_dataframes.keys())[0]]
+
+    _study['buses'] = BusFaultBatch(bus_dataframes)
+    _study['line_impedances'] = line_impedances
+    _study['impedance_index'] = ImpedanceIndex(line_impedances)
+    # Workers only read saved conductor choices, they never prompt or write the shared file
+    _study['choice_cache'] = ConductorChoiceCache(choices_path, read_only=True) if choices_path else None
+
+def feeder_faults(trace_path):
+    """Fault currents at the end of one feeder fed from every bus of the same voltage level"""
+    traces = read_line_trace(trace_path)
+    trace_name = list(traces.keys())[0]
+    df_linetrace = traces[trace_name]
+    if 'Voltage_Level' not in df_linetrace.columns or df_linetrace.empty:
+        raise ValueError(f"{trace_name}: no voltage level or no primary segments")
+
+    df_linetrace = map_impedances(df_linetrace, _study['line_impedances'], _study['impedance_index'],
+                                  _study['choice_cache'], interactive=False, trace_name=trace_name)
+    zline = ZLine(df_linetrace, trace_name, 1, 1) #ctr and ptr not needed for fault currents
+    zline.get_individual_parameters()
+
+    buses = _study['buses']
+    mask = buses.voltage_level == float(df_linetrace['Voltage_Level'].iloc[0])
+    results = buses.calculate(zline.total_Z_100MVA, zline.total_Zo_100MVA, mask)
+    results.insert(0, 'feeder', trace_name)
+    results.insert(1, 'line_length_mi', zline.total_length_miles)
+    results.insert(2, 'line_z_100MVA', zline.total_Z_100MVA)
+    results.insert(3, 'line_zo_100MVA', zline.total_Zo_100MVA)
+    return results
+
+def run_study_chunk(trace_paths):
+    """
+    Study a chunk of feeders. Module level so it can be sent to a process pool.
+
+    :return: (results DataFrame, list of error messages)
+    """
+    frames, errors = [], []
+    for trace_path in trace_paths:
+        try:
+            frames.append(feeder_faults(trace_path))
+        except Exception as e:
+            errors.append(f"{os.path.basename(trace_path)}: {e}")
+    results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=STUDY_COLUMNS)
+    return results, errors
+
+def run_study(trace_dir, bus_imp_path, line_imp_path, out_path, pattern='*.xlsx', chunksize=4, workers=None,
+              choices_path=DEFAULT_CACHE_PATH):
+    """
+    Short circuit study of every bus x every feeder trace in trace_dir, each feeder paired with the
+    busses of its voltage level. Results are appended to out_path (.csv or .parquet) as chunks finish.
+
+    :param pattern: glob for the line trace workbooks in trace_dir
+    :param chunksize: feeders per pool task
+    :param workers: process pool size, 1 disables the pool, None lets the pool pick
+    :param choices_path: saved conductor and reactor choices, feeders missing one are reported as errors
+    :return: (rows written, list of feeder error messages)
+    """
+    trace_paths = sorted(glob.glob(os.path.join(trace_dir, pattern)))
+    chunks = [trace_paths[i:i + chunksize] for i in range(0, len(trace_paths), chunksize)]
+
+    # Loading in this process first also compiles the impedance catalogs, the workers then load them instead of parsing Excel
+    init_study_worker(bus_imp_path, line_imp_path, choices_path)
+
+    writer = ResultWriter(out_path)
+    errors = []
+    executor = None
+    try:
+        if workers != 1 and len(chunks) > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_study_worker,
+                                           initargs=(bus_imp_path, line_imp_path, choices_path))
+            results = executor.map(run_study_chunk, chunks)
+        else:
+            results = map(run_study_chunk, chunks)
+
+        # map keeps the feeder order, each chunk is written as soon as it and the ones before it are done
+        for df, chunk_errors in results:
+            for error in chunk_errors:
+                print(f"Warning: {error}")
+            errors.extend(chunk_errors)
+            if len(df):
+                writer.write(df)
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown()
+
+    return writer.rows, errors
+
+def main():
+    parser = argparse.ArgumentParser(description='System wide short circuit study, every bus x every feeder trace.')
+    parser.add_argument('trace_dir', help='folder holding the line trace workbooks')
+    parser.add_argument('--bus-imp', required=True, help='bus impedance workbook (Andy Sheets)')
+    parser.add_argument('--line-imp', required=True, help='line impedance workbook (line cleanup)')
+    parser.add_argument('--pattern', default='*.xlsx', help='line trace file pattern')
+    parser.add_argument('--out', default='fault_study.csv', help='output .csv or .parquet file')
+    parser.add_argument('--chunksize', type=int, default=4, help='feeders per pool task')
+    parser.add_argument('--workers', type=int, default=None, help='process pool size, 1 to disable')
+    parser.add_argument('--choices', default=DEFAULT_CACHE_PATH, help='saved conductor choices file')
+    args = parser.parse_args()
+
+    rows, errors = run_study(args.trace_dir, args.bus_imp, args.line_imp, args.out, pattern=args.pattern,
+                             chunksize=args.chunksize, workers=args.workers, choices_path=args.choices)
+    print(f"Wrote {rows} bus/feeder results to {args.out}, {len(errors)} feeders failed")
+
+if __name__ == '__main__':
+    main()
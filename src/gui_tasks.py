@@ -0,0 +1,100 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+class TaskHandle:
+    """A background task, the GUI calls cancel to drop its result"""
+    def __init__(self, name):
+        self.name = name
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """
+        Discard the result. A task still queued never starts, a running one is not interrupted,
+        it finishes in the background and its callbacks are never called.
+        """
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+class BackgroundTasks:
+    """
+    Runs GUI work off the Tk main thread. I/O bound work (reading workbooks) goes to a thread pool,
+    CPU heavy sweeps to a process pool. The futures are polled with root.after so the callbacks
+    and every Tk call run on the main thread. Tk widgets must not be touched inside a task.
+
+    :param on_busy_change: called on the Tk thread with busy each time it changes
+    """
+    def __init__(self, root, io_workers=4, cpu_workers=None, poll_ms=50, on_busy_change=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy_change = on_busy_change
+        self.io_executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='gui-io')
+        self.cpu_workers = cpu_workers
+        self.cpu_executor = None # started on the first sweep, process startup is slow
+        self.active = []
+
+    def submit(self, func, *args, on_done=None, on_error=None, progress=None, kind='io', name='', **kwargs):
+        """
+        Start func(*args, **kwargs) in the background.
+
+        :param on_done: called on the Tk thread with the result
+        :param on_error: called on the Tk thread with the exception
+        :param progress: ProgressDialog closed when the task is done, its Cancel button discards the result
+        :param kind: 'io' runs in a thread, 'cpu' runs in a process so func and its arguments must be picklable
+        :return: TaskHandle
+        """
+        task = TaskHandle(name or getattr(func, '__name__', 'task'))
+        if kind == 'cpu':
+            if self.cpu_executor is None:
+                self.cpu_executor = ProcessPoolExecutor(max_workers=self.cpu_workers)
+            task.future = self.cpu_executor.submit(func, *args, **kwargs)
+        else:
+            task.future = self.io_executor.submit(func, *args, **kwargs)
+
+        if progress is not None:
+            progress.set_cancel_command(task.cancel)
+        self.active.append(task)
+        if len(self.active) == 1 and self.on_busy_change is not None:
+            self.on_busy_change(True)
+        self.root.after(self.poll_ms, self._poll, task, on_done, on_error, progress)
+        return task
+
+    def _poll(self, task, on_done, on_error, progress):
+        if not task.future.done():
+            self.root.after(self.poll_ms, self._poll, task, on_done, on_error, progress)
+            return
+
+        self.active.remove(task)
+        if not self.active and self.on_busy_change is not None:
+            self.on_busy_change(False)
+        if progress is not None:
+            progress.close()
+        if task.cancelled or task.future.cancelled():
+            return
+
+        error = task.future.exception()
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+        elif on_done is not None:
+            on_done(task.future.result())
+
+    @property
+    def busy(self):
+        return bool(self.active)
+
+    def cancel_all(self):
+        for task in list(self.active):
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel everything and stop the pools without waiting for running work"""
+        self.cancel_all()
+        self.io_executor.shutdown(wait=False, cancel_futures=True)
+        if self.cpu_executor is not None:
+            self.cpu_executor.shutdown(wait=False, cancel_futures=True)
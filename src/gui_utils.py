@@ -1,8 +1,5 @@
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
-import pandas as pd
 import os
 from datetime import datetime
 
@@ -105,13 +102,19 @@ class ResultsFormatter:
             start = end
 
 class PlotManager:
-    """Manage matplotlib plots in tkinter"""
+    """
+    Manage matplotlib plots in tkinter. Artists added with add_animated are left out of the full
+    draw and blitted over a cached background, so moving them is cheap enough for a slider.
+    """
     
     def __init__(self, parent_frame, figure_size=(8, 6), dpi=100):
-        self.figure = plt.Figure(figsize=figure_size, dpi=dpi)
+        # Imported here so the GUI starts without loading matplotlib
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        
+        self.figure = Figure(figsize=figure_size, dpi=dpi)
         self.ax = self.figure.add_subplot(111)
         
-        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         self.canvas = FigureCanvasTkAgg(self.figure, master=parent_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
@@ -119,9 +122,38 @@ class PlotManager:
         self.toolbar = NavigationToolbar2Tk(self.canvas, parent_frame)
         self.toolbar.update()
         
+        # Blitting, the background is recaptured after every full draw (resize, zoom, new data)
+        self.animated = []
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        
+    def add_animated(self, artist):
+        """Redraw artist by blitting only, call blit after changing its data"""
+        artist.set_animated(True)
+        self.animated.append(artist)
+        return artist
+        
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_animated()
+        
+    def draw_animated(self):
+        for artist in self.animated:
+            self.figure.draw_artist(artist)
+            
+    def blit(self):
+        """Redraw the animated artists over the cached background"""
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.figure.bbox)
+        
     def clear_plot(self):
         """Clear the current plot"""
         self.ax.clear()
+        self.animated = []
         self.canvas.draw()
         
     def update_plot(self):
@@ -132,7 +164,14 @@ class PlotManager:
         """Save the current plot"""
         if filename is None:
             filename = f"plot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        self.figure.savefig(filename, dpi=300, bbox_inches='tight')
+        # Animated artists are skipped by a normal draw, include them in the file
+        for artist in self.animated:
+            artist.set_animated(False)
+        try:
+            self.figure.savefig(filename, dpi=300, bbox_inches='tight')
+        finally:
+            for artist in self.animated:
+                artist.set_animated(True)
         return filename
 
 class DataValidator:
@@ -192,6 +231,8 @@ class FileManager:
     @staticmethod
     def export_results_to_excel(results_dict, filename=None):
         """Export results to Excel file"""
+        import pandas as pd
+        
         if filename is None:
             filename = f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             
@@ -209,12 +250,13 @@ class FileManager:
 class ProgressDialog:
     """Show progress dialog for long operations"""
     
-    def __init__(self, parent, title="Processing...", message="Please wait..."):
+    def __init__(self, parent, title="Processing...", message="Please wait...", on_cancel=None):
         self.dialog = tk.Toplevel(parent)
         self.dialog.title(title)
-        self.dialog.geometry("300x100")
+        self.dialog.geometry("300x130" if on_cancel else "300x100")
         self.dialog.transient(parent)
         self.dialog.grab_set()
+        self.on_cancel = on_cancel
         
         # Center the dialog
         self.dialog.update_idletasks()
@@ -230,8 +272,29 @@ class ProgressDialog:
         self.progress.pack(pady=10)
         self.progress.start(10)
         
+        # Cancel button, only when there is something to cancel
+        self.cancel_button = ttk.Button(self.dialog, text="Cancel", command=self.cancel)
+        if on_cancel:
+            self.cancel_button.pack(pady=(0, 10))
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
+            
+    def set_cancel_command(self, on_cancel):
+        """Show the Cancel button and call on_cancel when it is pressed"""
+        if self.on_cancel is None:
+            self.dialog.geometry("300x130")
+            self.cancel_button.pack(pady=(0, 10))
+        self.on_cancel = on_cancel
+        
+    def cancel(self):
+        """Give up on the operation, on_cancel discards its result and the dialog closes right away"""
+        if self.on_cancel:
+            self.on_cancel()
+            self.close()
+        
     def close(self):
-        """Close the progress dialog"""
+        """Close the progress dialog, closing it again does nothing"""
+        if not self.dialog.winfo_exists():
+            return
         self.progress.stop()
         self.dialog.destroy()
 
@@ -6,6 +6,8 @@ Launch script for the graphical user interface version
 
 import sys
 import os
+import argparse
+import importlib.util
 import tkinter as tk
 from tkinter import messagebox
 
@@ -20,10 +22,9 @@ def check_dependencies():
         'openpyxl': 'openpyxl'
     }
     
+    # Only look the modules up, they are imported when first needed
     for module_name, pip_name in required_modules.items():
-        try:
-            __import__(module_name)
-        except ImportError:
+        if importlib.util.find_spec(module_name) is None:
             missing_deps.append(pip_name)
     
     if missing_deps:
@@ -85,19 +86,34 @@ def setup_environment():
     if script_dir not in sys.path:
         sys.path.insert(0, script_dir)
     
-    # Set matplotlib backend
-    try:
-        import matplotlib
-        matplotlib.use('TkAgg')
-    except:
-        pass
+    # Set matplotlib backend, read when matplotlib is first imported
+    os.environ.setdefault('MPLBACKEND', 'TkAgg')
 
-def launch_application():
+def launch_application(timer=None):
     """Launch the main GUI application"""
     try:
-        # Import and run the main GUI
-        from main_gui import main
-        main()
+        root = tk.Tk()
+        
+        def build_window():
+            from main_gui import PowerSystemFaultCalculatorGUI
+            return PowerSystemFaultCalculatorGUI(root)
+        
+        # The splash follows the real startup work, the catalogs then load in the background
+        steps = [
+            ("Loading numerical libraries...", lambda: __import__('pandas')),
+            ("Loading modules...", lambda: __import__('main_gui')),
+            ("Initializing interface...", build_window)
+        ]
+        try:
+            from splash_screen import show_splash
+            app = show_splash(root, steps, timer)[-1]
+        except tk.TclError as e:
+            print(f"Splash screen not available: {e}")
+            app = build_window()
+        
+        if timer is not None:
+            root.after_idle(lambda: print("\n" + timer.report()))
+        root.mainloop()
     except Exception as e:
         root = tk.Tk()
         root.withdraw()
@@ -115,6 +131,17 @@ def launch_application():
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='Power System Fault Calculator GUI')
+    parser.add_argument('--timing', action='store_true', help='print how long each startup step took')
+    parser.add_argument('--import-time', action='store_true',
+                        help='print the -X importtime breakdown of the GUI modules and exit')
+    args = parser.parse_args()
+    
+    timer = None
+    if args.timing or args.import_time:
+        from startup_timing import StartupTimer, import_time_report
+        timer = StartupTimer()
+    
     print("Power System Fault Calculator - GUI Version")
     
     # Debug info
@@ -134,8 +161,12 @@ def main():
     print("Setting up environment...")
     setup_environment()
     
+    if args.import_time:
+        print(import_time_report('main_gui'))
+        return
+    
     print("Launching application...")
-    launch_application()
+    launch_application(timer)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -2,6 +2,7 @@ from menus import zbusmenu, fault_loc_menu, sel_time_menu, savetxt
 from Classes import ZBus, ZLine, ZTrans
 from GetExcel import load_impedance_sheets, load_line_trace, load_clean_line_imp
 from CleanLineTrace import map_impedances
+from ConductorChoiceCache import ConductorChoiceCache
 from Calcs import primary_line_fault_calculation, locate_primary_line_fault_l_g, sec_trans_fault_calculation
 
 def main():
@@ -13,6 +14,7 @@ def main():
     ztrans_selection = None
     line_trace = None
     buffer = [] #collect data to write to terminal and file at end of calculations
+    choice_cache = ConductorChoiceCache() #conductor choices remembered between runs
 
     print("\nMenu Options: ")
 
@@ -64,7 +66,7 @@ def main():
                     first_sheet_name = list(line_dataframes.keys())[0]
                     line_dataframes = line_dataframes[first_sheet_name]
 
-                line_trace = map_impedances(line_trace, line_dataframes)
+                line_trace = map_impedances(line_trace, line_dataframes, choice_cache=choice_cache, trace_name=first_sheet_name_trace)
                 zline_selection = ZLine(line_trace, first_sheet_name_trace, ctr, ptr)
                 zline_selection.get_individual_parameters()
                 buffer.append(f"\nLine trace {first_sheet_name_trace}:\n")
@@ -106,7 +108,7 @@ def main():
                     first_sheet_name = list(line_dataframes.keys())[0]
                     line_dataframes = line_dataframes[first_sheet_name]
 
-                line_trace = map_impedances(line_trace, line_dataframes)
+                line_trace = map_impedances(line_trace, line_dataframes, choice_cache=choice_cache, trace_name=first_sheet_name_trace)
                 zline_selection = ZLine(line_trace, first_sheet_name_trace, ctr, ptr)
                 zline_selection.get_individual_parameters()
                 buffer.append(f"\nLine trace {first_sheet_name_trace}:\n")
@@ -149,7 +151,7 @@ def main():
                     first_sheet_name = list(line_dataframes.keys())[0]
                     line_dataframes = line_dataframes[first_sheet_name]
 
-                line_trace = map_impedances(line_trace, line_dataframes)
+                line_trace = map_impedances(line_trace, line_dataframes, choice_cache=choice_cache, trace_name=first_sheet_name_trace)
                 zline_selection = ZLine(line_trace, first_sheet_name_trace, 1, 1) #entering 1 for ctr and ptr, not needed in this routine at moment
                 zline_selection.get_individual_parameters()
 
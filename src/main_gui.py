@@ -1,22 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import pandas as pd
-import numpy as np
 from datetime import datetime
+import math
 import os
 import sys
 
-# Import all your existing modules
-from menus import zbusmenu, fault_loc_menu, sel_time_menu, savetxt
-from Classes import ZBus, ZLine, ZTrans
-from GetExcel import load_impedance_sheets, load_line_trace, load_clean_line_imp
+# Import all your existing modules. matplotlib and the calculation modules (Classes, Calcs,
+# FaultLocator) are imported where they are first used so the window opens without them.
+from GetExcel import (read_impedance_sheets, read_clean_line_imp, read_line_trace,
+                      ask_impedance_sheets_path, ask_clean_line_imp_path, ask_line_trace_path)
 from CleanLineTrace import map_impedances
-from Calcs import (primary_line_fault_calculation, locate_primary_line_fault_l_g, 
-                   sec_trans_fault_calculation, locate_primary_line_fault_3ph,
-                   locate_primary_line_fault_l_l, locate_primary_line_fault_l_l_g)
+from ConductorChoiceCache import ConductorChoiceCache
+from FaultResultCache import FaultResultCache, bus_key, trace_key, trans_key
+from RelayCurves import CURVE_NAMES, CYCLES_PER_SECOND, multiple_of_pickup, operate_time, reset_time
+from gui_tasks import BackgroundTasks
+from gui_utils import ProgressDialog, PlotManager
 
 # Try to import GUI version of map_impedances
 try:
@@ -68,6 +66,14 @@ class PowerSystemFaultCalculatorGUI:
         self.ztrans_selection = None
         self.line_trace = None
         self.buffer = []
+        self.choice_cache = ConductorChoiceCache() # conductor choices remembered between runs
+        self.result_cache = FaultResultCache() # calculations keyed by bus, line trace and transformer content
+        self.zbus_key = None
+        self.zline_key = None
+        # Workbook reads and sweeps run off the Tk main thread, loading is disabled while one runs
+        self.tasks = BackgroundTasks(self.root, on_busy_change=self.update_load_actions)
+        self.load_buttons = []
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Create main container
         self.main_container = ttk.Frame(self.root)
@@ -85,8 +91,8 @@ class PowerSystemFaultCalculatorGUI:
         # Create main content area
         self.create_main_content()
         
-        # Load initial data
-        self.load_initial_data()
+        # Load initial data once the window is up, the catalogs are read in the background
+        self.root.after_idle(self.load_initial_data)
         
     def create_menu_bar(self):
         menubar = tk.Menu(self.root, bg=self.colors['card_bg'], fg=self.colors['text'], 
@@ -97,6 +103,7 @@ class PowerSystemFaultCalculatorGUI:
         file_menu = tk.Menu(menubar, tearoff=0, bg=self.colors['card_bg'], fg=self.colors['text'],
                            activebackground=self.colors['secondary'], activeforeground='white')
         menubar.add_cascade(label="File", menu=file_menu)
+        self.file_menu = file_menu
         file_menu.add_command(label="Load Impedance Sheets", command=self.load_impedance_sheets_gui, 
                              accelerator="Ctrl+O")
         file_menu.add_command(label="Load Line Impedances", command=self.load_line_impedances_gui)
@@ -115,6 +122,7 @@ class PowerSystemFaultCalculatorGUI:
         menubar.add_cascade(label="View", menu=view_menu)
         view_menu.add_command(label="Clear Results", command=self.clear_results)
         view_menu.add_command(label="Reset All", command=self.reset_all)
+        view_menu.add_command(label="Clear Cached Results", command=self.clear_result_cache)
         view_menu.add_separator()
         
         # Theme submenu
@@ -152,7 +160,8 @@ class PowerSystemFaultCalculatorGUI:
         # Create toolbar buttons with better styling
         button_style = {'style': 'TButton', 'width': 15}
         
-        ttk.Button(toolbar, text="📁 Load Data", command=self.load_all_data, **button_style).pack(side=tk.LEFT, padx=3)
+        self.load_buttons.append(ttk.Button(toolbar, text="📁 Load Data", command=self.load_all_data, **button_style))
+        self.load_buttons[-1].pack(side=tk.LEFT, padx=3)
         ttk.Button(toolbar, text="💾 Save Results", command=self.save_results, **button_style).pack(side=tk.LEFT, padx=3)
         
         ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=10)
@@ -328,9 +337,10 @@ Results include magnitude and angle for each phase."""
                                          padding=10)
         self.line_trace_label.pack(fill=tk.X, pady=(0, 10))
         
-        ttk.Button(trace_frame, text="Load Line Trace", 
-                  command=self.load_line_trace_gui,
-                  style='TButton').pack(fill=tk.X)
+        self.load_buttons.append(ttk.Button(trace_frame, text="Load Line Trace", 
+                                            command=self.load_line_trace_gui,
+                                            style='TButton'))
+        self.load_buttons[-1].pack(fill=tk.X)
         
         # Add note about reactor selection
         ttk.Label(trace_frame, 
@@ -460,7 +470,8 @@ Results include magnitude and angle for each phase."""
         ttk.Label(trace_frame, text="Line Trace:").pack(side=tk.LEFT, padx=5)
         self.trans_trace_label = ttk.Label(trace_frame, text="No file loaded", relief=tk.SUNKEN, width=50)
         self.trans_trace_label.pack(side=tk.LEFT, padx=5)
-        ttk.Button(trace_frame, text="Load", command=self.load_trans_line_trace).pack(side=tk.LEFT)
+        self.load_buttons.append(ttk.Button(trace_frame, text="Load", command=self.load_trans_line_trace))
+        self.load_buttons[-1].pack(side=tk.LEFT)
         
         # Add note about reactor selection
         note_label = ttk.Label(input_frame, 
@@ -521,7 +532,8 @@ Results include magnitude and angle for each phase."""
         ttk.Label(input_frame, text="Line Trace:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=10)
         self.loc_trace_label = ttk.Label(input_frame, text="No file loaded", relief=tk.SUNKEN, width=30)
         self.loc_trace_label.grid(row=3, column=1, padx=5, pady=10)
-        ttk.Button(input_frame, text="Load", command=self.load_loc_line_trace).grid(row=3, column=2, padx=5)
+        self.load_buttons.append(ttk.Button(input_frame, text="Load", command=self.load_loc_line_trace))
+        self.load_buttons[-1].grid(row=3, column=2, padx=5)
         
         # Add note about reactor selection
         note_label = ttk.Label(input_frame, 
@@ -551,6 +563,16 @@ Results include magnitude and angle for each phase."""
         ttk.Button(input_frame, text="Locate Fault", 
                   command=self.locate_fault).grid(row=9, column=0, columnspan=2, pady=20)
         
+        # Scrub the measured current after a location, the plot follows without recomputing the curve
+        ttk.Label(input_frame, text="Adjust Magnitude (A):").grid(row=10, column=0, sticky=tk.W, padx=5, pady=5)
+        self.fault_mag_scale = ttk.Scale(input_frame, orient=tk.HORIZONTAL, length=200, from_=0, to=1,
+                                         command=self.on_fault_mag_scrub)
+        self.fault_mag_scale.grid(row=10, column=1, padx=5, pady=5)
+        self.fault_mag_scale.state(['disabled'])
+        self.loc_params = None
+        self.loc_fault_type = None
+        self.loc_scrub_pending = False
+        
         # Right side - Plot
         right_frame = ttk.Frame(paned)
         paned.add(right_frame, weight=2)
@@ -558,11 +580,14 @@ Results include magnitude and angle for each phase."""
         plot_frame = ttk.LabelFrame(right_frame, text="Fault Location Plot", padding=10)
         plot_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Create matplotlib figure
-        self.fault_figure = Figure(figsize=(8, 6), dpi=100)
-        self.fault_ax = self.fault_figure.add_subplot(111)
-        self.fault_canvas = FigureCanvasTkAgg(self.fault_figure, master=plot_frame)
-        self.fault_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # The matplotlib figure is created the first time the tab is shown, see create_fault_plot
+        self.fault_plot_frame = plot_frame
+        self.fault_plot = None
+        self.fault_artists = None
+        self.fault_figure = None
+        self.fault_ax = None
+        self.fault_canvas = None
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_change, add="+")
         
         # Results text below plot
         results_frame = ttk.Frame(right_frame)
@@ -571,6 +596,24 @@ Results include magnitude and angle for each phase."""
         self.fault_result_label = ttk.Label(results_frame, text="", font=('Arial', 12, 'bold'))
         self.fault_result_label.pack()
         
+    def create_fault_plot(self):
+        """Create the fault location figure, importing matplotlib the first time it is needed"""
+        if self.fault_plot is not None:
+            return
+        from FaultLocationPlot import FaultLocationArtists
+        
+        self.fault_plot = PlotManager(self.fault_plot_frame)
+        self.fault_figure = self.fault_plot.figure
+        self.fault_ax = self.fault_plot.ax
+        self.fault_canvas = self.fault_plot.canvas
+        # Built once, a new location only updates the data of these artists
+        self.fault_artists = FaultLocationArtists(self.fault_ax, register=self.fault_plot.add_animated)
+        self.fault_plot.update_plot()
+        
+    def on_tab_change(self, event):
+        if self.notebook.select() == str(self.fault_location_tab):
+            self.create_fault_plot()
+            
     def create_sel_curves_tab(self):
         # Create main frame
         main_frame = ttk.Frame(self.sel_curves_tab)
@@ -584,7 +627,7 @@ Results include magnitude and angle for each phase."""
         ttk.Label(input_frame, text="U-Curve Type:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
         self.sel_curve_var = tk.StringVar()
         self.sel_curve_combo = ttk.Combobox(input_frame, textvariable=self.sel_curve_var, width=15)
-        self.sel_curve_combo['values'] = ['U1', 'U2', 'U3', 'U4', 'U5']
+        self.sel_curve_combo['values'] = CURVE_NAMES
         self.sel_curve_combo.grid(row=0, column=1, padx=5, pady=5)
         
         ttk.Label(input_frame, text="Time Dial Setting:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
@@ -633,13 +676,37 @@ Results include magnitude and angle for each phase."""
         self.sel_info_label.pack(pady=10)
     
     # Event handlers and calculation methods
+    def run_in_background(self, func, *args, on_done=None, message="Please wait...", error_message="Error", kind='io',
+                          modal=True):
+        """
+        Run func(*args) off the Tk main thread behind a progress dialog, its Cancel discards the result.
+        on_done gets the result on the main thread, errors are shown with error_message in front.
+        With modal=False only the status bar shows the work and the window stays usable.
+        """
+        self.update_status(message, "info")
+        progress = ProgressDialog(self.root, title="Processing...", message=message) if modal else None
+
+        def on_error(e):
+            self.show_error(f"{error_message}: {str(e)}")
+
+        return self.tasks.submit(func, *args, on_done=on_done, on_error=on_error, progress=progress, kind=kind)
+
     def load_initial_data(self):
         """Try to load initial data files"""
         try:
-            self.update_status("Loading initial data...", "info")
-            self.bus_dataframes = load_impedance_sheets()
-            self.line_dataframes = load_clean_line_imp()
-            
+            # Dialogs stay on the main thread, only the reading is moved off it
+            bus_path = ask_impedance_sheets_path(self.root)
+            line_path = ask_clean_line_imp_path(self.root)
+        except Exception as e:
+            self.show_error(f"Error loading initial data: {str(e)}")
+            return
+
+        def read_both():
+            return (read_impedance_sheets(bus_path) if bus_path else None,
+                    read_clean_line_imp(line_path) if line_path else None)
+
+        def loaded(result):
+            self.bus_dataframes, self.line_dataframes = result
             if self.bus_dataframes:
                 self.update_voltage_combos()
                 self.data_status_label.config(text="Data loaded")
@@ -647,51 +714,99 @@ Results include magnitude and angle for each phase."""
             else:
                 self.data_status_label.config(text="No data loaded")
                 self.update_status("Please load impedance sheets", "warning")
-        except Exception as e:
-            self.show_error(f"Error loading initial data: {str(e)}")
+
+        self.data_status_label.config(text="Loading data...")
+        self.run_in_background(read_both, on_done=loaded, message="Loading initial data...",
+                               error_message="Error loading initial data", modal=False)
             
+    def update_load_actions(self, busy):
+        """Disable every load action while a background task runs, a second load would race the first"""
+        state = 'disabled' if busy else 'normal'
+        for label in ("Load Impedance Sheets", "Load Line Impedances", "Load Line Trace"):
+            self.file_menu.entryconfig(label, state=state)
+        for button in self.load_buttons:
+            button.state(['disabled'] if busy else ['!disabled'])
+
     def load_all_data(self):
         """Load all required data files"""
-        self.load_impedance_sheets_gui()
-        if self.bus_dataframes:
-            self.load_line_impedances_gui()
+        self.load_impedance_sheets_gui(on_loaded=self.load_line_impedances_gui)
             
-    def load_impedance_sheets_gui(self):
-        """Load impedance sheets with GUI feedback"""
+    def load_impedance_sheets_gui(self, on_loaded=None):
+        """Load impedance sheets with GUI feedback, on_loaded is called once they are in"""
+        if self.tasks.busy:
+            return
         try:
-            self.bus_dataframes = load_impedance_sheets()
+            file_path = ask_impedance_sheets_path(self.root)
+        except Exception as e:
+            self.show_error(f"Error loading impedance sheets: {str(e)}")
+            return
+        if not file_path:
+            messagebox.showwarning("Warning", "No impedance sheets loaded.")
+            return
+
+        def loaded(dataframes):
+            self.bus_dataframes = dataframes
             if self.bus_dataframes:
                 self.update_voltage_combos()
-                messagebox.showinfo("Success", "Impedance sheets loaded successfully!")
                 self.data_status_label.config(text="Data loaded")
+                self.update_status("Ready", "success")
+                messagebox.showinfo("Success", "Impedance sheets loaded successfully!")
+                if on_loaded:
+                    on_loaded()
             else:
                 messagebox.showwarning("Warning", "No impedance sheets loaded.")
-        except Exception as e:
-            self.show_error(f"Error loading impedance sheets: {str(e)}")
+
+        self.run_in_background(read_impedance_sheets, file_path, on_done=loaded,
+                               message="Loading impedance sheets...", error_message="Error loading impedance sheets")
             
     def load_line_impedances_gui(self):
         """Load line impedances with GUI feedback"""
+        if self.tasks.busy:
+            return
         try:
-            self.line_dataframes = load_clean_line_imp()
+            file_path = ask_clean_line_imp_path(self.root)
+        except Exception as e:
+            self.show_error(f"Error loading line impedances: {str(e)}")
+            return
+        if not file_path:
+            messagebox.showwarning("Warning", "No line impedances loaded.")
+            return
+
+        def loaded(dataframes):
+            self.line_dataframes = dataframes
             if self.line_dataframes:
+                self.update_status("Ready", "success")
                 messagebox.showinfo("Success", "Line impedances loaded successfully!")
             else:
                 messagebox.showwarning("Warning", "No line impedances loaded.")
-        except Exception as e:
-            self.show_error(f"Error loading line impedances: {str(e)}")
+
+        self.run_in_background(read_clean_line_imp, file_path, on_done=loaded,
+                               message="Loading line impedances...", error_message="Error loading line impedances")
             
     def load_line_trace_gui(self):
         """Load line trace for line fault calculations"""
+        if self.tasks.busy:
+            return
         try:
-            self.line_trace = load_line_trace()
+            file_path = ask_line_trace_path(self.root)
+        except Exception as e:
+            self.show_error(f"Error loading line trace: {str(e)}")
+            return
+        if not file_path:
+            return
+
+        def loaded(dataframes):
+            self.line_trace = dataframes
             if self.line_trace:
                 filename = list(self.line_trace.keys())[0] if self.line_trace else "No file"
                 self.line_trace_label.config(text=filename)
                 self.trans_trace_label.config(text=filename)
                 self.loc_trace_label.config(text=filename)
+                self.update_status("Ready", "success")
                 messagebox.showinfo("Success", f"Line trace '{filename}' loaded successfully!")
-        except Exception as e:
-            self.show_error(f"Error loading line trace: {str(e)}")
+
+        self.run_in_background(read_line_trace, file_path, on_done=loaded,
+                               message="Loading line trace...", error_message="Error loading line trace")
             
     def load_trans_line_trace(self):
         """Load line trace for transformer calculations"""
@@ -798,6 +913,65 @@ Results include magnitude and angle for each phase."""
             self.custom_trans_frame.grid_remove()
             self.trans_kva_combo.grid(row=2, column=0, columnspan=2, pady=5)
             
+    def get_zbus(self, selected_record):
+        """ZBus for a bus record, reused until the record changes"""
+        from Classes import ZBus
+        key = bus_key(selected_record)
+        return self.result_cache.get_or_compute(lambda: ZBus(selected_record), 'zbus', key), key
+
+    def get_mapped_line_trace(self):
+        """
+        Loaded line trace with impedances mapped. Mapping and its dialogs only run for a trace,
+        line impedance catalog or set of conductor and reactor choices that has not been mapped before.
+
+        :return: (trace name, mapped DataFrame, trace key)
+        """
+        if isinstance(self.line_trace, dict):
+            first_sheet_name_trace = list(self.line_trace.keys())[0]
+            line_trace_df = self.line_trace[first_sheet_name_trace]
+        else:
+            line_trace_df = self.line_trace
+            first_sheet_name_trace = "Line Trace"
+
+        if isinstance(self.line_dataframes, dict):
+            first_sheet_name = list(self.line_dataframes.keys())[0]
+            line_dataframes_df = self.line_dataframes[first_sheet_name]
+        else:
+            line_dataframes_df = self.line_dataframes
+
+        key = trace_key(line_trace_df, line_dataframes_df, self.choice_cache, first_sheet_name_trace)
+        mapped = self.result_cache.get('mapped_trace', key)
+        if mapped is None:
+            # Map a copy so the loaded trace, and its hash, stay unchanged
+            if GUI_MAPPING_AVAILABLE:
+                mapped = map_impedances_gui(line_trace_df.copy(), line_dataframes_df, self.root, choice_cache=self.choice_cache,
+                                            trace_name=first_sheet_name_trace)
+            else:
+                mapped = map_impedances(line_trace_df.copy(), line_dataframes_df, choice_cache=self.choice_cache,
+                                        trace_name=first_sheet_name_trace)
+            # Choices made while mapping are part of the key the next click computes
+            key = trace_key(line_trace_df, line_dataframes_df, self.choice_cache, first_sheet_name_trace)
+            self.result_cache.put(mapped, 'mapped_trace', key, persist=True)
+
+        return first_sheet_name_trace, mapped, key
+
+    def get_zline(self, ctr, ptr):
+        """ZLine for the loaded line trace, reused until the trace, catalog, choices or ratios change"""
+        from Classes import ZLine
+        first_sheet_name_trace, mapped, key = self.get_mapped_line_trace()
+
+        def build():
+            zline = ZLine(mapped.copy(), first_sheet_name_trace, ctr, ptr)
+            zline.get_individual_parameters()
+            return zline
+
+        return self.result_cache.get_or_compute(build, 'zline', key, ctr, ptr), key
+
+    def clear_result_cache(self):
+        """Forget cached calculations and mapped line traces"""
+        self.result_cache.clear(disk=True)
+        self.update_status("Cached results cleared", "info")
+
     def calculate_bus_fault(self):
         """Calculate bus fault current"""
         try:
@@ -817,7 +991,7 @@ Results include magnitude and angle for each phase."""
             selected_record = voltage_df.iloc[station_idx]
             
             # Create ZBus object
-            self.zbus_selection = ZBus(selected_record)
+            self.zbus_selection, self.zbus_key = self.get_zbus(selected_record)
             
             # Calculate and display results
             self.buffer = []
@@ -834,6 +1008,8 @@ Results include magnitude and angle for each phase."""
             
     def calculate_line_fault(self):
         """Calculate line fault current"""
+        from Calcs import primary_line_fault_calculation, format_primary_line_fault
+        
         try:
             if not self.bus_dataframes:
                 messagebox.showwarning("Warning", "Please load impedance sheets first.")
@@ -864,40 +1040,21 @@ Results include magnitude and angle for each phase."""
             selected_record = voltage_df.iloc[station_idx]
             
             # Create ZBus object
-            self.zbus_selection = ZBus(selected_record)
-            
-            # Process line trace
-            if isinstance(self.line_trace, dict):
-                first_sheet_name_trace = list(self.line_trace.keys())[0]
-                line_trace_df = self.line_trace[first_sheet_name_trace]
-            else:
-                line_trace_df = self.line_trace
-                first_sheet_name_trace = "Line Trace"
-                
-            # Map impedances
-            if isinstance(self.line_dataframes, dict):
-                first_sheet_name = list(self.line_dataframes.keys())[0]
-                line_dataframes_df = self.line_dataframes[first_sheet_name]
-            else:
-                line_dataframes_df = self.line_dataframes
-                
-            # Use GUI version if available
-            if GUI_MAPPING_AVAILABLE:
-                line_trace_df = map_impedances_gui(line_trace_df, line_dataframes_df, self.root)
-            else:
-                line_trace_df = map_impedances(line_trace_df, line_dataframes_df)
+            self.zbus_selection, self.zbus_key = self.get_zbus(selected_record)
             
-            # Create ZLine object
-            self.zline_selection = ZLine(line_trace_df, first_sheet_name_trace, ctr, ptr)
-            self.zline_selection.get_individual_parameters()
+            # Map impedances and create ZLine object, both reused when nothing changed
+            self.zline_selection, self.zline_key = self.get_zline(ctr, ptr)
             
             # Calculate
+            result = self.result_cache.get_or_compute(
+                lambda: primary_line_fault_calculation(self.zbus_selection, self.zline_selection),
+                'primary_line', self.zbus_key, self.zline_key, ctr, ptr, persist=True)
             self.buffer = []
             self.zbus_selection.display_info(self.buffer)
-            self.buffer.append(f"\nLine trace {first_sheet_name_trace}:\n")
+            self.buffer.append(f"\nLine trace {self.zline_selection.label}:\n")
             self.zline_selection.display_info(self.buffer)
             self.buffer.append(f"CT ratio: {ctr}:1   PT Ratio: {ptr}:1\n")
-            primary_line_fault_calculation(self.zbus_selection, self.zline_selection, self.buffer)
+            self.buffer.extend(format_primary_line_fault(result))
             
             # Display results
             self.line_results_text.delete(1.0, tk.END)
@@ -910,6 +1067,9 @@ Results include magnitude and angle for each phase."""
             
     def calculate_trans_fault(self):
         """Calculate transformer fault current"""
+        from Classes import ZTrans
+        from Calcs import sec_trans_fault_calculation, format_sec_trans_fault
+        
         try:
             # First ensure line fault is calculated
             if not self.zline_selection:
@@ -956,10 +1116,13 @@ Results include magnitude and angle for each phase."""
             self.ztrans_selection = ZTrans(conn, sec_voltage, percent_z, kva, x_r)
             
             # Calculate
+            result = self.result_cache.get_or_compute(
+                lambda: sec_trans_fault_calculation(self.zbus_selection, self.zline_selection, self.ztrans_selection),
+                'sec_trans', self.zbus_key, self.zline_key, self.zline_selection.ctr, self.zline_selection.ptr,
+                trans_key(conn, sec_voltage, percent_z, kva, x_r), persist=True)
             self.buffer.append("\n" + "="*80 + "\n")
             self.ztrans_selection.display_info(self.buffer)
-            sec_trans_fault_calculation(self.zbus_selection, self.zline_selection, 
-                                      self.ztrans_selection, self.buffer)
+            self.buffer.extend(format_sec_trans_fault(result))
             
             # Display results
             self.trans_results_text.delete(1.0, tk.END)
@@ -972,6 +1135,9 @@ Results include magnitude and angle for each phase."""
             
     def locate_fault(self):
         """Locate fault on line"""
+        import numpy as np
+        from FaultLocator import compute_fault_location, line_parameters
+        
         try:
             if not self.bus_dataframes or not self.line_trace:
                 messagebox.showwarning("Warning", "Please load required data first.")
@@ -995,62 +1161,73 @@ Results include magnitude and angle for each phase."""
             # Get bus selection
             voltage_df = self.bus_dataframes[voltage]
             selected_record = voltage_df.iloc[station_idx]
-            zbus_obj = ZBus(selected_record)
+            zbus_obj, zbus_key = self.get_zbus(selected_record)
             
-            # Process line trace
-            if isinstance(self.line_trace, dict):
-                first_sheet_name_trace = list(self.line_trace.keys())[0]
-                line_trace_df = self.line_trace[first_sheet_name_trace]
-            else:
-                line_trace_df = self.line_trace
-                first_sheet_name_trace = "Line Trace"
-                
-            # Map impedances
-            if isinstance(self.line_dataframes, dict):
-                first_sheet_name = list(self.line_dataframes.keys())[0]
-                line_dataframes_df = self.line_dataframes[first_sheet_name]
-            else:
-                line_dataframes_df = self.line_dataframes
+            # Map impedances and create ZLine object, both reused when nothing changed
+            zline_obj, zline_key = self.get_zline(1, 1)
+            
+            def show_location(result):
+                # Draw the headless result onto the embedded axes
+                distance, current = result.distance, result.current
+
+                self.create_fault_plot()
+                self.fault_artists.update(result)
+                self.fault_plot.update_plot()
                 
-            # Use GUI version if available
-            if GUI_MAPPING_AVAILABLE:
-                line_trace_df = map_impedances_gui(line_trace_df, line_dataframes_df, self.root)
-            else:
-                line_trace_df = map_impedances(line_trace_df, line_dataframes_df)
+                # Display result
+                self.show_fault_location(distance, current)
                 
-            zline_obj = ZLine(line_trace_df, first_sheet_name_trace, 1, 1)
-            zline_obj.get_individual_parameters()
-            
-            # Clear previous plot
-            self.fault_ax.clear()
-            
-            # Temporarily redirect matplotlib to our canvas
-            plt.figure(self.fault_figure.number)
-            
-            # Calculate based on fault type
-            if fault_type == '3 Phase':
-                distance, current = locate_primary_line_fault_3ph(zbus_obj, zline_obj, fault_mag)
-            elif fault_type == 'Line to Ground':
-                distance, current = locate_primary_line_fault_l_g(zbus_obj, zline_obj, fault_mag)
-            elif fault_type == 'Line to Line':
-                distance, current = locate_primary_line_fault_l_l(zbus_obj, zline_obj, fault_mag)
-            elif fault_type == 'Double Line to Ground':
-                distance, current = locate_primary_line_fault_l_l_g(zbus_obj, zline_obj, fault_mag)
+                # The slider covers the currents on the line, moving it relocates on the same line
+                self.loc_params = line_parameters(zbus_obj, zline_obj)
+                self.loc_fault_type = fault_type
+                if result.sweep_current is not None and np.isfinite(result.sweep_current).any():
+                    self.fault_mag_scale.config(from_=float(np.nanmin(result.sweep_current)),
+                                                to=float(np.nanmax(result.sweep_current)))
+                    self.fault_mag_scale.set(fault_mag)
+                    self.fault_mag_scale.state(['!disabled'])
                 
-            # The plot is already created by the locate functions
-            # Just update our canvas
-            self.fault_canvas.draw()
+                self.update_status("Fault location calculated", "success")
+
+            result = self.result_cache.get('fault_location', zbus_key, zline_key, fault_type, fault_mag)
+            if result is None:
+                # A single locate takes well under a millisecond, inline like relocate_fault, no pool round trip
+                result = compute_fault_location(zbus_obj, zline_obj, fault_type, fault_mag)
+                self.result_cache.put(result, 'fault_location', zbus_key, zline_key, fault_type, fault_mag, persist=True)
+            show_location(result)
             
-            # Display result
-            self.fault_result_label.config(
-                text=f"Fault Location: {distance:.2f} miles from station\n"
-                     f"Calculated Current: {current:.0f} Amps"
-            )
+        except Exception as e:
+            self.show_error(f"Error locating fault: {str(e)}")
             
-            self.update_status("Fault location calculated", "success")
+    def show_fault_location(self, distance, current):
+        self.fault_result_label.config(
+            text=f"Fault Location: {distance:.2f} miles from station\n"
+                 f"Calculated Current: {current:.0f} Amps"
+        )
+        
+    def on_fault_mag_scrub(self, value):
+        """Slider moved, relocate once the event queue is idle so fast drags skip stale values"""
+        if self.loc_params is None or self.fault_plot is None:
+            return
+        if not self.loc_scrub_pending:
+            self.loc_scrub_pending = True
+            self.root.after_idle(self.relocate_fault)
             
+    def relocate_fault(self):
+        """Locate for the slider value on the last located line, only the measured line and annotations are blitted"""
+        from FaultLocator import nearest_fault_location
+        
+        self.loc_scrub_pending = False
+        if self.loc_params is None:
+            return
+        try:
+            fault_mag = round(float(self.fault_mag_scale.get()))
+            distance, current, crossings = nearest_fault_location(self.loc_params, self.loc_fault_type, fault_mag)
+            self.fault_artists.set_measured(fault_mag, crossings, distance)
+            self.fault_plot.blit()
+            self.fault_mag_var.set(str(fault_mag))
+            self.show_fault_location(distance, current)
         except Exception as e:
-            self.show_error(f"Error locating fault: {str(e)}")
+            self.update_status(f"Error relocating fault: {str(e)}", "error")
             
     def calculate_sel_times(self):
         """Calculate SEL curve operate and reset times"""
@@ -1071,33 +1248,20 @@ Results include magnitude and angle for each phase."""
                 messagebox.showwarning("Warning", "Please select curve type.")
                 return
                 
-            # Calculate M
-            m = pri_fault / (tap * ctr)
-            
-            # Calculate times based on curve type
-            if curve_type == 'U1':
-                op_time = td * (0.0226 + (0.0104 / ((m ** 0.02) - 1)))
-                rst_time = td * (1.08 / (1 - (m ** 2)))
-            elif curve_type == 'U2':
-                op_time = td * (0.180 + (5.95 / ((m ** 2) - 1)))
-                rst_time = td * (5.95 / (1 - (m ** 2)))
-            elif curve_type == 'U3':
-                op_time = td * (0.0963 + (3.88 / ((m ** 2) - 1)))
-                rst_time = td * (3.88 / (1 - (m ** 2)))
-            elif curve_type == 'U4':
-                op_time = td * (0.0352 + (5.67 / ((m ** 2) - 1)))
-                rst_time = td * (5.67/ (1 - (m ** 2)))
-            elif curve_type == 'U5':
-                op_time = td * (0.0262 + (0.00342/ ((m ** 0.02) - 1)))
-                rst_time = td * (0.323 / (1 - (m ** 2)))
-                
-            # Convert to cycles
-            op_time_cy = op_time / 0.0166666666666666667
-            rst_time_cy = rst_time / 0.0166666666666666667
+            # Calculate M and the curve times, nan where the curve does not apply
+            m = float(multiple_of_pickup(pri_fault, tap, ctr))
+            op_time = float(operate_time(curve_type, m, td))
+            rst_time = float(reset_time(curve_type, m, td))
             
-            # Display results
-            self.op_time_label.config(text=f"{op_time:.2f} seconds\n{op_time_cy:.1f} cycles")
-            self.rst_time_label.config(text=f"{-rst_time:.2f} seconds\n{-rst_time_cy:.1f} cycles")
+            # Display results, in seconds and cycles
+            if math.isnan(op_time):
+                self.op_time_label.config(text="No operation\n(M ≤ 1)")
+            else:
+                self.op_time_label.config(text=f"{op_time:.2f} seconds\n{op_time * CYCLES_PER_SECOND:.1f} cycles")
+            if math.isnan(rst_time):
+                self.rst_time_label.config(text="Not resetting\n(M ≥ 1)")
+            else:
+                self.rst_time_label.config(text=f"{rst_time:.2f} seconds\n{rst_time * CYCLES_PER_SECOND:.1f} cycles")
             
             # Additional info
             self.sel_info_label.config(text=f"M = {m:.3f} (Multiple of pickup)")
@@ -1113,6 +1277,7 @@ Results include magnitude and angle for each phase."""
             messagebox.showwarning("Warning", "No results to save.")
             return
             
+        from menus import savetxt
         savetxt(self.buffer)
         
     def clear_results(self):
@@ -1120,8 +1285,11 @@ Results include magnitude and angle for each phase."""
         self.bus_results_text.delete(1.0, tk.END)
         self.line_results_text.delete(1.0, tk.END)
         self.trans_results_text.delete(1.0, tk.END)
-        self.fault_ax.clear()
-        self.fault_canvas.draw()
+        if self.fault_plot is not None:
+            self.fault_artists.clear()
+            self.fault_plot.update_plot()
+        self.loc_params = None
+        self.fault_mag_scale.state(['disabled'])
         self.fault_result_label.config(text="")
         self.op_time_label.config(text="")
         self.rst_time_label.config(text="")
@@ -1137,10 +1305,17 @@ Results include magnitude and angle for each phase."""
         self.zbus_selection = None
         self.zline_selection = None
         self.ztrans_selection = None
+        self.zbus_key = None
+        self.zline_key = None
         self.line_trace = None
         self.data_status_label.config(text="No data loaded")
         self.update_status("All data reset", "warning")
         
+    def on_close(self):
+        """Stop background work before the window goes away"""
+        self.tasks.shutdown()
+        self.root.destroy()
+        
     def show_about(self):
         """Show about dialog"""
         messagebox.showinfo("About", 
@@ -1329,14 +1504,7 @@ TIPS:
 def main():
     root = tk.Tk()
     
-    # Splash screen disabled for now - uncomment below to enable when splash_screen.py is available
-    # try:
-    #     from splash_screen import show_splash
-    #     show_splash(root, duration=2.5)
-    # except (ImportError, Exception) as e:
-    #     print(f"Splash screen not available: {e}")
-    #     pass
-    
+    # launch_gui.py shows the splash screen while the modules load
     app = PowerSystemFaultCalculatorGUI(root)
     root.mainloop()
 
@@ -1,4 +1,6 @@
+from RelayCurves import CURVE_NAMES, CYCLES_PER_SECOND, multiple_of_pickup, operate_time, reset_time
 from Calcs import locate_primary_line_fault_3ph, locate_primary_line_fault_l_g, locate_primary_line_fault_l_l, locate_primary_line_fault_l_l_g
+import math
 import tkinter as tk
 from tkinter import filedialog
 
@@ -91,49 +93,34 @@ def fault_loc_menu(ZBus_obj, Zline_obj):
     return
 
 def sel_time_menu():
-    time_curves = {
-        '1': 'U1',
-        '2': 'U2',
-        '3': 'U3',
-        '4': 'U4',
-        '5': 'U5',
-    }
-
-    print("\nSelect the SEL U-Curve:")
+    time_curves = {str(i + 1): name for i, name in enumerate(CURVE_NAMES)}
+
+    print("\nSelect the relay curve:")
     for key, value in time_curves.items():
         print(f"{key}. {value}")
-    choice = input("Enter (1-5): ")
+    choice = input(f"Enter (1-{len(time_curves)}): ")
     time_curve = time_curves.get(choice, None)
+    if time_curve is None:
+        return
 
     td = float(input("Time Dial Setting: "))
     tap = float(input("Tap Setting: "))
     ctr = float(input("CT Ratio (CTR:1): "))
     pri_fault = float(input("Primary Fault Current: "))
-    m = pri_fault / (tap * ctr)
-    
-    if time_curve == 'U1':
-        op_time = td * (0.0226 + (0.0104 / ((m ** 0.02) - 1)))
-        rst_time = td * (1.08 / (1 - (m ** 2)))
-    elif time_curve == 'U2':
-        op_time = td * (0.180 + (5.95 / ((m ** 2) - 1)))
-        rst_time = td * (5.95 / (1 - (m ** 2)))
-    elif time_curve == 'U3':
-        op_time = td * (0.0963 + (3.88 / ((m ** 2) - 1)))
-        rst_time = td * (3.88 / (1 - (m ** 2)))
-    elif time_curve == 'U4':
-        op_time = td * (0.0352 + (5.67 / ((m ** 2) - 1)))
-        rst_time = td * (5.67/ (1 - (m ** 2)))
-    elif time_curve == 'U5':
-        op_time = td * (0.0262 + (0.00342/ ((m ** 0.02) - 1)))
-        rst_time = td * (0.323 / (1 - (m ** 2)))
+    m = float(multiple_of_pickup(pri_fault, tap, ctr))
+
+    # nan when the curve does not apply, no operation at or below pickup and no reset above it
+    op_time = float(operate_time(time_curve, m, td))
+    rst_time = float(reset_time(time_curve, m, td))
+
+    if math.isnan(op_time):
+        print(f"Operation time: does not operate, M = {m:.3f}")
+    else:
+        print(f"Operation time: {op_time:.2f} seconds, {op_time * CYCLES_PER_SECOND:.1f} cycles")
+    if math.isnan(rst_time):
+        print(f"Reset time: not resetting, M = {m:.3f}")
     else:
-        return    
-    
-    op_time_cy = op_time / 0.0166666666666666667
-    rst_time_cy = rst_time / 0.0166666666666666667
-    
-    print(f"Operation time: {op_time:.2f} seconds, {op_time_cy:.1f} cycles")
-    print(f"Reset time: {-rst_time:.2f} seconds, {-rst_time_cy:.1f} cycles")
+        print(f"Reset time: {rst_time:.2f} seconds, {rst_time * CYCLES_PER_SECOND:.1f} cycles")
 
     return
 
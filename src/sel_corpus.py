@@ -0,0 +1,278 @@
+# Loads the SEL settings of many relays at once. Every settings file is read with a single regex pass,
+# files are parsed in a process pool and the parsed files are cached on disk, so a reload of hundreds of
+# relays only re-parses the files that changed.
+import argparse
+import fnmatch
+import hashlib
+import io
+import os
+import pickle
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+# Section headers ([INFO], [1], [L1]...) and NAME,"VALUE" settings, matched in the same pass
+FILE_PATTERN = re.compile(r'\[([A-Z0-9]+)\]|([A-Z0-9_]+),"([^"]*)"')
+
+DEFAULT_SEL_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.fault_current_calculator', 'sel_settings')
+# Bump when FILE_PATTERN, the group rule or the cache entry layout changes, older entries are then never read
+CACHE_FORMAT = 2
+
+# One row per setting in SettingsCorpus.frame
+CORPUS_COLUMNS = ['relay', 'group', 'file', 'setting', 'value']
+
+@dataclass
+class SettingsFile:
+    """One parsed settings file, group is its section (1-8, L1-L8, G, R, P1...) or None when it has none"""
+    path: str
+    relay: str
+    group: str
+    settings: list = field(default_factory=list) # (name, stripped value) in file order
+    digest: str = '' # sha1 of the file content that was parsed
+
+def read_settings_file(path, relay=None):
+    """
+    Read a settings file with one pass of FILE_PATTERN. The group is the first section after [INFO].
+    The file is read once, the digest is the hash of the same bytes that were parsed.
+
+    :param relay: tag for the settings, defaults to the name of the folder holding the file
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Same decoding and newline handling as open(path, 'r')
+    content = io.TextIOWrapper(io.BytesIO(data)).read()
+    group = None
+    settings = []
+    for section, name, value in FILE_PATTERN.findall(content):
+        if name:
+            settings.append((name, value.strip()))
+        elif group is None or group == 'INFO':
+            group = section
+    relay = relay or os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return SettingsFile(path, relay, group, settings, hashlib.sha1(data).hexdigest())
+
+def pack_settings(settings):
+    """
+    (names, values) strings joined by NUL. Pickling two strings is several times faster than a list of
+    tuples, which matters for the pool results and the cache entries.
+    """
+    return '\0'.join(name for name, _ in settings), '\0'.join(value for _, value in settings)
+
+def unpack_settings(names, values):
+    if not names:
+        return []
+    return list(zip(names.split('\0'), values.split('\0')))
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+class SettingsFileCache:
+    """
+    Parsed settings files pickled to cache_dir, one entry per file path. An entry is used while the
+    file keeps its mtime and size, when those change the content hash decides, so a file that was only
+    touched or copied is not parsed again. An entry is two pickles, a small header checked against the
+    file first and the settings, which are only loaded when the header matches.
+    """
+    def __init__(self, cache_dir=DEFAULT_SEL_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, path):
+        key = hashlib.sha1(f'{CACHE_FORMAT}:{os.path.abspath(path)}'.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def get(self, path, relay):
+        """Cached SettingsFile for path, or None when it is missing or the file changed"""
+        entry_path = self._path(path)
+        if not self.cache_dir or not os.path.exists(entry_path):
+            self.misses += 1
+            return None
+        try:
+            stat = os.stat(path)
+            with open(entry_path, 'rb') as f:
+                header = pickle.load(f)
+                # An entry written by another format is a plain miss, not a warning for every file
+                if not isinstance(header, tuple) or len(header) != 4 or header[0] != CACHE_FORMAT:
+                    self.misses += 1
+                    return None
+                _, mtime_ns, size, digest = header
+                touched = (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size)
+                if touched and file_digest(path) != digest:
+                    self.misses += 1
+                    return None
+                group, names, values = pickle.load(f)
+            settings_file = SettingsFile(path, relay, group, unpack_settings(names, values), digest)
+            if touched:
+                self.put(path, settings_file)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError) as e:
+            print(f"Warning: could not read cached settings {entry_path}: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return settings_file
+
+    def put(self, path, settings_file):
+        if not self.cache_dir:
+            return settings_file
+        try:
+            stat = os.stat(path)
+            # Plain tuples only, the entry loads whether this module was imported as sel_corpus or src.sel_corpus
+            header = (CACHE_FORMAT, stat.st_mtime_ns, stat.st_size, settings_file.digest or file_digest(path))
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._path(path) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump((settings_file.group, *pack_settings(settings_file.settings)), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(path))
+        except (OSError, pickle.PicklingError) as e:
+            print(f"Warning: could not save cached settings {self._path(path)}: {e}")
+        return settings_file
+
+def parse_file_chunk(files):
+    """
+    Pool task, parse a chunk of (path, relay) pairs.
+
+    :return: (list of (path, relay, group, *pack_settings, content hash), list of error messages)
+    """
+    parsed = []
+    errors = []
+    for path, relay in files:
+        try:
+            settings_file = read_settings_file(path, relay)
+            parsed.append((path, relay, settings_file.group, *pack_settings(settings_file.settings), settings_file.digest))
+        except (OSError, UnicodeDecodeError) as e:
+            errors.append(f"{path}: {e}")
+    return parsed, errors
+
+def relay_directories(root):
+    """
+    Folders under root holding settings files, one per relay. root itself counts as a relay when it
+    holds settings files directly.
+    """
+    directories = []
+    for directory, _, filenames in os.walk(root):
+        if any(name.lower().endswith('.txt') for name in filenames):
+            directories.append(directory)
+    return sorted(directories)
+
+class SettingsCorpus:
+    """Settings files of many relays, tagged by relay and group"""
+    def __init__(self, files=None, errors=None):
+        self.files = files or []
+        self.errors = errors or []
+
+    @property
+    def relays(self):
+        return sorted({settings_file.relay for settings_file in self.files})
+
+    def files_for(self, relay, groups=None):
+        """Files of one relay, optionally only the given groups (e.g. ['L1', '1'])"""
+        return [f for f in self.files if f.relay == relay and (groups is None or f.group in groups)]
+
+    def settings(self, relay, groups=None):
+        """{setting name: value} of one relay, later files win like the old parse order"""
+        merged = {}
+        for settings_file in self.files_for(relay, groups):
+            merged.update(settings_file.settings)
+        return merged
+
+    def frame(self):
+        """One row per setting with CORPUS_COLUMNS"""
+        import pandas as pd
+        rows = [(f.relay, f.group, os.path.basename(f.path), name, value)
+                for f in self.files for name, value in f.settings]
+        return pd.DataFrame(rows, columns=CORPUS_COLUMNS)
+
+def load_corpus(directories, pattern='*.txt', cache_dir=DEFAULT_SEL_CACHE_DIR, workers=None, chunksize=16,
+                relay_names=None, verbose=False):
+    """
+    Parse the settings files of every relay directory, unchanged files come from the cache.
+
+    :param directories: relay folders, or a single root handed to relay_directories
+    :param pattern: glob for the settings files in each folder, matched case insensitively
+    :param cache_dir: parsed file cache, None disables it
+    :param workers: process pool size, 1 disables the pool, None lets the pool pick
+    :param chunksize: files per pool task
+    :param relay_names: relay tag per directory, defaults to the folder names
+    :param verbose: print each file as it is parsed
+    :return: SettingsCorpus, files in directory then file name order
+    """
+    if isinstance(directories, str):
+        directories = relay_directories(directories)
+    relay_names = relay_names or [os.path.basename(os.path.normpath(d)) for d in directories]
+
+    files = []
+    for directory, relay in zip(directories, relay_names):
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if fnmatch.fnmatch(name.lower(), pattern.lower()) and os.path.isfile(path):
+                files.append((path, relay))
+
+    cache = SettingsFileCache(cache_dir) if cache_dir else None
+    parsed = {}
+    misses = []
+    for path, relay in files:
+        cached = cache.get(path, relay) if cache is not None else None
+        if cached is not None:
+            parsed[path] = cached
+        else:
+            misses.append((path, relay))
+
+    chunks = [misses[i:i + chunksize] for i in range(0, len(misses), chunksize)]
+    errors = []
+    executor = None
+    try:
+        if workers != 1 and len(chunks) > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            results = executor.map(parse_file_chunk, chunks)
+        else:
+            results = map(parse_file_chunk, chunks)
+
+        for chunk_files, chunk_errors in results:
+            for error in chunk_errors:
+                print(f"Warning: {error}")
+            errors.extend(chunk_errors)
+            for path, relay, group, names, values, digest in chunk_files:
+                settings_file = SettingsFile(path, relay, group, unpack_settings(names, values), digest)
+                if verbose:
+                    print(f"Parsed {settings_file.path}: relay {settings_file.relay}, group {settings_file.group}, "
+                          f"{len(settings_file.settings)} settings")
+                if cache is not None:
+                    cache.put(settings_file.path, settings_file)
+                parsed[settings_file.path] = settings_file
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if verbose and cache is not None:
+        print(f"{cache.hits} files from the cache, {len(misses)} parsed")
+    return SettingsCorpus([parsed[path] for path, _ in files if path in parsed], errors)
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse the SEL settings of many relays, one folder per relay.')
+    parser.add_argument('root', help='folder holding one settings folder per relay')
+    parser.add_argument('--pattern', default='*.txt', help='settings file pattern')
+    parser.add_argument('--out', default=None, help='write every setting to a .csv or .parquet file')
+    parser.add_argument('--workers', type=int, default=None, help='process pool size, 1 to disable')
+    parser.add_argument('--chunksize', type=int, default=16, help='files per pool task')
+    parser.add_argument('--cache-dir', default=DEFAULT_SEL_CACHE_DIR, help='parsed file cache folder')
+    parser.add_argument('--no-cache', action='store_true', help='parse every file again')
+    parser.add_argument('--verbose', action='store_true', help='print every parsed file')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.root, pattern=args.pattern, cache_dir=None if args.no_cache else args.cache_dir,
+                         workers=args.workers, chunksize=args.chunksize, verbose=args.verbose)
+    print(f"Loaded {len(corpus.files)} files of {len(corpus.relays)} relays, {len(corpus.errors)} failed")
+    if args.out:
+        df = corpus.frame()
+        if args.out.lower().endswith('.parquet'):
+            df.to_parquet(args.out, index=False)
+        else:
+            df.to_csv(args.out, index=False)
+        print(f"Wrote {len(df)} settings to {args.out}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+# Lexer, parser and AST for SELogic control equations (SEL-651R style), shared by the logic decoder and browser.
+# An equation is parsed once into a small tree, expansion, formatting, searching and evaluation all walk that tree.
+import re
+from collections import namedtuple
+from dataclasses import dataclass
+
+# Boolean operators by precedence, lowest first. NOT, R_TRIG and F_TRIG bind tighter than any of them.
+BINARY_OPERATORS = ['OR', 'XOR', 'AND']
+UNARY_OPERATORS = {'NOT', 'R_TRIG', 'F_TRIG'}
+KEYWORDS = set(BINARY_OPERATORS) | UNARY_OPERATORS
+# Analog comparisons, e.g. MV05 = 1.00 or 79SH3P < MV01, bind tighter than the boolean operators
+COMPARISONS = {'=', '<>', '<', '<=', '>', '>='}
+
+Token = namedtuple('Token', ['kind', 'text', 'pos'])
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>\#.*)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<word>[A-Za-z0-9_]+(?:\.[0-9]+)?)
+  | (?P<op><=|>=|<>|:=|[=<>+\-*/,:&!])
+  | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+NUMBER_PATTERN = re.compile(r'[0-9]+(?:\.[0-9]+)?$')
+
+class SELogicError(ValueError):
+    """Equation that does not parse, pos is the character offset of the offending token"""
+    def __init__(self, message, pos):
+        super().__init__(f"{message} at position {pos}")
+        self.pos = pos
+
+@dataclass(frozen=True)
+class Word:
+    """Reference to a relay word bit, analog quantity or other logic bit"""
+    name: str
+
+@dataclass(frozen=True)
+class Number:
+    text: str
+
+@dataclass(frozen=True)
+class Group:
+    """Parentheses written in the setting, kept so formatting gives the setting back"""
+    expr: object
+
+@dataclass(frozen=True)
+class Unary:
+    op: str # NOT, R_TRIG, F_TRIG or - for a negative number
+    operand: object
+
+@dataclass(frozen=True)
+class BinOp:
+    """AND, OR or XOR over two or more operands, A AND B AND C is a single node"""
+    op: str
+    operands: tuple
+
+@dataclass(frozen=True)
+class Compare:
+    op: str
+    left: object
+    right: object
+
+@dataclass(frozen=True)
+class Raw:
+    """Text that is not a boolean equation (math, display points), only its words are used"""
+    tokens: tuple
+    text: str = '' # source text, token positions index into it
+
+@dataclass(frozen=True)
+class Logic:
+    """A parsed setting, node is None for an empty setting"""
+    node: object
+    comment: str = ''
+
+def tokenize(text):
+    """Split an equation into Tokens in one pass, whitespace dropped and a # comment kept as the last token"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind != 'space':
+            tokens.append(Token(kind, match.group(), match.start()))
+    return tokens
+
+class _Parser:
+    """Recursive descent over the tokens of one equation, one method per precedence level"""
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            end = self.tokens[-1].pos + len(self.tokens[-1].text) if self.tokens else 0
+            raise SELogicError("Unexpected end of equation", end)
+        self.i += 1
+        return token
+
+    def binary(self, level=0):
+        if level == len(BINARY_OPERATORS):
+            return self.unary()
+        op = BINARY_OPERATORS[level]
+        operands = [self.binary(level + 1)]
+        while self.peek() is not None and self.peek().kind == 'word' and self.peek().text == op:
+            self.i += 1
+            operands.append(self.binary(level + 1))
+        return operands[0] if len(operands) == 1 else BinOp(op, tuple(operands))
+
+    def unary(self):
+        token = self.peek()
+        if token is not None and token.kind == 'word' and token.text in UNARY_OPERATORS:
+            self.i += 1
+            return Unary(token.text, self.unary())
+        return self.comparison()
+
+    def comparison(self):
+        left = self.operand()
+        token = self.peek()
+        if token is not None and token.kind == 'op' and token.text in COMPARISONS:
+            self.i += 1
+            return Compare(token.text, left, self.operand())
+        return left
+
+    def operand(self):
+        token = self.next()
+        if token.kind == 'lparen':
+            expr = self.binary()
+            closing = self.next()
+            if closing.kind != 'rparen':
+                raise SELogicError(f"Expected ) but found {closing.text}", closing.pos)
+            return Group(expr)
+        if token.kind == 'op' and token.text == '-':
+            return Unary('-', self.operand())
+        if token.kind == 'word' and token.text not in KEYWORDS:
+            return Number(token.text) if NUMBER_PATTERN.match(token.text) else Word(token.text)
+        raise SELogicError(f"Unexpected {token.text}", token.pos)
+
+def parse(text):
+    """
+    Parse one setting into a Logic tree.
+
+    :raises SELogicError: when the text is not a well formed equation, see parse_setting for a lenient parse
+    """
+    tokens = tokenize(text)
+    comment = ''
+    if tokens and tokens[-1].kind == 'comment':
+        comment = tokens.pop().text[1:].strip()
+    if not tokens:
+        return Logic(None, comment)
+
+    parser = _Parser(tokens)
+    node = parser.binary()
+    if parser.peek() is not None:
+        token = parser.peek()
+        raise SELogicError(f"Unexpected {token.text}", token.pos)
+    return Logic(node, comment)
+
+def parse_setting(text):
+    """parse, but a setting that is not an equation becomes a Raw node instead of raising"""
+    try:
+        return parse(text)
+    except SELogicError:
+        tokens = tokenize(text)
+        comment = ''
+        if tokens and tokens[-1].kind == 'comment':
+            comment = tokens.pop().text[1:].strip()
+        return Logic(Raw(tuple(tokens), text), comment)
+
+def _children(node):
+    if isinstance(node, Group):
+        return (node.expr,)
+    if isinstance(node, Unary):
+        return (node.operand,)
+    if isinstance(node, BinOp):
+        return node.operands
+    if isinstance(node, Compare):
+        return (node.left, node.right)
+    return ()
+
+def references(node):
+    """Names of the words a node refers to, in order of first use"""
+    if isinstance(node, Logic):
+        node = node.node
+    names = {}
+    stack = [node] if node is not None else []
+    while stack:
+        current = stack.pop()
+        if isinstance(current, Word):
+            names.setdefault(current.name)
+        elif isinstance(current, Raw):
+            for token in current.tokens:
+                if _is_raw_word(token):
+                    names.setdefault(token.text)
+        else:
+            stack.extend(reversed(_children(current)))
+    return list(names)
+
+def _is_raw_word(token):
+    return token.kind == 'word' and token.text not in KEYWORDS and not NUMBER_PATTERN.match(token.text)
+
+def _format_raw(node, expand):
+    """Source text of a Raw node with its spacing kept, words passed through expand like Word nodes"""
+    if not node.text:
+        return ' '.join(token.text for token in node.tokens)
+    parts = []
+    end = node.tokens[0].pos if node.tokens else 0
+    for token in node.tokens:
+        parts.append(node.text[end:token.pos])
+        replacement = expand(token.text) if expand is not None and _is_raw_word(token) else None
+        parts.append(token.text if replacement is None else f"({replacement})")
+        end = token.pos + len(token.text)
+    return ''.join(parts)
+
+def _precedence(node):
+    if isinstance(node, BinOp):
+        return BINARY_OPERATORS.index(node.op)
+    if isinstance(node, Unary):
+        return len(BINARY_OPERATORS)
+    return len(BINARY_OPERATORS) + 1
+
+def format_node(node, expand=None):
+    """
+    Equation text of a node.
+
+    :param expand: called with each word name, a string return replaces the word in parentheses,
+                   None keeps the word
+    """
+    if node is None:
+        return ''
+    if isinstance(node, Logic):
+        return format_node(node.node, expand)
+    if isinstance(node, Word):
+        if expand is not None:
+            replacement = expand(node.name)
+            if replacement is not None:
+                return f"({replacement})"
+        return node.name
+    if isinstance(node, Number):
+        return node.text
+    if isinstance(node, Group):
+        return f"({format_node(node.expr, expand)})"
+    if isinstance(node, Unary):
+        operand = _format_operand(node.operand, _precedence(node), expand)
+        return f"-{operand}" if node.op == '-' else f"{node.op} {operand}"
+    if isinstance(node, BinOp):
+        return f" {node.op} ".join(_format_operand(operand, _precedence(node), expand) for operand in node.operands)
+    if isinstance(node, Compare):
+        return f"{format_node(node.left, expand)} {node.op} {format_node(node.right, expand)}"
+    if isinstance(node, Raw):
+        return _format_raw(node, expand)
+    raise TypeError(f"Not a SELogic node: {node!r}")
+
+def _format_operand(node, parent_precedence, expand):
+    text = format_node(node, expand)
+    # Parentheses only where a hand built tree needs them, parsed trees keep their own Group nodes
+    if _precedence(node) < parent_precedence or (isinstance(node, BinOp) and _precedence(node) == parent_precedence):
+        return f"({text})"
+    return text
+
+def format_logic(logic, expand=None):
+    """Setting text of a Logic, the comment after a #"""
+    text = format_node(logic.node, expand)
+    return f"{text} # {logic.comment}" if logic.comment else text
+
+def format_tree(node, indent='    '):
+    """Multi-line layout, one operand of each AND/OR per line and nested groups indented"""
+    if isinstance(node, Logic):
+        text = format_tree(node.node, indent)
+        return f"{text}\n# {node.comment}" if node.comment else text
+    return '\n'.join(_tree_lines(node, indent, 0))
+
+def _tree_lines(node, indent, level):
+    pad = indent * level
+    if isinstance(node, Group) and isinstance(node.expr, BinOp):
+        return [pad + '('] + _tree_lines(node.expr, indent, level + 1) + [pad + ')']
+    if isinstance(node, Unary) and isinstance(node.operand, Group) and isinstance(node.operand.expr, BinOp):
+        lines = _tree_lines(node.operand, indent, level)
+        lines[0] = f"{pad}{node.op} ("
+        return lines
+    if isinstance(node, BinOp):
+        lines = []
+        for i, operand in enumerate(node.operands):
+            operand_lines = _tree_lines(operand, indent, level)
+            if i > 0:
+                operand_lines[0] = f"{pad}{node.op} {operand_lines[0][len(pad):]}"
+            lines.extend(operand_lines)
+        return lines
+    return [pad + format_node(node)]
+
+def evaluate(node, state, previous=None):
+    """
+    Value of a node for the given word values, words missing from state are 0.
+
+    :param state: {word name: value}, 1/0 or True/False for bits and numbers for analog quantities
+    :param previous: state one processing interval earlier, for R_TRIG and F_TRIG (all 0 when None)
+    :return: bool for logic, float for numbers and analog words
+    """
+    if isinstance(node, Logic):
+        node = node.node
+    if node is None:
+        return False
+    if isinstance(node, Word):
+        return state.get(node.name, 0)
+    if isinstance(node, Number):
+        return float(node.text)
+    if isinstance(node, Group):
+        return evaluate(node.expr, state, previous)
+    if isinstance(node, Unary):
+        if node.op == 'NOT':
+            return not evaluate(node.operand, state, previous)
+        if node.op == '-':
+            return -evaluate(node.operand, state, previous)
+        now = bool(evaluate(node.operand, state, previous))
+        before = bool(evaluate(node.operand, previous or {}, None))
+        return (now and not before) if node.op == 'R_TRIG' else (before and not now)
+    if isinstance(node, BinOp):
+        values = [bool(evaluate(operand, state, previous)) for operand in node.operands]
+        if node.op == 'AND':
+            return all(values)
+        if node.op == 'OR':
+            return any(values)
+        return sum(values) % 2 == 1
+    if isinstance(node, Compare):
+        left = float(evaluate(node.left, state, previous))
+        right = float(evaluate(node.right, state, previous))
+        return {'=': left == right, '<>': left != right, '<': left < right,
+                '<=': left <= right, '>': left > right, '>=': left >= right}[node.op]
+    raise ValueError(f"Cannot evaluate {format_node(node)}")
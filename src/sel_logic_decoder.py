@@ -1,96 +1,205 @@
 import re
-import os
 import sys
 import argparse
 from collections import defaultdict
+from sel_corpus import read_settings_file, load_corpus, DEFAULT_SEL_CACHE_DIR
+from sel_logic import parse_setting, references, format_node, format_logic, format_tree, Raw
+
+def strongly_connected(graph):
+    """
+    Tarjan's strongly connected components of {node: set of nodes it references}, iterative so deep
+    chains do not hit the recursion limit. Components come out in reverse topological order,
+    every component after the components it references.
+    """
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+    counter = 0
+
+    for root in graph:
+        if root in index:
+            continue
+        work = [(root, iter(graph[root]))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            child = next(children, None)
+            if child is not None:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(graph[child])))
+                elif child in on_stack:
+                    low[node] = min(low[node], index[child])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+# Settings file sections holding SELogic, the latch, variable and output names within them
+LOGIC_SECTION = re.compile(r'L\d+$')
+LATCH_PATTERN = re.compile(r'(SET|RST)(\d+)$')
+VARIABLE_PATTERN = re.compile(r'SV\d+$')
+OUTPUT_PATTERN = re.compile(r'OUT\d+$')
 
 class SELLogicDecoder:
-    def __init__(self):
+    def __init__(self, verbose=False):
+        self.verbose = verbose  # Print every file and logic bit found while parsing
         self.logic_bits = {}  # Dictionary to store logic bit definitions
         self.logic_equations = {}  # Dictionary to store logic equations
-        self.visited = set()  # Set to track visited nodes during recursion
+        self.parsed = {}  # sel_logic.Logic tree of each logic bit
+        self.references = {}  # Logic bits referenced by each logic bit
+        self.order = []  # Logic bits in topological order, references before the bits using them
+        self.cycles = []  # Groups of logic bits that reference each other, e.g. self latching bits
+        self._component = {}  # Logic bit -> its group in cycles, bits outside a cycle are left out
+        self._height = {}  # Longest reference chain below each logic bit, None when it reaches a cycle
+        self._compiled_bits = None  # Copy of logic_bits the graph was compiled from
+        self._memo = {}  # (bit, remaining depth, blocked bits) -> expanded text
         
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
     def parse_settings_file(self, file_path):
         """Parse an SEL settings file and extract logic bits and equations."""
         try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-                
-            # Find the section identifier (e.g., [L1], [L2], etc.)
-            section_match = re.search(r'\[(L\d+)\]', content)
-            if section_match:
-                section = section_match.group(1)
-                print(f"Processing section {section} from {file_path}")
-                
-                # Extract SET and RST bits (logic latches)
-                set_patterns = re.finditer(r'SET(\d+),"([^"]*)"', content)
-                rst_patterns = re.finditer(r'RST(\d+),"([^"]*)"', content)
-                
-                # Store SET logic
-                for match in set_patterns:
-                    bit_num = match.group(1)
-                    logic = match.group(2).strip()
-                    if logic != "NA":
-                        bit_name = f"LT{bit_num}"
-                        self.logic_bits[bit_name] = logic
-                        print(f"Found SET logic for {bit_name}: {logic}")
-                
-                # Store RST logic
-                for match in rst_patterns:
-                    bit_num = match.group(1)
-                    logic = match.group(2).strip()
-                    if logic != "NA":
-                        bit_name = f"RST_LT{bit_num}"
-                        self.logic_bits[bit_name] = logic
-                
-                # Extract SV (SEL variables) definitions
-                sv_patterns = re.finditer(r'SV(\d+),"([^"]*)"', content)
-                for match in sv_patterns:
-                    bit_num = match.group(1)
-                    logic = match.group(2).strip()
-                    if logic != "NA":
-                        bit_name = f"SV{bit_num}"
-                        self.logic_bits[bit_name] = logic
-                        print(f"Found SV logic for {bit_name}: {logic}")
-                
-                # Extract OUT (output) definitions
-                out_patterns = re.finditer(r'OUT(\d+),"([^"]*)"', content)
-                for match in out_patterns:
-                    bit_num = match.group(1)
-                    logic = match.group(2).strip()
-                    if logic != "NA" and logic != "0":
-                        bit_name = f"OUT{bit_num}"
-                        self.logic_bits[bit_name] = logic
-                        print(f"Found OUT logic for {bit_name}: {logic}")
-                
-                # Extract other logic equations (TR, CL, etc.)
-                other_patterns = re.finditer(r'([A-Z0-9_]+),"([^"]*)"', content)
-                for match in other_patterns:
-                    eq_name = match.group(1)
-                    logic = match.group(2).strip()
-                    # Only add if it seems like a logic equation (contains logical operators)
-                    if logic != "NA" and logic != "0" and any(op in logic for op in [" AND ", " OR ", " NOT ", "("]):
-                        self.logic_bits[eq_name] = logic
-                        print(f"Found other logic for {eq_name}: {logic}")
-                
-                return True
-            else:
-                print(f"No logic section found in {file_path}")
-                return False
-                
-        except Exception as e:
+            settings_file = read_settings_file(file_path)
+        except (OSError, UnicodeDecodeError) as e:
             print(f"Error parsing file {file_path}: {e}")
             return False
+        return self.load_settings_file(settings_file)
+
+    def load_settings_file(self, settings_file):
+        """Extract logic bits and equations from a sel_corpus.SettingsFile, only logic sections (L1-L8) count."""
+        # Find the section identifier (e.g., [L1], [L2], etc.)
+        if not settings_file.group or not LOGIC_SECTION.match(settings_file.group):
+            self.log(f"No logic section found in {settings_file.path}")
+            return False
+        self.log(f"Processing section {settings_file.group} from {settings_file.path}")
+        
+        # The file was read once, each kind of bit is one pass over its (name, value) pairs
+        latches = [(LATCH_PATTERN.match(name), logic) for name, logic in settings_file.settings]
+        
+        # Extract SET and RST bits (logic latches)
+        for match, logic in latches:
+            if match and match.group(1) == "SET" and logic != "NA":
+                bit_name = f"LT{match.group(2)}"
+                self.logic_bits[bit_name] = logic
+                self.log(f"Found SET logic for {bit_name}: {logic}")
+        for match, logic in latches:
+            if match and match.group(1) == "RST" and logic != "NA":
+                self.logic_bits[f"RST_LT{match.group(2)}"] = logic
+        
+        # Extract SV (SEL variables) and OUT (output) definitions
+        for name, logic in settings_file.settings:
+            if VARIABLE_PATTERN.match(name) and logic != "NA":
+                self.logic_bits[name] = logic
+                self.log(f"Found SV logic for {name}: {logic}")
+        for name, logic in settings_file.settings:
+            if OUTPUT_PATTERN.match(name) and logic != "NA" and logic != "0":
+                self.logic_bits[name] = logic
+                self.log(f"Found OUT logic for {name}: {logic}")
+        
+        # Extract other logic equations (TR, CL, etc.)
+        for name, logic in settings_file.settings:
+            # Only add if it seems like a logic equation (contains logical operators)
+            if logic != "NA" and logic != "0" and any(op in logic for op in [" AND ", " OR ", " NOT ", "("]):
+                self.logic_bits[name] = logic
+                self.log(f"Found other logic for {name}: {logic}")
+        
+        return True
     
-    def parse_directory(self, directory):
-        """Parse all .txt files in a directory that might contain SEL settings."""
-        for filename in os.listdir(directory):
-            if filename.lower().endswith('.txt') and 'set_l' in filename.lower():
-                file_path = os.path.join(directory, filename)
-                self.parse_settings_file(file_path)
+    def parse_directory(self, directory, cache_dir=DEFAULT_SEL_CACHE_DIR, workers=1):
+        """
+        Parse all logic settings files (Set_L*.txt) in a directory.
+
+        :param cache_dir: parsed file cache, see sel_corpus.load_corpus, None to always parse
+        :param workers: process pool size, worth it for large folders only
+        """
+        corpus = load_corpus([directory], pattern='set_l*.txt', cache_dir=cache_dir, workers=workers,
+                             verbose=self.verbose)
+        for settings_file in corpus.files:
+            self.load_settings_file(settings_file)
     
+    def compile(self):
+        """
+        Compile logic_bits into a dependency graph of parsed expressions. Called automatically
+        when logic_bits changed since the last compile.
+        """
+        self.parsed = {name: parse_setting(logic) for name, logic in self.logic_bits.items()}
+        self.references = {name: {ref for ref in references(logic) if ref in self.logic_bits}
+                           for name, logic in self.parsed.items()}
+
+        components = strongly_connected(self.references)
+        self.order = [name for component in components for name in component]
+        self.cycles = [sorted(component) for component in components
+                       if len(component) > 1 or component[0] in self.references[component[0]]]
+        self._component = {name: frozenset(cycle) for cycle in self.cycles for name in cycle}
+
+        # Below its height a bit expands the same at any depth, so it is expanded once
+        self._height = {}
+        for name in self.order:
+            if name in self._component:
+                self._height[name] = None
+                continue
+            heights = [self._height[ref] for ref in self.references[name]]
+            self._height[name] = None if None in heights else 1 + max(heights, default=-1)
+        self._compiled_bits = dict(self.logic_bits)
+        self._memo = {}
+
+    def _ensure_compiled(self):
+        if self._compiled_bits != self.logic_bits:
+            self.compile()
+
+    def _expander(self, remaining, path):
+        """format_node callback, references to logic bits not already on path become their expansion"""
+        def expand(name):
+            if name in self.parsed and name not in path:
+                return self._expand_bit(name, remaining - 1, path | {name})
+            return None
+        return expand
+
+    def _expand_bit(self, name, remaining, path):
+        """
+        Expansion of one logic bit, path holds the bits being expanded above it (name included).
+        A reference back onto the path closes a cycle and stays as the bit name. Only the path
+        members in the same cycle as name change the result, so that is all the memo key keeps.
+        """
+        if remaining < 0:
+            return f"[MAX_DEPTH_REACHED: {format_node(self.parsed[name])}]"
+
+        height = self._height[name]
+        if height is not None:
+            remaining = min(remaining, height)
+        component = self._component.get(name)
+        key = (name, remaining, path & component if component else None)
+        expanded = self._memo.get(key)
+        if expanded is None:
+            expanded = format_node(self.parsed[name], self._expander(remaining, path))
+            self._memo[key] = expanded
+        return expanded
+
     def expand_logic(self, expression, depth=0, max_depth=10):
-        """Recursively expand a logic expression by substituting bit references."""
+        """Expand a logic expression by substituting bit references, each bit is expanded once and reused."""
         if depth > max_depth:
             return f"[MAX_DEPTH_REACHED: {expression}]"
         
@@ -98,84 +207,46 @@ class SELLogicDecoder:
         if not expression or expression == "0" or expression == "NA":
             return expression
         
-        # Find all word bits (like LT01, SV02, etc.) in the expression
-        word_bits = re.findall(r'\b([A-Z0-9_]+)(?!\s*=)', expression)
-        
-        # If no word bits found, return the expression as is
-        if not word_bits:
-            return expression
-        
-        expanded_expression = expression
-        
-        # Replace each word bit with its definition
-        for bit in word_bits:
-            # Skip if it's a common operator or number
-            if bit in ["AND", "OR", "NOT", "XOR", "R_TRIG", "F_TRIG"]:
-                continue
-            
-            # Skip numeric literals
-            if bit.isdigit():
-                continue
-                
-            # Check if the bit has a definition and hasn't been visited yet to avoid circular references
-            if bit in self.logic_bits and bit not in self.visited:
-                self.visited.add(bit)
-                bit_definition = self.logic_bits[bit]
-                
-                # Recursively expand the bit definition
-                expanded_definition = self.expand_logic(bit_definition, depth + 1, max_depth)
-                
-                # Replace all instances of the bit with its expanded definition, wrapping in parentheses
-                # for clarity and to preserve operator precedence
-                pattern = r'\b' + re.escape(bit) + r'\b'
-                expanded_expression = re.sub(pattern, f"({expanded_definition})", expanded_expression)
-                
-                self.visited.remove(bit)
-            
-        return expanded_expression
+        self._ensure_compiled()
+        return format_logic(parse_setting(expression), self._expander(max_depth - depth, frozenset()))
     
     def decode_equation(self, equation_name, max_depth=5):
         """Decode a specific logic equation by name."""
         if equation_name in self.logic_bits:
-            self.visited.clear()  # Reset visited set
-            original = self.logic_bits[equation_name]
-            expanded = self.expand_logic(original, max_depth=max_depth)
-            return {
-                "equation": equation_name,
-                "original": original,
-                "expanded": expanded
-            }
+            self._ensure_compiled()
+            return self._decode_compiled(equation_name, max_depth)
         else:
             return {
                 "equation": equation_name,
                 "error": "Equation not found"
             }
+
+    def _decode_compiled(self, equation_name, max_depth):
+        """decode_equation for a bit of the current compile, logic_bits is not compared again"""
+        expanded = self._expand_bit(equation_name, max_depth, frozenset([equation_name]))
+        # Comments of the referenced bits are dropped, a # inside the expansion would end the equation
+        if self.parsed[equation_name].comment:
+            expanded += f" # {self.parsed[equation_name].comment}"
+        return {
+            "equation": equation_name,
+            "original": self.logic_bits[equation_name],
+            "expanded": expanded
+        }
     
     def decode_all_equations(self, max_depth=5):
-        """Decode all stored logic equations."""
-        results = {}
-        for eq_name in self.logic_bits:
-            results[eq_name] = self.decode_equation(eq_name, max_depth)
-        return results
+        """Decode all stored logic equations, every shared subexpression is expanded only once."""
+        self._ensure_compiled()
+        # Referenced bits first so the memo is filled bottom up, results keep the logic_bits order
+        decoded = {eq_name: self._decode_compiled(eq_name, max_depth) for eq_name in self.order}
+        return {eq_name: decoded[eq_name] for eq_name in self.logic_bits}
 
     def format_expanded_logic(self, expanded_logic):
-        """Format expanded logic for better readability."""
-        # Add line breaks after main operators
-        formatted = re.sub(r'(\))\s+(AND|OR)\s+', r'\1\n    \2 ', expanded_logic)
-        # Indent nested expressions
-        level = 0
-        result = []
-        for char in formatted:
-            if char == '(':
-                level += 1
-                result.append(char)
-            elif char == ')':
-                level -= 1
-                result.append(char)
-            else:
-                result.append(char)
-        
-        return ''.join(result)
+        """Format expanded logic for better readability, one operand per line with nested groups indented."""
+        logic = parse_setting(expanded_logic)
+        if isinstance(logic.node, Raw):
+            # Not an equation, e.g. it holds a MAX_DEPTH_REACHED marker
+            return expanded_logic
+        return format_tree(logic)
 
 def main():
     parser = argparse.ArgumentParser(description='Decode SEL relay logic equations.')
@@ -184,10 +255,11 @@ def main():
     parser.add_argument('--equation', type=str, help='Specific equation to decode.')
     parser.add_argument('--max-depth', type=int, default=5, help='Maximum recursion depth for expansion.')
     parser.add_argument('--output', type=str, help='Output file for results.')
+    parser.add_argument('--verbose', action='store_true', help='Print every logic bit found while parsing.')
     
     args = parser.parse_args()
     
-    decoder = SELLogicDecoder()
+    decoder = SELLogicDecoder(verbose=args.verbose)
     
     # Parse input settings
     if args.file:
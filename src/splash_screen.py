@@ -1,12 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
-import time
-import threading
 
 class SplashScreen:
-    def __init__(self, root, duration=3):
+    def __init__(self, root):
         self.root = root
-        self.duration = duration
         
         # Create splash window
         self.splash = tk.Toplevel()
@@ -103,39 +100,36 @@ class SplashScreen:
         """Close the splash screen"""
         self.splash.destroy()
         
-    def show_with_progress(self):
-        """Show splash with animated progress"""
-        steps = [
-            (20, "Loading modules..."),
-            (40, "Initializing interface..."),
-            (60, "Loading configurations..."),
-            (80, "Preparing calculations..."),
-            (100, "Ready!")
-        ]
-        
-        for progress, text in steps:
-            self.update_progress(progress, text)
-            time.sleep(self.duration / len(steps))
-            
-        time.sleep(0.5)  # Brief pause at 100%
+    def show_with_progress(self, steps, timer=None):
+        """
+        Run the startup steps on the main thread, the bar moves as each one finishes.
+
+        :param steps: list of (text, function), text is shown while the function runs
+        :param timer: optional startup_timing.StartupTimer, each step is timed under its text
+        :return: list of the step results
+        """
+        results = []
+        for i, (text, func) in enumerate(steps):
+            self.update_progress(100 * i / len(steps), text)
+            if timer is not None:
+                with timer.step(text.rstrip('.')):
+                    results.append(func())
+            else:
+                results.append(func())
+                
+        self.update_progress(100, "Ready!")
         self.close()
+        return results
 
-def show_splash(root, duration=3):
-    """Show splash screen before main window"""
+def show_splash(root, steps, timer=None):
+    """Show splash screen while the startup steps run, then the main window"""
     # Hide main window
     root.withdraw()
     
     # Create and show splash
-    splash = SplashScreen(root, duration)
-    
-    # Run splash in separate thread
-    def run_splash():
-        splash.show_with_progress()
-        # Show main window after splash
-        root.deiconify()
-        
-    splash_thread = threading.Thread(target=run_splash)
-    splash_thread.daemon = True
-    splash_thread.start()
+    splash = SplashScreen(root)
+    results = splash.show_with_progress(steps, timer)
     
-    return splash
\ No newline at end of file
+    # Show main window after splash
+    root.deiconify()
+    return results
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+STDLIB = set(getattr(sys, 'stdlib_module_names', ()))
+
+class StartupTimer:
+    """Wall time of each startup step and the packages it imported, printed with --timing"""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.steps = [] # (name, seconds, top level packages imported during the step)
+
+    @contextmanager
+    def step(self, name):
+        before = set(sys.modules)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            # Standard library modules are left out, they are cheap and would hide the packages that matter
+            packages = sorted({module.split('.')[0] for module in set(sys.modules) - before
+                               if not module.startswith('_') and module.split('.')[0] not in STDLIB})
+            self.steps.append((name, seconds, packages))
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.start
+
+    def report(self):
+        lines = [f"{'Startup step':<32}{'ms':>9}  Packages imported", '-' * 72]
+        for name, seconds, packages in self.steps:
+            lines.append(f"{name:<32}{seconds * 1000:>9.1f}  {', '.join(packages)}")
+        lines.append('-' * 72)
+        lines.append(f"{'Total':<32}{self.total * 1000:>9.1f}")
+        return '\n'.join(lines)
+
+def import_times(module='main_gui', cwd=None):
+    """
+    Import time of every module pulled in by importing module, from a fresh interpreter run with -X importtime.
+
+    :return: list of (module name, self us, cumulative us) in import order
+    """
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, MPLBACKEND=os.environ.get('MPLBACKEND', 'Agg'))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # import time:       self [us] |     cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def import_time_report(module='main_gui', top=20, cwd=None):
+    """The top modules by cumulative import time, the -X importtime breakdown of the GUI cold start"""
+    rows = import_times(module, cwd)
+    total = next((cumulative for name, _, cumulative in rows if name == module), sum(r[1] for r in rows))
+    lines = [f"Import of {module}: {total / 1000:.1f} ms, {len(rows)} modules",
+             f"{'Module':<48}{'self ms':>10}{'cumul ms':>10}", '-' * 68]
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        lines.append(f"{name:<48}{self_us / 1000:>10.1f}{cumulative_us / 1000:>10.1f}")
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    print(import_time_report(sys.argv[1] if len(sys.argv) > 1 else 'main_gui'))